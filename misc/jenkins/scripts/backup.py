@@ -4,6 +4,8 @@ import os
 import subprocess
 import sys
 
+import stream
+
 # DCOS CLI
 DCOS = os.getenv("DCOS_CLI", "dcos")
 MARATHON_JSON = "marathon_app.json"
@@ -93,13 +95,34 @@ def download_dcos_package(app_id: str, target_dir: str, versions: [str], use_exi
     return DCOS_PACKAGE_VERSION, TASK_ID
 
 
-def download_task_data(task_id: str, target_dir: str) -> str:
+def download_config(task_id: str, target_dir: str) -> None:
     log.info("Downloading config.xml")
     run_cmd("{} -v task download {} jenkins_home/config.xml --target-dir={}".format(DCOS, task_id, target_dir),
             check=True,
             print_cmd=True)
+
+
+def download_task_data(task_id: str, target_dir: str) -> str:
+    download_config(task_id, target_dir)
     log.info('Downloading jobs folder')
     run_cmd("{} task download {} jenkins_home/jobs --target-dir={}".format(DCOS, task_id, target_dir),
             check=False,
             print_cmd=True)
     return "{}/config.xml".format(target_dir)
+
+
+def stream_task_data(task_id: str, target_dir: str, excludes: [str], compression: str, parallel: int,
+                     retries: int) -> str:
+    """like download_task_data but streams every top-level job folder as tar archive of its own"""
+    download_config(task_id, target_dir)
+    log.info('Streaming jobs folder')
+    _, out, _ = run_cmd("{} task exec {} find jenkins_home/jobs -mindepth 1 -maxdepth 1 -type d".format(DCOS, task_id),
+                        check=True)
+    names = [os.path.basename(line) for line in out.splitlines() if line]
+    chunks = stream.download_chunks(DCOS, task_id, names, "jenkins_home/jobs", os.path.join(target_dir, "jobs"),
+                                    excludes, compression)
+    failed = stream.transfer(chunks, parallel=parallel, retries=retries)
+    if failed:
+        log.error("Failed to download job folders: {}".format(", ".join(failed)))
+        sys.exit(1)
+    return "{}/config.xml".format(target_dir)
@@ -0,0 +1,76 @@
+import logging as log
+import os
+import re
+import time
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+TIMER_TRIGGER = b"<hudson.triggers.TimerTrigger>"
+ENABLED = re.compile(rb"<disabled>false</disabled>")
+MESOS_SINGLE_USE_SLAVE = re.compile(rb'<org\.jenkinsci\.plugins\.mesos\.MesosSingleUseSlave plugin="mesos@[0-9.]*"/>')
+
+# Options of a rewrite, passed to every worker
+Rules = namedtuple("Rules", ["disable_jobs", "disable_cron_jobs"])
+# Outcome of rewriting a single config.xml
+Result = namedtuple("Result", ["config_xml", "disabled", "mesos_slaves_removed", "written"])
+
+
+def iter_job_configs(folder: str):
+    for dirpath, d_names, f_names in os.walk(folder):
+        if "jobs" in d_names or os.path.basename(dirpath) == "jobs":
+            # This folder contains sub-sub directories which has other jobs. Nothing to do in this directory
+            continue
+        if "config.xml" in f_names:
+            yield os.path.join(dirpath, "config.xml")
+
+
+def rewrite_config(config_xml: str, rules: Rules) -> Result:
+    """
+    Applies all rules to a job config.xml in a single read and write. The file
+    is replaced atomically, and only if a rule changed it.
+    """
+    with open(config_xml, "rb") as f:
+        content = f.read()
+
+    disable_job = rules.disable_jobs or (rules.disable_cron_jobs and TIMER_TRIGGER in content)
+    updated = ENABLED.sub(b"<disabled>true</disabled>", content) if disable_job else content
+    updated, mesos_slaves_removed = MESOS_SINGLE_USE_SLAVE.subn(b"", updated)
+
+    written = updated != content
+    if written:
+        tmp = config_xml + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(updated)
+        os.replace(tmp, config_xml)
+    return Result(config_xml, disable_job, mesos_slaves_removed, written)
+
+
+def rewrite_configs(folder: str, rules: Rules, workers: int = None) -> [Result]:
+    """rewrites all job config.xml files below folder in a pool of worker processes"""
+    configs = list(iter_job_configs(folder))
+    if not configs:
+        return []
+    if workers is not None:
+        workers = max(1, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Jobs are small. Hand them out in chunks to keep the overhead per job low.
+        chunksize = max(1, len(configs) // ((workers or os.cpu_count() or 1) * 4))
+        return list(pool.map(rewrite_config, configs, [rules] * len(configs), chunksize=chunksize))
+
+
+def update_jobs(folder: str, rules: Rules, workers: int = None) -> [Result]:
+    start = time.monotonic()
+    results = rewrite_configs(folder, rules, workers)
+    seconds = time.monotonic() - start
+
+    for r in results:
+        if r.disabled:
+            log.info("Processed job {}".format(os.path.dirname(r.config_xml).replace("/jobs/", "/job/")))
+    log.info('Processed "{}" jobs from "{}"'.format(sum(1 for r in results if r.disabled), folder))
+    log.info('Scanned {} job configs in {:.1f}s ({:.0f}/s): {} disabled, {} with MesosSingleUseSlave removed, '
+             '{} written'.format(len(results), seconds,
+                                 len(results) / seconds if seconds else 0, sum(1 for r in results if r.disabled),
+                                 sum(1 for r in results if r.mesos_slaves_removed),
+                                 sum(1 for r in results if r.written)))
+    return results
@@ -8,6 +8,8 @@ import sys
 from collections import namedtuple
 
 import backup
+import jobs
+import stream
 import translate
 
 # KUBERNETES CLI
@@ -23,13 +25,26 @@ versions = [
 separator = "--------------------------------------------------"
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("expected a number of at least 1, got {}".format(value))
+    return number
+
+
 # Return the downloaded package version
 def download(args) -> str:
     log.info('Downloading DC/OS package with marathon app id {} into target directory {}'.format(
         args.app_id, args.target_dir))
     pkg_ver, task_id = backup.download_dcos_package(args.app_id, args.target_dir, [versions[0][0], versions[1][0]],
                                                     args.use_existing_dir)
-    if not args.use_existing_dir:
+    if not args.use_existing_dir and args.stream:
+        excludes = [e for e in stream.DEFAULT_EXCLUDES if e != "builds" or not args.retain_builds]
+        if not args.retain_next_build_number:
+            excludes.append("nextBuildNumber")
+        backup.stream_task_data(task_id, args.target_dir, stream.excludes_from_args(args, excludes), args.compression,
+                                args.parallel, args.retries)
+    elif not args.use_existing_dir:
         backup.download_task_data(task_id, args.target_dir)
     if args.retain_builds and args.retain_next_build_number:
         return pkg_ver
@@ -175,6 +190,9 @@ def jobs_copy(args):
         '{} get pods --namespace {} -l=app.kubernetes.io/instance={} --no-headers --output custom-columns=":metadata.name"'
         .format(kubectl, ns, args.release_name),
         check=True)
+    if args.stream:
+        _jobs_stream(args, src_folder, target_folder, name)
+        return
     cmds = [
         '{} exec {} --namespace {} --container jenkins -- sh -c "mkdir -p {}"'.format(
             kubectl, name, ns, target_folder),
@@ -192,42 +210,33 @@ def jobs_copy(args):
         backup.run_cmd(c, print_output=True, print_cmd=True)
 
 
+def _jobs_stream(args, src_folder: str, target_folder: str, pod: str):
+    if args.path == "*":
+        src_dir, names, target_dir = src_folder, stream.local_names(src_folder), target_folder
+    else:
+        # a single job or folder, copied into its parent like kubectl cp does
+        src_dir, job = os.path.split(src_folder.rstrip("/"))
+        names, target_dir = [job], os.path.dirname(target_folder.rstrip("/"))
+    chunks = stream.upload_chunks(kubectl, args.namespace, pod, names, src_dir, target_dir,
+                                  stream.excludes_from_args(args), args.compression)
+
+    if args.dry_run:
+        print("Execute the following commands to copy the jobs:")
+        for c in chunks:
+            print(stream.pipeline(c))
+        return
+    failed = stream.transfer(chunks, parallel=args.parallel, retries=args.retries)
+    if failed:
+        log.error("Failed to copy job folders: {}".format(", ".join(failed)))
+        sys.exit(1)
+
+
 def jobs_update(args):
     target_dir = os.path.abspath(args.target_dir)
     folder, _ = _jobs_dir(target_dir, args.path)
-    count = 0
-    for dirpath, d_names, f_names in os.walk(folder):
-        if "jobs" in d_names or os.path.basename(dirpath) == "jobs":
-            # This folder contains sub-sub directories which has other jobs. Nothing to do in this directory
-            continue
-        job_config_xml = os.path.join(dirpath, "config.xml")
-        if not os.path.exists(job_config_xml):
-            continue
-        modified = False
-        disable_job = False
-        if args.disable_jobs:
-            disable_job = True
-        elif args.disable_cron_jobs:
-            rc, _, _ = backup.run_cmd("grep -q {} {}".format("<hudson.triggers.TimerTrigger>", job_config_xml),
-                                      print_output=False,
-                                      check=False)
-            disable_job = rc == 0
-
-        if disable_job:
-            backup.run_cmd("sed -i '' -e 's/{}/{}/g' {}".format("<disabled>false<\/disabled>",
-                                                                "<disabled>true<\/disabled>", job_config_xml),
-                           print_output=False,
-                           check=False)
-            modified = True
-        backup.run_cmd("sed -i '' -e 's/{}//g' {}".format(
-            '<org.jenkinsci.plugins.mesos.MesosSingleUseSlave plugin="mesos@[0-9.]*"\/>', job_config_xml),
-                       print_output=False,
-                       check=False)
-        if modified:
-            log.info("Processed job {}".format(dirpath.replace("/jobs/", "/job/")))
-            count = count + 1
-
-    log.info('Processed "{}" jobs from "{}"'.format(count, folder))
+    jobs.update_jobs(folder,
+                     jobs.Rules(disable_jobs=args.disable_jobs, disable_cron_jobs=args.disable_cron_jobs),
+                     workers=args.workers)
 
 
 def _is_job_folder(path: str) -> bool:
@@ -295,6 +304,7 @@ def main():
     backup_cmd.add_argument("--retain-next-build-number",
                             action='store_true',
                             help='Set to retain nextBuildNumber counter')
+    stream.add_stream_args(backup_cmd)
     backup_cmd.set_defaults(func=download)
 
     # Step 2 : Migrate the config.xml from DC/OS Jenkins format to Kubernetes Jenkins format and print install instructions
@@ -352,6 +362,10 @@ def main():
         help=
         'If set, the job config.xml is updated to disable the job by setting "<disabled>true</disabled>" iff the job has a TimerTrigger (cron schedule)'
     )
+    migrate_jobs_update_cmd.add_argument("--workers",
+                                         type=positive_int,
+                                         default=None,
+                                         help="Number of processes updating jobs (defaults to the number of CPUs)")
     migrate_jobs_update_cmd.set_defaults(func=jobs_update)
 
     # Step 3b: Copy jobs to kubernetes jenkins instance
@@ -370,6 +384,7 @@ def main():
     migrate_jobs_copy_cmd.add_argument("--dry-run",
                                        action='store_true',
                                        help="Setting this flag would just print the commands without executing them")
+    stream.add_stream_args(migrate_jobs_copy_cmd)
     migrate_jobs_copy_cmd.set_defaults(func=jobs_copy)
 
     args = parser.parse_args()
@@ -0,0 +1,120 @@
+import logging as log
+import os
+import shlex
+import subprocess
+import time
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# tar options compressing and decompressing the stream. tar runs the compressor itself so that its own failures are
+# not hidden by a pipe to a separate one.
+COMPRESSION = {
+    "none": "",
+    "gzip": " -z",
+    "zstd": " -I zstd",
+}
+# Folders not worth copying: build history and checked out sources are recreated by the next build
+DEFAULT_EXCLUDES = ["builds", "workspace"]
+
+# A top-level job folder, copied by piping producer into consumer
+Chunk = namedtuple("Chunk", ["name", "producer", "consumer"])
+
+
+def tar_create(directory: str, name: str, excludes: [str], compression: str) -> str:
+    # "*/" leaves a top-level job folder called like an excluded one alone
+    exclude = "".join(" --exclude={}".format(shlex.quote("*/" + e)) for e in excludes)
+    return "tar{} -cf - -C {}{} {}".format(COMPRESSION[compression], shlex.quote(directory), exclude,
+                                           shlex.quote(name))
+
+
+def tar_extract(directory: str, compression: str) -> str:
+    return "mkdir -p {d} && tar{} -xf - -C {d}".format(COMPRESSION[compression], d=shlex.quote(directory))
+
+
+def in_dcos_task(dcos: str, task_id: str, cmd: str) -> str:
+    return "{} task exec {} sh -c {}".format(dcos, task_id, shlex.quote(cmd))
+
+
+def in_k8s_pod(kubectl: str, namespace: str, pod: str, cmd: str) -> str:
+    return "{} exec -i {} --namespace {} --container jenkins -- sh -c {}".format(kubectl, pod, namespace,
+                                                                                 shlex.quote(cmd))
+
+
+def download_chunks(dcos: str, task_id: str, names: [str], src_dir: str, target_dir: str, excludes: [str],
+                    compression: str) -> [Chunk]:
+    """chunks copying the folders names of src_dir in a DC/OS task to the local target_dir"""
+    return [
+        Chunk(name, in_dcos_task(dcos, task_id, tar_create(src_dir, name, excludes, compression)),
+              tar_extract(target_dir, compression)) for name in names
+    ]
+
+
+def upload_chunks(kubectl: str, namespace: str, pod: str, names: [str], src_dir: str, target_dir: str, excludes: [str],
+                  compression: str) -> [Chunk]:
+    """chunks copying the folders names of the local src_dir to target_dir in a Kubernetes pod"""
+    return [
+        Chunk(name, tar_create(src_dir, name, excludes, compression),
+              in_k8s_pod(kubectl, namespace, pod, tar_extract(target_dir, compression))) for name in names
+    ]
+
+
+def pipeline(chunk: Chunk) -> str:
+    # the consumer may be a list of commands, all but the last of them not reading the stream
+    return "{} | ( {} )".format(chunk.producer, chunk.consumer)
+
+
+def run_chunk(chunk: Chunk, retries: int, retry_delay: float) -> bool:
+    """
+    runs the pipeline of chunk, retrying only this chunk if it fails.
+    Extracting the same chunk again overwrites what a failed attempt left.
+    """
+    for attempt in range(1, retries + 2):
+        result = subprocess.run(["bash", "-o", "pipefail", "-c", pipeline(chunk)], stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            return True
+        log.warning('Copying "{}" failed (attempt {}/{}) with exit code {}: {}'.format(
+            chunk.name, attempt, retries + 1, result.returncode,
+            result.stderr.decode("utf-8", "replace").strip()))
+        if attempt <= retries:
+            time.sleep(retry_delay * 2**(attempt - 1))
+    return False
+
+
+def transfer(chunks: [Chunk], parallel: int = 4, retries: int = 3, retry_delay: float = 5.0) -> [str]:
+    """copies chunks in parallel and returns the names of the chunks which failed"""
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        ok = list(pool.map(lambda c: run_chunk(c, retries, retry_delay), chunks))
+    failed = [c.name for c, success in zip(chunks, ok) if not success]
+    log.info("Copied {} of {} job folders in {:.1f}s".format(
+        len(chunks) - len(failed), len(chunks),
+        time.monotonic() - start))
+    return failed
+
+
+def excludes_from_args(args, default: [str] = DEFAULT_EXCLUDES) -> [str]:
+    return list(default) if args.exclude is None else [e for e in args.exclude if e]
+
+
+def add_stream_args(parser) -> None:
+    parser.add_argument("--stream",
+                        action="store_true",
+                        help="Stream job folders as tar archives, one per top-level job folder in parallel")
+    parser.add_argument("--compression",
+                        choices=sorted(COMPRESSION),
+                        default="gzip",
+                        help="Compression of streamed job folders (defaults to gzip); zstd needs zstd on both ends")
+    parser.add_argument("--exclude",
+                        action="append",
+                        help="Name of folders within jobs not to stream; may be repeated, replacing the defaults "
+                        "{}. Use --exclude '' to stream everything".format(", ".join(DEFAULT_EXCLUDES)))
+    parser.add_argument("--parallel", type=int, default=4, help="Number of job folders streamed at a time")
+    parser.add_argument("--retries",
+                        type=int,
+                        default=3,
+                        help="Number of times a job folder is streamed again if it failed")
+
+
+def local_names(directory: str) -> [str]:
+    return sorted(n for n in os.listdir(directory) if os.path.isdir(os.path.join(directory, n)))
@@ -0,0 +1,5 @@
+from .synthetic import SyntheticCluster
+from .fake_server import FakeDCOSServer
+from .stub_client import StubClient
+
+__all__ = ['SyntheticCluster', 'FakeDCOSServer', 'StubClient']
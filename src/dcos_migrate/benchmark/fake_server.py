@@ -0,0 +1,239 @@
+import argparse
+import collections
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import cast, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dcos import config  # type: ignore
+
+from .synthetic import SyntheticCluster
+
+# flush streamed bodies in pieces of this size
+_WRITE_SIZE = 64 * 1024
+
+Body = Union[bytes, Iterator[bytes]]
+
+
+def normalize_path(path: str) -> str:
+    """DCOSClient.full_dcos_url produces paths like //metadata"""
+    return "/" + "/".join(p for p in unquote(path).split("/") if p)
+
+
+def _json(data: Any) -> bytes:
+    return json.dumps(data).encode('utf-8')
+
+
+def _error(message: str) -> bytes:
+    return _json({"message": message})
+
+
+def _json_stream(parts: List[Any]) -> Iterator[bytes]:
+    """yields strings in parts as they are and iterables of objects as comma separated JSON in pieces of _WRITE_SIZE"""
+    buf: List[str] = []
+    size = 0
+    for part in parts:
+        items: Iterable[str]
+        if isinstance(part, str):
+            items = [part]
+        else:
+            items = (("," if i else "") + json.dumps(o) for i, o in enumerate(part))
+        for s in items:
+            buf.append(s)
+            size += len(s)
+            if size >= _WRITE_SIZE:
+                yield "".join(buf).encode('utf-8')
+                buf = []
+                size = 0
+    yield "".join(buf).encode('utf-8')
+
+
+def group_tree(cluster: SyntheticCluster, group_id: str) -> Optional[Dict[str, Any]]:
+    """returns group_id with all its subgroups and apps embedded or None if it has no apps"""
+    group_id = "/" + group_id.strip("/")
+    prefix = group_id.rstrip("/") + "/"
+    root: Dict[str, Any] = {"id": group_id, "apps": [], "groups": []}
+    groups = {group_id: root}
+
+    found = False
+    for app in cluster.iter_apps():
+        if not app["id"].startswith(prefix):
+            continue
+        found = True
+        parent = app["id"].rsplit("/", 1)[0] or "/"
+        # create all groups between root and the parent of the app
+        missing = []
+        g = parent
+        while g not in groups:
+            missing.append(g)
+            g = g.rsplit("/", 1)[0] or "/"
+        for g in reversed(missing):
+            groups[g] = {"id": g, "apps": [], "groups": []}
+            groups[g.rsplit("/", 1)[0] or "/"]["groups"].append(groups[g])
+        groups[parent]["apps"].append(app)
+
+    if not found and group_id != "/":
+        return None
+    return root
+
+
+def route(cluster: SyntheticCluster, path: str, query: Dict[str, List[str]]) -> Tuple[int, str, Body]:
+    """
+    answers a GET request for path with the objects of cluster. Returns status,
+    content type and body. Large collections are returned as an iterator of chunks.
+    """
+    if path == "/metadata":
+        return 200, "application/json", _json(cluster.metadata())
+    if path == "/mesos/master/state-summary":
+        return 200, "application/json", _json(cluster.state_summary())
+    if path == "/marathon/v2/apps":
+        return 200, "application/json", _json_stream(['{"apps":[', cluster.iter_apps(), ']}'])
+    if path.startswith("/marathon/v2/groups"):
+        group = group_tree(cluster, path[len("/marathon/v2/groups"):] or "/")
+        if group is None:
+            return 404, "application/json", _error("Group '{}' does not exist".format(path))
+        return 200, "application/json", _json(group)
+    if path == "/service/metronome/v1/jobs":
+        return 200, "application/json", _json_stream(['[', cluster.iter_jobs(), ']'])
+    if path.startswith("/secrets/v1/secret/default"):
+        secret_path = path[len("/secrets/v1/secret/default"):].strip("/")
+        if query.get("list") == ["true"]:
+            keys = [p for p in cluster.secret_paths() if p.startswith(secret_path)]
+            return 200, "application/json", _json({"array": keys})
+        secret = cluster.secret_by_path(secret_path)
+        if secret is None:
+            return 404, "application/json", _error("Secret {} not found".format(secret_path))
+        if "binary" in secret:
+            return 200, "application/octet-stream", cast(bytes, secret["binary"])
+        return 200, "application/json", _json(secret)
+    if path == "/service/edgelb/v2/pools":
+        return 200, "application/json", _json(list(cluster.iter_pools()))
+    return 404, "application/json", _error("Not found: {}".format(path))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """serves the responses of route"""
+    server: '_Server'
+
+    # HTTP/1.0 closes the connection after each response, which lets large
+    # bodies be streamed without knowing their length upfront.
+    protocol_version = 'HTTP/1.0'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("fake DC/OS: " + format, *args)
+
+    def do_GET(self) -> None:
+        fake = self.server.fake
+        parts = urlsplit(self.path)
+        path = normalize_path(parts.path)
+
+        fake.count(path)
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        status, content_type, body = route(fake.cluster, path, parse_qs(parts.query))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if isinstance(body, bytes):
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.end_headers()
+        for chunk in body:
+            self.wfile.write(chunk)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: 'FakeDCOSServer'
+
+
+class FakeDCOSServer(object):
+    """
+    FakeDCOSServer emulates the DC/OS API endpoints used by the plugins with the
+    objects of a SyntheticCluster. Every request is delayed by latency seconds.
+
+    with FakeDCOSServer(SyntheticCluster(apps=10000)) as server:
+        client = DCOSClient(toml_config=server.toml_config())
+    """
+    def __init__(self,
+                 cluster: Optional[SyntheticCluster] = None,
+                 latency: float = 0.0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        super(FakeDCOSServer, self).__init__()
+        self.cluster = cluster or SyntheticCluster()
+        self.latency = latency
+        self.requests: Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def toml_config(self) -> Any:
+        """returns a dcos config pointing to this server"""
+        return config.Toml({"core": {"dcos_url": self.url, "ssl_verify": "false", "dcos_acs_token": "fake-token"}})
+
+    def count(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] += 1
+
+    def start(self) -> 'FakeDCOSServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-dcos", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeDCOSServer':
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m dcos_migrate.benchmark.fake_server",
+                                     description="Serve a synthetic DC/OS cluster for benchmarks.",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--apps", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--secrets", type=int, default=10000)
+    parser.add_argument("--pools", type=int, default=10)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    opts = parser.parse_args(args)
+
+    cluster = SyntheticCluster(apps=opts.apps,
+                               jobs=opts.jobs,
+                               secrets=opts.secrets,
+                               pools=opts.pools,
+                               teams=opts.teams)
+    server = FakeDCOSServer(cluster, latency=opts.latency, host=opts.host, port=opts.port)
+    print("Serving a synthetic DC/OS cluster at {}. Point core.dcos_url there.".format(server.url))
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
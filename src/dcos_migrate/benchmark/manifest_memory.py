@@ -0,0 +1,110 @@
+"""
+Compares the memory Marathon manifests take as kubernetes.client models and as
+Documents:
+
+    python -m dcos_migrate.benchmark.manifest_memory --apps 10000
+
+Every synthetic app is migrated in both representations and the memory the
+resulting Manifests hold on to is measured with tracemalloc.
+"""
+import argparse
+import gc
+import logging
+import os
+import tempfile
+import tracemalloc
+from typing import Any, Dict, List
+
+from dcos_migrate import utils
+from dcos_migrate.system import Manifest, ManifestList
+
+from .synthetic import SyntheticCluster
+
+
+def secret_manifests(cluster: SyntheticCluster) -> ManifestList:
+    """returns migrated secrets for all secrets the apps of cluster refer to"""
+    from kubernetes.client.models import V1ObjectMeta, V1Secret  # type: ignore
+
+    ml = ManifestList()
+    for path in cluster.secret_paths():
+        name = utils.dnsify(path)
+        secret = V1Secret(metadata=V1ObjectMeta(name=name), data={name: "c2VjcmV0"})
+        ml.append(Manifest(pluginName="secret", manifestName=name, data=[secret]))
+    return ml
+
+
+def migrate_apps(cluster: SyntheticCluster, secrets: ManifestList, documents: bool) -> List[Manifest]:
+    from dcos_migrate.plugins.marathon.migrator import MarathonMigrator
+
+    manifests = []
+    for app in cluster.iter_apps():
+        mig = MarathonMigrator(object=app, manifest_list=secrets, documents=documents)
+        # what migrate does for every app, without looking up the id by jsonpath first
+        mig.translate_marathon("id", app["id"], "id")
+        if mig.manifest is not None:
+            manifests.append(mig.manifest)
+    return manifests
+
+
+def measure(cluster: SyntheticCluster, secrets: ManifestList, documents: bool) -> Dict[str, Any]:
+    """returns the memory held by the manifests of all apps of cluster"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        manifests = migrate_apps(cluster, secrets, documents)
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    yaml_bytes = sum(len(m.serialize().encode('utf-8')) for m in manifests)
+    return {
+        "manifests": len(manifests),
+        "resources": sum(len(m) for m in manifests),
+        "held_mb": round(held / (1024 * 1024), 1),
+        "bytes_per_app": held // max(len(manifests), 1),
+        "yaml_mb": round(yaml_bytes / (1024 * 1024), 1),
+        "times_yaml": round(held / yaml_bytes, 1) if yaml_bytes else None,
+    }
+
+
+def report(results: Dict[str, Dict[str, Any]]) -> str:
+    header = "{:<10} {:>10} {:>10} {:>10} {:>14} {:>10} {:>10}".format("", "manifests", "resources", "held MiB",
+                                                                       "bytes/app", "YAML MiB", "x YAML")
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append("{:<10} {:>10} {:>10} {:>10} {:>14} {:>10} {:>10}".format(name, r["manifests"], r["resources"],
+                                                                               r["held_mb"], r["bytes_per_app"],
+                                                                               r["yaml_mb"], r["times_yaml"]))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=int, default=10000)
+    parser.add_argument("--secrets", type=int, default=200)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    cluster = SyntheticCluster(apps=opts.apps, secrets=opts.secrets, teams=opts.teams, seed=opts.seed)
+    secrets = secret_manifests(cluster)
+
+    results = {}
+    # stateful apps write their migration scripts relative to the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="dcos-migrate-benchmark-") as tmp:
+        os.chdir(tmp)
+        try:
+            results["models"] = measure(cluster, secrets, documents=False)
+            results["documents"] = measure(cluster, secrets, documents=True)
+        finally:
+            os.chdir(cwd)
+
+    print("{} apps".format(opts.apps))
+    print(report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import collections
+import threading
+from typing import cast, Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from dcos import http  # type: ignore
+from dcos.errors import DCOSException  # type: ignore
+
+from dcos_migrate.system import DCOSClient
+from dcos_migrate.system.client import STREAM_CHUNK_SIZE
+from dcos_migrate.system.recording import raise_for_dcos_status
+
+from .fake_server import Body, normalize_path, route
+from .synthetic import SyntheticCluster
+
+
+class StubClient(DCOSClient):
+    """
+    StubClient answers requests in-process with the objects of a SyntheticCluster,
+    the same way FakeDCOSServer does but without sockets or HTTP parsing. Use it
+    to measure the cost of the plugins themselves.
+
+    Only GET requests are supported. Streamed collections are generated while
+    they are consumed, so memory stays flat regardless of the cluster size.
+    """
+    def __init__(self, cluster: Optional[SyntheticCluster] = None, dcos_url: str = "http://synthetic.cluster"):
+        super(StubClient, self).__init__(toml_config={}, dcos_url=dcos_url)
+        self.cluster = cluster or SyntheticCluster()
+        self.requests: Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def _route(self, method: str, url: str) -> Tuple[int, str, Body]:
+        if method.upper() != "GET":
+            raise DCOSException("StubClient does not support {} {}".format(method.upper(), url))
+        parts = urlsplit(url)
+        path = normalize_path(parts.path)
+        with self._lock:
+            self.requests[path] += 1
+        return route(self.cluster, path, parse_qs(parts.query))
+
+    def _response(self, url: str, status: int, content_type: str, body: bytes) -> http.requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = body
+        response._content_consumed = True  # type: ignore
+
+        self.account(response)
+        raise_for_dcos_status(response)
+        return response
+
+    def request(self, method: str, url: str, **kwargs: Any) -> http.requests.Response:
+        status, content_type, body = self._route(method, url)
+        return self._response(url, status, content_type, body if isinstance(body, bytes) else b"".join(body))
+
+    def get_stream(self, url: str, chunk_size: int = STREAM_CHUNK_SIZE, **kwargs: Any) -> Iterator[bytes]:
+        status, content_type, body = self._route("GET", url)
+        if isinstance(body, bytes):
+            return cast(Iterator[bytes], self._response(url, status, content_type, body).iter_content(chunk_size))
+        self.stats.add(requests=1)
+        return self.stats.count(body)
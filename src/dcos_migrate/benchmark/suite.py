@@ -0,0 +1,283 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .synthetic import SyntheticCluster
+
+PHASES = ["backup", "store", "load", "migrate", "migrate-streaming"]
+# backup over HTTP from a FakeDCOSServer, the way DCOSMigrate talks to a real cluster. Only run when selected
+EXTRA_PHASES = ["backup-http"]
+# bump when the layout of the result files changes
+RESULTS_VERSION = 1
+
+
+def peak_rss_mb() -> float:
+    """peak resident set size of this process in MiB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        return float(rss) / (1024 * 1024)
+    return float(rss) / 1024
+
+
+def _migrate(workdir: str) -> Any:
+    """returns a DCOSMigrate keeping all its files in workdir"""
+    from dcos_migrate.cmd import DCOSMigrate
+    from dcos_migrate.system import BackupList, ManifestList
+    from dcos_migrate.system.checkpoint import Checkpoint
+
+    m = DCOSMigrate()
+    m.handleArgparse(["all"])
+    m.backup_list = BackupList(path=os.path.join(workdir, "backup"))
+    m.manifest_list = ManifestList(path=os.path.join(workdir, "migrate"))
+    m.checkpoint = Checkpoint(path=os.path.join(workdir, "checkpoint"))
+    return m
+
+
+def _phase_backup(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    from .stub_client import StubClient
+
+    m = _migrate(workdir)
+    m.client = StubClient(cluster)
+    start = time.perf_counter()
+    m.backup(None, False)
+    return time.perf_counter() - start, len(m.backup_list)
+
+
+def _phase_backup_http(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    from dcos_migrate.system import DCOSClient
+    from .fake_server import FakeDCOSServer
+
+    m = _migrate(workdir)
+    with FakeDCOSServer(cluster) as server:
+        m.client = DCOSClient(toml_config=server.toml_config())
+        start = time.perf_counter()
+        m.backup(None, False)
+        seconds = time.perf_counter() - start
+    return seconds, len(m.backup_list)
+
+
+def _phase_store(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    from dcos_migrate.system import BackupList
+
+    backups = BackupList(path=os.path.join(workdir, "backup")).load()
+    out = BackupList(path=os.path.join(workdir, "store"))
+    out.extend(backups)
+    start = time.perf_counter()
+    out.store()
+    return time.perf_counter() - start, len(out)
+
+
+def _phase_load(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    from dcos_migrate.system import BackupList
+
+    start = time.perf_counter()
+    backups = BackupList(path=os.path.join(workdir, "backup")).load()
+    return time.perf_counter() - start, len(backups)
+
+
+def _phase_migrate(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    m = _migrate(workdir)
+    m.backup(None, True)
+    start = time.perf_counter()
+    m.migrate(None, False)
+    return time.perf_counter() - start, len(m.manifest_list)
+
+
+def _phase_migrate_streaming(cluster: SyntheticCluster, workdir: str) -> Tuple[float, int]:
+    m = _migrate(workdir)
+    m.manifest_list.streaming = True
+    m.manifest_list.resident = m.pm.dependencies('migrate_depends')
+    m.backup(None, True)
+    start = time.perf_counter()
+    m.migrate(None, False)
+    return time.perf_counter() - start, len(m.manifest_list) + len(m.manifest_list.on_disk())
+
+
+_PHASE_FUNCS: Dict[str, Callable[[SyntheticCluster, str], Tuple[float, int]]] = {
+    "backup": _phase_backup,
+    "backup-http": _phase_backup_http,
+    "store": _phase_store,
+    "load": _phase_load,
+    "migrate": _phase_migrate,
+    "migrate-streaming": _phase_migrate_streaming,
+}
+
+
+def run_phase(phase: str, cluster: SyntheticCluster, workdir: str) -> Dict[str, Any]:
+    """runs a single phase in this process and returns its measurements"""
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    # plugins write some artifacts relative to the working directory
+    os.chdir(workdir)
+    # measure the baseline after the imports all phases need
+    import dcos_migrate.cmd  # noqa: F401
+    rss_start = peak_rss_mb()
+    seconds, items = _PHASE_FUNCS[phase](cluster, workdir)
+    return {
+        "seconds": round(seconds, 4),
+        "items": items,
+        "apps_per_sec": round(cluster.apps / seconds, 1) if seconds else None,
+        "items_per_sec": round(items / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "start_rss_mb": round(rss_start, 1),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"],
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL,
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.decode('ascii').strip() or None
+
+
+def run_suite(cluster: SyntheticCluster,
+              phases: Optional[List[str]] = None,
+              workdir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    runs phases one after another against cluster. Every phase runs in a fresh
+    process so its peak RSS is not inflated by the phases before it. Later
+    phases work on the files written by backup, so it always runs first.
+    """
+    selected = phases or PHASES
+    phases = [p for p in PHASES + EXTRA_PHASES if p == "backup" or p in selected]
+
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "scale": {
+            "apps": cluster.apps,
+            "jobs": cluster.jobs,
+            "secrets": cluster.secrets,
+            "pools": cluster.pools,
+            "teams": cluster.teams,
+            "seed": cluster.seed,
+        },
+        "phases": {},
+    }
+
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="dcos-migrate-benchmark-", dir=workdir) as tmp:
+        for phase in phases:
+            logging.info("benchmarking {}".format(phase))
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(run_phase, phase, cluster, tmp).result()
+            if phase in selected:
+                results["phases"][phase] = result
+
+    return results
+
+
+def _change(new: Optional[float], old: Optional[float]) -> str:
+    if not new or not old:
+        return ""
+    return "{:+.1f}%".format((new - old) / old * 100)
+
+
+def report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """renders results as a table, with the relative change to baseline if given"""
+    lines = ["{apps} apps, {jobs} jobs, {secrets} secrets, {pools} pools".format(**results["scale"])]
+    header = "{:<17} {:>10} {:>8} {:>12} {:>14}".format("phase", "seconds", "items", "apps/sec", "peak RSS MiB")
+    if baseline:
+        header += " {:>10} {:>10}".format("time", "RSS")
+    lines.append(header)
+
+    for phase, r in results["phases"].items():
+        line = "{:<17} {:>10.3f} {:>8} {:>12} {:>14.1f}".format(phase, r["seconds"], r["items"], r["apps_per_sec"]
+                                                                or "-", r["peak_rss_mb"])
+        if baseline:
+            old = baseline.get("phases", {}).get(phase, {})
+            line += " {:>10} {:>10}".format(_change(r["seconds"], old.get("seconds")),
+                                            _change(r["peak_rss_mb"], old.get("peak_rss_mb")))
+        lines.append(line)
+
+    if baseline and baseline.get("scale") != results["scale"]:
+        lines.append("warning: baseline {} was measured at a different scale".format(baseline.get("commit")))
+    return "\n".join(lines)
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """returns the phases of results whose apps/sec dropped more than tolerance percent below baseline"""
+    found = []
+    for phase, r in results["phases"].items():
+        old = baseline.get("phases", {}).get(phase, {}).get("apps_per_sec")
+        new = r["apps_per_sec"]
+        if old and new is not None and new < old * (1 - tolerance / 100.0):
+            found.append("{}: {} apps/sec, baseline {} ({})".format(phase, new, old, _change(new, old)))
+    return found
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m dcos_migrate.benchmark.suite",
+                                     description="Time and memory-profile backup, migrate, store and load "
+                                     "against a synthetic cluster.",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--apps", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--secrets", type=int, default=5000)
+    parser.add_argument("--pools", type=int, default=10)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--phases", nargs="+", choices=PHASES + EXTRA_PHASES, default=PHASES)
+    parser.add_argument("--workdir", help="directory for temporary files, defaults to the system temp dir")
+    parser.add_argument("--output", help="write JSON results here. Defaults to ./dcos-migrate/benchmark/<commit>.json")
+    parser.add_argument("--compare", metavar="RESULTS", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--max-regression",
+                        type=float,
+                        metavar="PERCENT",
+                        help="exit with status 1 if apps/sec of a phase dropped more than PERCENT below --compare")
+    opts = parser.parse_args(args)
+    if opts.max_regression is not None and not opts.compare:
+        parser.error("--max-regression needs --compare")
+
+    cluster = SyntheticCluster(apps=opts.apps,
+                               jobs=opts.jobs,
+                               secrets=opts.secrets,
+                               pools=opts.pools,
+                               teams=opts.teams,
+                               seed=opts.seed)
+    results = run_suite(cluster, phases=opts.phases, workdir=opts.workdir)
+
+    output = opts.output or os.path.join("dcos-migrate", "benchmark", "{}.json".format(
+        (results["commit"] or "unknown")[:12]))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if opts.compare:
+        with open(opts.compare) as f:
+            baseline = json.load(f)
+
+    print(report(results, baseline))
+    print("Results written to {}".format(output))
+
+    if baseline and opts.max_regression is not None:
+        if baseline.get("scale") != results["scale"]:
+            sys.exit("Cannot check for regressions against a baseline measured at a different scale")
+        slower = regressions(results, baseline, opts.max_regression)
+        if slower:
+            sys.exit("Throughput dropped more than {}% below the baseline:\n{}".format(
+                opts.max_regression, "\n".join(slower)))
+
+
+if __name__ == "__main__":
+    main()
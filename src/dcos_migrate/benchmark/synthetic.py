@@ -0,0 +1,311 @@
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+_IMAGES = ["nginx:1.19", "postgres:12", "redis:6", "python:3.8-slim", "openjdk:11-jre", "busybox:1.32"]
+_CONSTRAINTS = [
+    ["hostname", "UNIQUE"],
+    ["rack", "GROUP_BY", "3"],
+    ["rack", "MAX_PER", "2"],
+    ["hostname", "LIKE", "10\\.0\\.0\\.[0-9]+"],
+    ["type", "IS", "public"],
+]
+_CRONS = ["*/5 * * * *", "0 * * * *", "30 2 * * *", "0 0 * * 0"]
+
+
+class SyntheticCluster(object):
+    """
+    SyntheticCluster describes a DC/OS cluster of a given size. All objects are
+    generated deterministically from their index and seed when asked for, so even
+    very large clusters are never held in memory as a whole.
+
+    Apps are spread across `teams` groups (`/team-3/app-42`), jobs and secrets
+    use the same layout (`team-3.job-42`, `team-3/secret-42`). Apps mix the
+    features seen on production clusters: docker and command apps, port
+    mappings and port definitions, health checks, secrets as env vars and
+    files, persistent volumes, constraints, fetch URIs and upgrade strategies.
+    Jobs have schedules, artifacts and secrets, and pools route to apps.
+    """
+    def __init__(self,
+                 apps: int = 100,
+                 jobs: int = 20,
+                 secrets: int = 100,
+                 pools: int = 2,
+                 teams: int = 10,
+                 agents: int = 10,
+                 name: str = "synthetic",
+                 seed: int = 0):
+        super(SyntheticCluster, self).__init__()
+        self.apps = apps
+        self.jobs = jobs
+        self.secrets = secrets
+        self.pools = pools
+        self.teams = max(1, teams)
+        self.agents = agents
+        self.name = name
+        self.seed = seed
+
+    def _random(self, kind: str, i: int) -> random.Random:
+        return random.Random("{}-{}-{}".format(self.seed, kind, i))
+
+    def team(self, i: int) -> str:
+        return "team-{}".format(i % self.teams)
+
+    def secret_path(self, i: int) -> str:
+        return "{}/secret-{}".format(self.team(i), i)
+
+    def _secret_refs(self, rnd: random.Random, i: int) -> Dict[str, Dict[str, str]]:
+        if not self.secrets:
+            return {}
+        count = rnd.choice([0, 1, 1, 2, 3])
+        return {
+            "secret{}".format(n): {
+                "source": self.secret_path((i + n * 7919) % self.secrets)
+            }
+            for n in range(count)
+        }
+
+    def app(self, i: int) -> Dict[str, Any]:
+        rnd = self._random("app", i)
+        app: Dict[str, Any] = {
+            "id": "/{}/app-{}".format(self.team(i), i),
+            "cpus": rnd.choice([0.1, 0.25, 0.5, 1, 2]),
+            "mem": rnd.choice([64, 128, 256, 512, 1024, 4096]),
+            "disk": rnd.choice([0, 0, 100]),
+            "instances": rnd.choice([1, 1, 2, 3, 5]),
+            "version": "2021-01-{:02d}T12:00:00.000Z".format(i % 28 + 1),
+            "labels": {
+                "team": self.team(i),
+                "HAPROXY_GROUP": "external"
+            },
+            "env": {
+                "LOG_LEVEL": rnd.choice(["debug", "info", "warn"]),
+                "APP_INDEX": str(i)
+            },
+            "upgradeStrategy": {
+                "minimumHealthCapacity": rnd.choice([0, 0.5, 1]),
+                "maximumOverCapacity": rnd.choice([0, 0.2, 1])
+            },
+        }
+
+        docker = rnd.random() < 0.8
+        if docker:
+            app["container"] = {
+                "type":
+                rnd.choice(["DOCKER", "MESOS"]),
+                "docker": {
+                    "image": rnd.choice(_IMAGES),
+                    "forcePullImage": rnd.random() < 0.3
+                },
+                "portMappings": [{
+                    "name": "http",
+                    "containerPort": 8080,
+                    "hostPort": 0,
+                    "protocol": "tcp",
+                    "labels": {
+                        "VIP_0": "/{}/app-{}:8080".format(self.team(i), i)
+                    }
+                }],
+                "volumes": [],
+            }
+            app["networks"] = [{"mode": "container/bridge"}]
+            app["cmd"] = rnd.choice([None, "./start.sh --port 8080"])
+            if app["cmd"] is None:
+                del app["cmd"]
+        else:
+            app["cmd"] = "python3 -m http.server $PORT0"
+            app["portDefinitions"] = [{"port": 0, "protocol": "tcp", "name": "http"}]
+
+        health = rnd.choice(["MESOS_HTTP", "MESOS_TCP", "COMMAND", None])
+        if health:
+            check: Dict[str, Any] = {
+                "protocol": health,
+                "gracePeriodSeconds": rnd.choice([60, 300, 600]),
+                "intervalSeconds": rnd.choice([10, 30, 60]),
+                "timeoutSeconds": 20,
+                "maxConsecutiveFailures": 3,
+            }
+            if health == "MESOS_HTTP":
+                check.update({"path": "/health", "portIndex": 0})
+            elif health == "MESOS_TCP":
+                check["portIndex"] = 0
+            else:
+                check["command"] = {"value": "curl -f http://localhost:$PORT0/health"}
+            app["healthChecks"] = [check]
+
+        secrets = self._secret_refs(rnd, i)
+        if secrets:
+            app["secrets"] = secrets
+            for n, name in enumerate(sorted(secrets)):
+                if docker and n == 1:
+                    # file based secret
+                    app["container"]["volumes"].append({"containerPath": "/etc/secret-{}".format(n), "secret": name})
+                else:
+                    app["env"]["SECRET_{}".format(n)] = {"secret": name}
+
+        if docker and rnd.random() < 0.05:
+            app["container"]["volumes"].extend([{
+                "containerPath": "/var/lib/data",
+                "hostPath": "data",
+                "mode": "RW"
+            }, {
+                "containerPath": "data",
+                "mode": "RW",
+                "persistent": {
+                    "type": "root",
+                    "size": rnd.choice([512, 1024, 10240])
+                }
+            }])
+            app["upgradeStrategy"] = {"minimumHealthCapacity": 0, "maximumOverCapacity": 0}
+            app["instances"] = 1
+
+        if rnd.random() < 0.4:
+            app["constraints"] = rnd.sample(_CONSTRAINTS[:3], rnd.choice([1, 2]))
+
+        if rnd.random() < 0.3:
+            app["fetch"] = [{
+                "uri": "https://artifacts.example.com/{}/app-{}.tgz".format(self.team(i), i),
+                "extract": True,
+                "executable": False,
+                "cache": False
+            }]
+
+        return app
+
+    def job(self, i: int) -> Dict[str, Any]:
+        rnd = self._random("job", i)
+        job: Dict[str, Any] = {
+            "id": "{}.job-{}".format(self.team(i), i),
+            "description": "synthetic job {}".format(i),
+            "labels": {
+                "team": self.team(i)
+            },
+            "run": {
+                "cmd": "./run-batch.sh",
+                "cpus": rnd.choice([0.1, 0.5, 1]),
+                "mem": rnd.choice([32, 128, 512]),
+                "disk": 0,
+                "maxLaunchDelay": 3600,
+                "restart": {
+                    "policy": rnd.choice(["NEVER", "ON_FAILURE"])
+                },
+                "env": {
+                    "JOB_INDEX": str(i)
+                },
+                "placement": {
+                    "constraints": []
+                },
+            },
+            "schedules": [],
+        }
+        run = job["run"]
+        if rnd.random() < 0.7:
+            run["docker"] = {"image": rnd.choice(_IMAGES)}
+        if rnd.random() < 0.3:
+            run["artifacts"] = [{
+                "uri": "https://artifacts.example.com/{}/job-{}.tgz".format(self.team(i), i),
+                "extract": True,
+                "executable": False,
+                "cache": False
+            }]
+        secrets = self._secret_refs(rnd, i)
+        if secrets:
+            run["secrets"] = secrets
+            for n, name in enumerate(sorted(secrets)):
+                run["env"]["SECRET_{}".format(n)] = {"secret": name}
+        if rnd.random() < 0.8:
+            job["schedules"].append({
+                "id": "default",
+                "cron": rnd.choice(_CRONS),
+                "timezone": "UTC",
+                "startingDeadlineSeconds": 900,
+                "concurrencyPolicy": "ALLOW",
+                "enabled": True
+            })
+        return job
+
+    def secret(self, i: int) -> Dict[str, Any]:
+        """a text secret {"value": str} or every tenth a binary secret {"binary": bytes}"""
+        rnd = self._random("secret", i)
+        if i % 10 == 9:
+            return {"binary": bytes(rnd.getrandbits(8) for _ in range(64))}
+        return {"value": "value-{}-{:032x}".format(i, rnd.getrandbits(128))}
+
+    def pool(self, i: int) -> Dict[str, Any]:
+        apps = [self.app((i * 3 + n) % self.apps)["id"] for n in range(min(3, self.apps))] or ["/app"]
+        return {
+            "apiVersion": "V2",
+            "name": "pool-{}".format(i),
+            "namespace": "dcos-edgelb/pools",
+            "count": 1,
+            "autoCertificate": i % 2 == 0,
+            "haproxy": {
+                "frontends": [{
+                    "bindPort": 80,
+                    "protocol": "HTTP",
+                    "linkBackend": {
+                        "defaultBackend":
+                        "backend-0",
+                        "map": [{
+                            "hostEq": "app-{}.example.com".format(n),
+                            "backend": "backend-{}".format(n)
+                        } for n in range(len(apps))]
+                    }
+                }],
+                "backends": [{
+                    "name": "backend-{}".format(n),
+                    "protocol": "HTTP",
+                    "services": [{
+                        "marathon": {
+                            "serviceID": app_id
+                        },
+                        "endpoint": {
+                            "portName": "http"
+                        }
+                    }]
+                } for n, app_id in enumerate(apps)]
+            }
+        }
+
+    def iter_apps(self) -> Iterator[Dict[str, Any]]:
+        return (self.app(i) for i in range(self.apps))
+
+    def iter_jobs(self) -> Iterator[Dict[str, Any]]:
+        return (self.job(i) for i in range(self.jobs))
+
+    def secret_paths(self) -> List[str]:
+        return [self.secret_path(i) for i in range(self.secrets)]
+
+    def secret_by_path(self, path: str) -> Optional[Dict[str, Any]]:
+        """returns the secret stored at path or None"""
+        team, _, name = path.strip('/').partition('/')
+        if not name.startswith("secret-"):
+            return None
+        try:
+            i = int(name[len("secret-"):])
+        except ValueError:
+            return None
+        if not 0 <= i < self.secrets or self.secret_path(i) != path.strip('/'):
+            return None
+        return self.secret(i)
+
+    def iter_pools(self) -> Iterator[Dict[str, Any]]:
+        return (self.pool(i) for i in range(self.pools))
+
+    def metadata(self) -> Dict[str, Any]:
+        return {"CLUSTER_ID": "00000000-0000-0000-0000-{:012x}".format(self.seed)}
+
+    def state_summary(self) -> Dict[str, Any]:
+        return {
+            "hostname":
+            "master.mesos",
+            "cluster":
+            self.name,
+            "slaves": [{
+                "id": "agent-{}".format(i),
+                "hostname": "10.0.{}.{}".format(i // 250, i % 250 + 1),
+                "attributes": {
+                    "rack": "rack-{}".format(i % 3)
+                },
+            } for i in range(self.agents)],
+            "frameworks": [],
+        }
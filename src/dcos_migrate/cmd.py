@@ -1,10 +1,17 @@
 import logging
 import sys
+import time
 
-from typing import Iterable, List, Optional, Callable
+from typing import cast, Dict, Iterable, List, Optional, Callable
 
-from dcos_migrate.system import DCOSClient, BackupList, ManifestList, ArgParse, Arg
-from dcos_migrate.plugins.plugin_manager import PluginManager
+from dcos_migrate.system import (DCOSClient, RecordingClient, ReplayClient, Backup, BackupList, Manifest, ManifestList,
+                                 StorableList, ArgParse, Arg, ListArg)
+from dcos_migrate.system.checkpoint import Checkpoint
+from dcos_migrate.system.instrumentation import Instrumentation
+from dcos_migrate.system.profiling import Profiler
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.plugin_manager import PluginManager, get_dependency_closure
+from dcos_migrate.pipeline import Pipeline
 
 
 class DCOSMigrate(object):
@@ -24,6 +31,72 @@ class DCOSMigrate(object):
             action="count",
             default=False,
             help="Target an DC/OS OSS cluster. Disables EE specific features (like plugins)."),
+        Arg(name="pipeline",
+            action="store_true",
+            default=False,
+            help="Run backup and migrate concurrently. Plugins supporting it migrate each backup as it arrives. "
+            "Only applies to phase all."),
+        ListArg(name="plugins",
+                help="Only run these plugins and the plugins they depend on. Results of all other plugins "
+                "are loaded from disk when needed."),
+        ListArg(name="filter",
+                metavar="PATTERN",
+                help="Only back up and migrate objects whose ID matches one of these patterns. Globs match "
+                "path segments (/team-a/*) or whole subtrees (/team-a/**); a re: prefix denotes a regular "
+                "expression. Metronome job IDs are matched with dots as slashes (team-a.nightly as /team-a/nightly)."),
+        Arg(name="resume",
+            action="store_true",
+            default=False,
+            help="Continue an interrupted run. Plugins and items completed by the previous run are loaded "
+            "from disk instead of being processed again."),
+        Arg(name="streaming-store",
+            action="store_true",
+            default=False,
+            help="Keep memory bounded during migrate. Manifests are written as soon as they are created and only "
+            "the ones other plugins depend on, like cluster and secret, stay in memory. All others are read "
+            "from disk again when looked up."),
+        Arg(name="record",
+            metavar="CASSETTE",
+            help="Record all requests to the cluster and their responses into CASSETTE."),
+        Arg(name="replay",
+            metavar="CASSETTE",
+            help="Serve requests from a CASSETTE written by --record instead of a cluster."),
+        Arg(name="replay-latency",
+            type=float,
+            default=0.0,
+            metavar="SECONDS",
+            help="Latency added to every replayed request."),
+        Arg(name="replay-bandwidth",
+            type=float,
+            metavar="BYTES_PER_SECOND",
+            help="Bandwidth replayed responses are delivered at. Unlimited by default."),
+        Arg(name="instrument",
+            action="store_true",
+            default=False,
+            help="Measure wall time, CPU time, HTTP requests, objects produced and peak RSS growth of every "
+            "phase and plugin. Prints a summary at the end and writes it to --instrument-output."),
+        Arg(name="instrument-items",
+            action="store_true",
+            default=False,
+            help="Also measure the time spent on every single item. Implies --instrument."),
+        Arg(name="instrument-output",
+            default="./dcos-migrate/instrumentation.json",
+            metavar="FILE",
+            help="JSON file the measurements of --instrument are written to."),
+        ListArg(name="profile",
+                metavar="TARGET",
+                help="Run plugins under cProfile. Targets are phases (migrate), plugins (marathon), a plugin in a "
+                "phase (migrate:marathon) or all. Writes a .prof file and a report of the slowest functions per "
+                "plugin, and per phase for selected phases, to --profile-dir."),
+        Arg(name="profile-dir",
+            default="./dcos-migrate/profile",
+            metavar="DIR",
+            help="Directory the profiles of --profile are written to."),
+        Arg(name="profile-top",
+            type=int,
+            default=30,
+            metavar="N",
+            help="Number of functions listed in the reports of --profile."),
         Arg(name="verbose",
             alternatives=["-v"],
             action="count",
@@ -33,10 +106,12 @@ class DCOSMigrate(object):
 
     def __init__(self) -> None:
         super(DCOSMigrate, self).__init__()
-        self.client = DCOSClient()
+        self._client: Optional[DCOSClient] = None
         self.pm = PluginManager()
         self.manifest_list = ManifestList()
         self.backup_list = BackupList()
+        self.checkpoint = Checkpoint()
+        self.instrumentation = Instrumentation(stats=lambda: self._client.stats if self._client else None)
 
         config = self.pm.config_options
         config.extend(self.config_defaults)
@@ -49,11 +124,63 @@ class DCOSMigrate(object):
             self.initPhase, self.backup, self.backup_data, self.migrate, self.migrate_data
         ]
 
+    @property
+    def client(self) -> DCOSClient:
+        """the client is created on first use so it can depend on the parsed options"""
+        if self._client is None:
+            self._client = self.create_client()
+        return self._client
+
+    @client.setter
+    def client(self, client: DCOSClient) -> None:
+        self._client = client
+
+    def create_client(self) -> DCOSClient:
+        config = self.pm.config.get('global', {})
+        if config.get('replay'):
+            logging.info("Replaying responses from {}".format(config['replay']))
+            return ReplayClient(config['replay'],
+                                latency=config.get('replay-latency', 0.0),
+                                bandwidth=config.get('replay-bandwidth'))
+        if config.get('record'):
+            logging.info("Recording responses to {}".format(config['record']))
+            return RecordingClient(config['record'])
+        return DCOSClient()
+
     @property
     def selected_phase(self) -> int:
         """returns the int(index) of the selected phase or 0"""
         return self.phases_choices.index(self.pm.config['global'].get('phase', "all"))
 
+    @property
+    def resume(self) -> bool:
+        return bool(self.pm.config['global'].get('resume', False))
+
+    @property
+    def instrument(self) -> bool:
+        config = self.pm.config['global']
+        return bool(config.get('instrument') or config.get('instrument-items'))
+
+    def selection(self, pluginName: Optional[str] = None) -> Optional[List[str]]:
+        """returns the names of the plugins selected to run or None for all plugins"""
+        if pluginName:
+            return [pluginName]
+        return cast(Optional[List[str]], self.pm.config['global'].get('plugins'))
+
+    def _select(self, batches: List[List[MigratePlugin]], depattr: str, pluginName: Optional[str],
+                storable_list: StorableList) -> List[List[MigratePlugin]]:
+        """
+        limits batches to the selected plugins and their dependencies. The stored
+        results of all other plugins are registered to be loaded on first access.
+        """
+        batches = self.pm.select(batches, depattr, self.selection(pluginName))
+        selected = {p.plugin_name for batch in batches for p in batch}
+        for name in self.pm.plugins:
+            if name not in selected:
+                logging.info("plugin {} not selected - using its stored results.".format(name))
+                storable_list.load_lazy(name)
+        return batches
+
     def _end_process(self, message: str, exit_code: int = 0) -> int:
         print("Ending DC/OS migration - {}".format(message))
         return exit_code
@@ -63,17 +190,109 @@ class DCOSMigrate(object):
         self.handleArgparse(args)
         self.handleGlobal()
 
+        unknown = set(self.selection() or []) - set(self.pm.plugins)
+        if unknown:
+            self.argparse.parser.error("unknown plugins {}. Available plugins: {}".format(
+                ", ".join(sorted(unknown)), ", ".join(sorted(self.pm.plugins))))
+
+        config = self.pm.config['global']
+        if config.get('profile'):
+            targets = set(config['profile'])
+            known = {"all"} | set(self.phases_choices[1:]) | set(self.pm.plugins)
+            unknown = {t for t in targets for part in t.split(":", 1) if part not in known}
+            if unknown:
+                self.argparse.parser.error("unknown profile targets {}. Use phases, plugins or phase:plugin".format(
+                    ", ".join(sorted(unknown))))
+            self.instrumentation.profiler = Profiler(targets,
+                                                     directory=config.get('profile-dir', "./dcos-migrate/profile"),
+                                                     top=config.get('profile-top', 30))
+
+        if config.get('streaming-store'):
+            self.manifest_list.streaming = True
+            self.manifest_list.resident = self.pm.dependencies('migrate_depends') | self.pm.dependencies(
+                'migrate_data_depends')
+
+        self.instrumentation.items = bool(config.get('instrument-items'))
+        try:
+            return self.run_phases()
+        finally:
+            if self._client is not None:
+                self._client.close()
+            if self.instrument:
+                self.report_instrumentation()
+            if self.instrumentation.profiler:
+                profiles = self.instrumentation.profiler.finish()
+                print("{} profiles written to {}".format(len(profiles), self.instrumentation.profiler.directory))
+
+    def report_instrumentation(self) -> None:
+        """prints the measurements of this run and writes them as JSON"""
+        print(self.instrumentation.summary())
+        self.instrumentation.write(self.pm.config['global'].get('instrument-output',
+                                                                "./dcos-migrate/instrumentation.json"))
+
+    def run_phases(self) -> int:
+        """runs the phases starting with the selected one. Returns exit code as int"""
+        if self.pm.config['global'].get('pipeline'):
+            if self.resume:
+                logging.warning("--resume is not supported with --pipeline. Running phases one after another.")
+            elif self.selected_phase == 0:
+                return self.run_pipelined()
+            else:
+                logging.warning("--pipeline only applies to phase all. Running phases one after another.")
+
         for i, p in enumerate(self.phases):
-            if self.selected_phase > i:
-                p(None, True)
+            skip = self.selected_phase > i
+            if i == 0:
+                p(None, skip)
+            else:
+                name = self.phases_choices[i] + (" (skipped)" if skip else "")
+                with self.instrumentation.measure(name):
+                    p(None, skip)
+            if skip:
                 continue
-            p(None, False)
 
             if self.selected_phase and self.selected_phase == i:
                 return self._end_process("selected phase {} reached".format(self.phases_choices[i]))
 
         return 0
 
+    def run_pipelined(self) -> int:
+        """runs all phases while backup and migrate are connected into a pipeline"""
+        self.initPhase(None, False)
+
+        plugins = self.pm.plugins
+        selection = self.selection()
+        if selection:
+            # a pipeline runs both phases, so follow both kinds of dependencies
+            names = set(selection)
+            pending = list(selection)
+            while pending:
+                name = pending.pop()
+                deps = get_dependency_closure(plugins, name, 'backup_depends') | get_dependency_closure(
+                    plugins, name, 'migrate_depends')
+                pending.extend(deps - names)
+                names |= deps
+
+            plugins = {name: p for name, p in plugins.items() if name in names}
+            for name in self.pm.plugins:
+                if name not in names:
+                    self.backup_list.load_lazy(name)
+                    self.manifest_list.load_lazy(name)
+
+        logging.info("Calling backup and migrate pipeline for {} plugins".format(len(plugins)))
+        with self.instrumentation.measure("pipeline"):
+            Pipeline(plugins=plugins,
+                     client=self.client,
+                     backup_list=self.backup_list,
+                     manifest_list=self.manifest_list,
+                     instrumentation=self.instrumentation).run()
+        self.backup_list.store()
+        self.backup_data(None, False)
+        self.manifest_list.store()
+        self.migrate_data(None, False)
+
+        return 0
+
     def handleGlobal(self) -> None:
         """handle global config before starting the process"""
         levels = [logging.CRITICAL, logging.WARNING, logging.INFO, logging.DEBUG]
@@ -97,17 +316,50 @@ class DCOSMigrate(object):
             self.backup_list.load()
             return
 
-        logging.info("Calling {} Backup Batches".format(len(self.pm.backup_batch)))
-        for batch in self.pm.backup_batch:
+        batches = self._select(self.pm.backup_batch, 'backup_depends', pluginName, self.backup_list)
+
+        logging.info("Calling {} Backup Batches".format(len(batches)))
+        for batch in batches:
             # each batch could also be executed in parallel.
             # But for now just start sequential
             for plugin in batch:
+                if not self.resume:
+                    self.checkpoint.reset('backup', plugin.plugin_name)
+                if self.resume and self.checkpoint.plugin_done('backup', plugin.plugin_name):
+                    logging.info("backup of plugin {} already completed - loading from disk.".format(
+                        plugin.plugin_name))
+                    self.backup_list.load(pluginName=plugin.plugin_name)
+                    continue
+
                 logging.info("Calling backup for plugin {}".format(plugin.plugin_name))
-                blist = plugin.backup(client=self.client, backupList=self.backup_list)
-                if blist:
-                    self.backup_list.extend(blist)
+                self.backup_plugin(plugin)
 
-        self.backup_list.store()
+    def backup_plugin(self, plugin: MigratePlugin) -> None:
+        """backs up plugin storing and checkpointing every Backup as soon as it arrives"""
+        with self.instrumentation.measure('backup', plugin.plugin_name) as m:
+            completed: Dict[str, str] = {}
+            if self.resume:
+                completed = self.checkpoint.items('backup', plugin.plugin_name)
+                if completed:
+                    logging.info("resuming backup of plugin {} after {} completed items".format(
+                        plugin.plugin_name, len(completed)))
+                    self.backup_list.load(pluginName=plugin.plugin_name, names=completed)
+
+            start = time.perf_counter()
+            for b in plugin.backup_iter(client=self.client, backupList=self.backup_list, completed=completed):
+                if b.name in completed:
+                    start = time.perf_counter()
+                    continue
+                self.backup_list.append(b)
+                self.backup_list.store_item(b)
+                self.checkpoint.mark_item('backup', plugin.plugin_name, b.name)
+
+                m.objects += 1
+                end = time.perf_counter()
+                m.item(b.name, end - start)
+                start = end
+
+            self.checkpoint.mark_plugin('backup', plugin.plugin_name)
 
     def backup_data(self, pluginName: Optional[str] = None, skip: bool = False) -> None:
         if skip:
@@ -126,15 +378,65 @@ class DCOSMigrate(object):
             self.manifest_list.load()
             return
 
-        for batch in self.pm.migrate_batch:
+        batches = self._select(self.pm.migrate_batch, 'migrate_depends', pluginName, self.manifest_list)
+
+        for batch in batches:
             # each batch could also be executed in parallel.
             # But for not just start sequencial
             for plugin in batch:
+                if not self.resume:
+                    self.checkpoint.reset('migrate', plugin.plugin_name)
+                if self.resume and self.checkpoint.plugin_done('migrate', plugin.plugin_name):
+                    logging.info("migrate of plugin {} already completed - loading from disk.".format(
+                        plugin.plugin_name))
+                    self.manifest_list.load(pluginName=plugin.plugin_name)
+                    continue
+
+                self.migrate_plugin(plugin)
+
+    def migrate_plugin(self, plugin: MigratePlugin) -> None:
+        """
+        migrates plugin storing every Manifest as soon as it is created. Plugins with
+        migrate_streaming are checkpointed per Backup, all others as a whole. On resume
+        the Backups migrated before are passed to migrate_resume with their Manifests.
+        """
+        with self.instrumentation.measure('migrate', plugin.plugin_name) as m:
+            if not plugin.migrate_streaming:
                 mlist = plugin.migrate(backupList=self.backup_list, manifestList=self.manifest_list)
-                if mlist:
-                    self.manifest_list.extend(mlist)
+                for item in mlist or []:
+                    self.manifest_list.add(cast(Manifest, item))
+                    m.objects += 1
+                self.checkpoint.mark_plugin('migrate', plugin.plugin_name)
+                return
 
-        self.manifest_list.store()
+            completed: Dict[str, str] = {}
+            if self.resume:
+                completed = self.checkpoint.items('migrate', plugin.plugin_name)
+                if completed:
+                    logging.info("resuming migrate of plugin {} after {} completed items".format(
+                        plugin.plugin_name, len(completed)))
+                    self.manifest_list.load(pluginName=plugin.plugin_name, names=set(completed.values()))
+
+            plugin.migrate_start()
+            for b in self.backup_list.backups(pluginName=plugin.plugin_name):
+                if b.name in completed:
+                    manifest_name = completed[b.name]
+                    plugin.migrate_resume(
+                        cast(Backup, b),
+                        self.manifest_list.manifest(plugin.plugin_name, manifest_name) if manifest_name else None)
+                    continue
+                start = time.perf_counter()
+                manifest = plugin.migrate_backup(cast(Backup, b),
+                                                 backupList=self.backup_list,
+                                                 manifestList=self.manifest_list)
+                if manifest:
+                    self.manifest_list.add(manifest)
+                    m.objects += 1
+                self.checkpoint.mark_item('migrate', plugin.plugin_name, b.name, manifest.name if manifest else None)
+                m.item(b.name, time.perf_counter() - start)
+            plugin.migrate_finish()
+
+            self.checkpoint.mark_plugin('migrate', plugin.plugin_name)
 
     def migrate_data(self, pluginName: Optional[str] = None, skip: bool = False) -> None:
         if skip:
@@ -0,0 +1,156 @@
+import logging
+import queue
+import threading
+import time
+from typing import cast, Any, Callable, Dict, Iterable, List, Optional
+
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.plugin_manager import get_dependency_closure
+from dcos_migrate.system import DCOSClient, BackupList, Manifest, ManifestList
+from dcos_migrate.system.instrumentation import Instrumentation
+
+# marks the end of the backups passed from a backup to a migrate thread
+_DONE = object()
+
+
+class Pipeline(object):
+    """
+    Runs the backup and migrate phases of all plugins concurrently.
+
+    Each plugin backs up in its own thread as soon as its backup_depends are done.
+    For plugins with migrate_streaming, every Backup is passed through a bounded
+    queue to a migrate thread which migrates it as soon as the plugin's
+    migrate_depends are done. All other plugins are migrated as a whole once their
+    backup is complete.
+
+    The backup and migrate threads of every plugin are measured by instrumentation.
+    Their wall time includes waiting for dependencies and backups.
+    """
+    def __init__(self,
+                 plugins: Dict[str, MigratePlugin],
+                 client: DCOSClient,
+                 backup_list: BackupList,
+                 manifest_list: ManifestList,
+                 queue_size: int = 100,
+                 instrumentation: Optional[Instrumentation] = None):
+        super(Pipeline, self).__init__()
+        self.plugins = plugins
+        self.client = client
+        self.backup_list = backup_list
+        self.manifest_list = manifest_list
+        self.queue_size = queue_size
+        self.instrumentation = instrumentation or Instrumentation()
+
+        self._backup_done = {name: threading.Event() for name in plugins}
+        self._migrate_done = {name: threading.Event() for name in plugins}
+        self._queues: Dict[str, queue.Queue[Any]] = {
+            name: queue.Queue(maxsize=self._queue_size(name))
+            for name, p in plugins.items() if p.migrate_streaming
+        }
+        self._errors: List[BaseException] = []
+
+    def _queue_size(self, name: str) -> int:
+        # If the backup of anything this plugin's migration waits for depends on this
+        # plugin's backup, a full queue would block both sides. Do not bound it then.
+        for dep in get_dependency_closure(self.plugins, name, 'migrate_depends') | {name}:
+            if name in get_dependency_closure(self.plugins, dep, 'backup_depends'):
+                return 0
+        return self.queue_size
+
+    def _wait(self, events: Dict[str, threading.Event], names: Iterable[str]) -> bool:
+        """waits for the events of all names. Returns False if any thread failed meanwhile"""
+        for name in names:
+            if name in events:
+                events[name].wait()
+        return not self._errors
+
+    def _backup(self, plugin: MigratePlugin) -> None:
+        q = self._queues.get(plugin.plugin_name)
+        try:
+            if not self._wait(self._backup_done, plugin.backup_depends):
+                return
+
+            logging.info("Calling backup for plugin {}".format(plugin.plugin_name))
+            with self.instrumentation.measure('backup', plugin.plugin_name) as m:
+                for b in plugin.backup_iter(client=self.client, backupList=self.backup_list):
+                    self.backup_list.append(b)
+                    m.objects += 1
+                    if q is not None:
+                        q.put(b)
+        except BaseException as e:
+            # record the error before the backup is marked as done so nothing waiting for it goes on
+            self._fail('backup', plugin, e)
+        finally:
+            if q is not None:
+                q.put(_DONE)
+            self._backup_done[plugin.plugin_name].set()
+
+    def _add(self, manifest: Manifest) -> None:
+        # a streaming ManifestList stores right away, all others are stored once the pipeline is done
+        if self.manifest_list.streaming:
+            self.manifest_list.add(manifest)
+        else:
+            self.manifest_list.append(manifest)
+
+    def _migrate(self, plugin: MigratePlugin) -> None:
+        q = self._queues.get(plugin.plugin_name)
+        try:
+            if not self._wait(self._migrate_done, plugin.migrate_depends):
+                return
+
+            logging.info("Calling migrate for plugin {}".format(plugin.plugin_name))
+            with self.instrumentation.measure('migrate', plugin.plugin_name) as m:
+                if q is None:
+                    if not self._wait(self._backup_done, [plugin.plugin_name]):
+                        return
+                    mlist = plugin.migrate(backupList=self.backup_list, manifestList=self.manifest_list)
+                    for item in mlist or []:
+                        self._add(cast(Manifest, item))
+                        m.objects += 1
+                    return
+
+                plugin.migrate_start()
+                for b in iter(q.get, _DONE):
+                    if self._errors:
+                        continue
+                    start = time.perf_counter()
+                    manifest = plugin.migrate_backup(b, backupList=self.backup_list, manifestList=self.manifest_list)
+                    if manifest:
+                        self._add(manifest)
+                        m.objects += 1
+                    m.item(b.name, time.perf_counter() - start)
+                plugin.migrate_finish()
+        except BaseException as e:
+            self._fail('migrate', plugin, e)
+        finally:
+            if q is not None:
+                # if we stopped early, drain the queue so a blocked backup thread can finish
+                while not self._backup_done[plugin.plugin_name].is_set():
+                    try:
+                        q.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            self._migrate_done[plugin.plugin_name].set()
+
+    def _fail(self, phase: str, plugin: MigratePlugin, e: BaseException) -> None:
+        logging.critical("{} of plugin {} failed: {}".format(phase, plugin.plugin_name, e))
+        self._errors.append(e)
+
+    def _thread(self, target: Callable[[MigratePlugin], None], plugin: MigratePlugin) -> threading.Thread:
+        return threading.Thread(target=target,
+                                args=(plugin, ),
+                                name="{}-{}".format(plugin.plugin_name, target.__name__.strip('_')))
+
+    def run(self) -> None:
+        threads = []
+        for plugin in self.plugins.values():
+            threads.append(self._thread(self._backup, plugin))
+            threads.append(self._thread(self._migrate, plugin))
+
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if self._errors:
+            raise self._errors[0]
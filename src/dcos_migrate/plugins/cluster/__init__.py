@@ -1,4 +1,13 @@
-from .plugin import ClusterPlugin
-from .migrator import ClusterMigrator
+from typing import TYPE_CHECKING
 
-__all__ = ['ClusterPlugin', 'ClusterMigrator']
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
+
+spec = PluginSpec("cluster", "dcos_migrate.plugins.cluster.plugin:ClusterPlugin")
+
+if TYPE_CHECKING:
+    from .plugin import ClusterPlugin
+    from .migrator import ClusterMigrator
+
+__getattr__ = lazy_exports(__name__, {"ClusterPlugin": ".plugin", "ClusterMigrator": ".migrator"})
+
+__all__ = ['ClusterPlugin', 'ClusterMigrator', 'spec']
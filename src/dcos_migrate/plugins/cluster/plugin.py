@@ -1,4 +1,5 @@
 from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.cluster import spec
 from dcos_migrate.system import BackupList, DCOSClient, Backup, Manifest, ManifestList
 import dcos_migrate.utils as utils
 from kubernetes.client.models import V1ConfigMap, V1ObjectMeta  # type: ignore
@@ -11,7 +12,7 @@ from typing import Any
 
 class ClusterPlugin(MigratePlugin):
     """docstring for ClusterPlugin."""
-    plugin_name = "cluster"
+    spec = spec
 
     # No depends wanna run first
 
@@ -21,10 +22,10 @@ class ClusterPlugin(MigratePlugin):
     def backup(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> BackupList:
         bl = BackupList()
         metadataResp = client.get(client.full_dcos_url('/metadata'))
-        stateSumResp = client.get(client.full_dcos_url('/mesos/master/state-summary'))
-
         metadata = metadataResp.json()
-        state = stateSumResp.json()
+        # the state summary is kept as a whole in the backup. Parsing it from the
+        # stream avoids holding the raw body and its decoded text next to it.
+        state = utils.load_json(client.get_stream(client.full_dcos_url('/mesos/master/state-summary')))
 
         data = {
             "CLUSTER_ID": metadata['CLUSTER_ID'],
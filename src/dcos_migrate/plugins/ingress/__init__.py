@@ -1,5 +1,12 @@
-#
+from typing import TYPE_CHECKING
 
-from .plugin import EdgeLBPlugin
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
 
-__all__ = ["EdgeLBPlugin"]
+spec = PluginSpec("edgelb", "dcos_migrate.plugins.ingress.plugin:EdgeLBPlugin")
+
+if TYPE_CHECKING:
+    from .plugin import EdgeLBPlugin
+
+__getattr__ = lazy_exports(__name__, {"EdgeLBPlugin": ".plugin"})
+
+__all__ = ["EdgeLBPlugin", "spec"]
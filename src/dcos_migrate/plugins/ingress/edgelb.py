@@ -1,7 +1,9 @@
 #
 
 import warnings
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from dcos_migrate.utils import IDFilter
 
 BALANCE_WARNING = ("Backend {} uses a haproxy balance method {}, " "forcing to `roundrobin`.")
 
@@ -143,3 +145,23 @@ def parse_pool(pool: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         "frontends": frontends,
         "backends": backends,
     }
+
+
+def pool_matches(pool: Dict[str, Any], id_filter: IDFilter) -> bool:
+    """
+    a pool matches if its name or any Marathon app its backends route to
+    matches id_filter
+    """
+    service_ids: List[str] = [
+        s["marathon"]["serviceID"] for b in pool.get("haproxy", {}).get("backends", []) for s in b.get("services", [])
+        if s.get("marathon", {}).get("serviceID")
+    ]
+    return id_filter.match(pool["name"]) or any(id_filter.match(i) for i in service_ids)
+
+
+def parsed_pool_matches(pool: Dict[str, Any], id_filter: IDFilter) -> bool:
+    """like pool_matches for a pool returned by parse_pool"""
+    # parse_backend turns "/a/b" into "a.b"
+    return id_filter.match(pool["name"]) or any(
+        id_filter.match(b["service"]["name"], ".")
+        for b in pool["backends"].values() if b["service"]["name"] != "UNKNOWN")
@@ -1,5 +1,5 @@
 import logging
-from typing import Any
+from typing import Any, cast
 
 from dcos_migrate.plugins import plugin
 from dcos_migrate import system
@@ -8,10 +8,11 @@ from dcos.errors import DCOSHTTPException  # type: ignore
 
 from . import edgelb
 from . import migrator
+from . import spec
 
 
 class EdgeLBPlugin(plugin.MigratePlugin):
-    plugin_name = "edgelb"
+    spec = spec
 
     def backup(self, client: system.DCOSClient, backupList: system.BackupList, **kwargs: Any) -> system.BackupList:
         service_path = "/service/edgelb"
@@ -36,6 +37,10 @@ class EdgeLBPlugin(plugin.MigratePlugin):
         if "pool_name" in kwargs:
             pools = [p for p in pools if p["name"] == kwargs["pool_name"]]
 
+        id_filter = self.config_filter
+        if id_filter:
+            pools = [p for p in pools if edgelb.pool_matches(p, id_filter)]
+
         for pool in pools:
             parsed_pool = edgelb.parse_pool(pool)
 
@@ -54,6 +59,8 @@ class EdgeLBPlugin(plugin.MigratePlugin):
         ml = system.ManifestList()
 
         for b in backupList.backups(pluginName=self.plugin_name):
+            if not edgelb.parsed_pool_matches(cast(system.Backup, b).data, self.config_filter):
+                continue
             mig = migrator.Ingress(
                 backup=b,
                 backup_list=backupList,
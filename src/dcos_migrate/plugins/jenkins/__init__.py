@@ -1,2 +1,11 @@
-from .plugin import JenkinsPlugin
-from .migrator import JenkinsMigrator
+from typing import TYPE_CHECKING
+
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
+
+spec = PluginSpec("jenkins", "dcos_migrate.plugins.jenkins.plugin:JenkinsPlugin", backup_depends=["marathon"])
+
+if TYPE_CHECKING:
+    from .plugin import JenkinsPlugin
+    from .migrator import JenkinsMigrator
+
+__getattr__ = lazy_exports(__name__, {"JenkinsPlugin": ".plugin", "JenkinsMigrator": ".migrator"})
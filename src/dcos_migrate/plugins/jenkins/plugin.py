@@ -1,5 +1,5 @@
 from dcos_migrate.plugins.plugin import MigratePlugin
-from dcos_migrate.plugins.marathon import MarathonPlugin
+from dcos_migrate.plugins.jenkins import spec
 from dcos_migrate.system import DCOSClient, BackupList, Backup
 from base64 import b64decode
 import json
@@ -10,9 +10,7 @@ from typing import Any
 
 class JenkinsPlugin(MigratePlugin):
     """docstring for JenkinsPlugin."""
-    plugin_name = "jenkins"
-
-    backup_depends = [MarathonPlugin.plugin_name]
+    spec = spec
 
     def __init__(self) -> None:
         super(JenkinsPlugin, self).__init__()
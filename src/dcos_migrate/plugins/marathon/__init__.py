@@ -1,4 +1,65 @@
-from .plugin import MarathonPlugin
-from .migrator import MarathonMigrator, NodeLabelTracker
+from typing import TYPE_CHECKING
 
-__all__ = ['MarathonPlugin', 'MarathonMigrator']
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
+from dcos_migrate.system import Arg, DictArg
+from dcos_migrate.utils import FetchCache
+
+spec = PluginSpec(
+    "marathon",
+    "dcos_migrate.plugins.marathon.plugin:MarathonPlugin",
+    migrate_depends=["cluster", "secret"],
+    migrate_streaming=True,
+    # TODO: returned config is not yet used
+    config_options=[
+        DictArg(
+            "secretoverwrite",
+            plugin_name="marathon",
+            metavar='DCOS_SECRET=K8s_SECRET',
+            help='Map DC/OS secrets to a different K8s secret. K8s data key must equal DC/OS secret name'  # noqa
+        ),
+        Arg("image",
+            plugin_name="marathon",
+            default="alpine:latest",
+            metavar="IMAGE",
+            help='Image to be used when assets need to be fetched.'),
+        Arg("workdir",
+            plugin_name="marathon",
+            default="/",
+            metavar="WORKDIR",
+            help='Workdir which fetched artifacts are downloaded to.'),
+        Arg("documents",
+            plugin_name="marathon",
+            action="store_true",
+            default=False,
+            help='Hold migrated resources as plain documents instead of Kubernetes client models. Takes a '
+            'fraction of the memory.'),
+        Arg("fetch-cache",
+            plugin_name="marathon",
+            type=FetchCache.parse,
+            metavar="hostPath:PATH|pvc:CLAIM_NAME",
+            help='Share artifacts fetched with cache=true between pods in this hostPath or ReadWriteMany '
+            'PersistentVolumeClaim, downloading them again only if they changed.'),
+        Arg("prebake",
+            plugin_name="marathon",
+            metavar="DIR",
+            help='Download fetched artifacts once into DIR and write a docker build context per app baking them '
+            'into its image. Migrated apps use these images and fetch nothing when pods start.'),
+        Arg("prebake-registry",
+            plugin_name="marathon",
+            metavar="REGISTRY",
+            help='Registry the images with prebaked artifacts are pushed to.')
+    ])
+
+if TYPE_CHECKING:
+    from .plugin import MarathonPlugin
+    from .migrator import MarathonMigrator, NodeLabelTracker, RolloutTracker
+
+__getattr__ = lazy_exports(
+    __name__, {
+        "MarathonPlugin": ".plugin",
+        "MarathonMigrator": ".migrator",
+        "NodeLabelTracker": ".migrator",
+        "RolloutTracker": ".migrator"
+    })
+
+__all__ = ['MarathonPlugin', 'MarathonMigrator', 'spec']
@@ -1,22 +1,29 @@
 import json
 import logging
+import math
 import os.path
 
 from .app_secrets import AppSecretMapping
 from .common import (InvalidAppDefinition, AdditionalFlagNeeded, pod_spec_update, main_container, try_oneline_dump)
-from .mapping_utils import (ListExtension, finalize_unmerged_list_extensions, MappingKey, Translated, apply_mapping)
+from .mapping_utils import (ListExtension, finalize_unmerged_list_extensions, MappingKey, Translated, apply_mapping,
+                            deep_merge)
 
 from .constraints import translate_constraints
 from .network_helpers import get_ports_from_app, effective_port, AppPort
 from typing import (cast, Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Set, Sequence, Tuple,
                     Union)
 import dcos_migrate.utils as utils
+from dcos_migrate.utils.fetch_cache import FETCH_CACHE_IMAGE, cached_fetch_script, is_cacheable
 from . import volumes
 
 
 class ContainerDefaults(NamedTuple):
     image: Optional[str]
     working_dir: Optional[str]
+    # where artifacts fetched with cache=true are shared, re-downloaded by every pod if None
+    fetch_cache: Optional[utils.FetchCache] = None
+    # bakes fetched artifacts into the image instead of fetching them on pod start if set
+    prebaker: Optional[utils.Prebaker] = None
 
 
 class Settings(NamedTuple):
@@ -231,12 +238,34 @@ def readiness_check_to_probe(check: Dict[str, Any], error_location: str) -> Tupl
     return probe, warnings
 
 
+# Marathon's default gracePeriodSeconds, and the period of startup probes covering it
+DEFAULT_GRACE_PERIOD_SECONDS = 300
+STARTUP_PROBE_PERIOD_SECONDS = 10
+
+
+def startup_probe_for(liveness_probe: Dict[str, Any], grace_period: int) -> Optional[Dict[str, Any]]:
+    """
+    Returns a startup probe running the check of liveness_probe for up to
+    grace_period seconds, the liveness probe starting as soon as it succeeds.
+    This replaces delaying the liveness probe by the whole grace period.
+    """
+    if grace_period <= 0:
+        return None
+
+    period = min(STARTUP_PROBE_PERIOD_SECONDS, grace_period)
+    startup_probe = {k: v for k, v in liveness_probe.items() if k not in ('initialDelaySeconds', 'failureThreshold')}
+    startup_probe['periodSeconds'] = period
+    startup_probe['failureThreshold'] = -(-grace_period // period)
+    return startup_probe
+
+
 def health_check_to_probe(check: Dict[str, Any], get_port_by_index: Callable[[int, bool], int],
                           error_location: str) -> Tuple[Dict[str, Any], List[str]]:
     flattened_check = flatten(check)
 
     mapping: Dict[MappingKey, Any] = {
-        'gracePeriodSeconds': rename('initialDelaySeconds'),
+        # becomes a startup probe, see startup_probe_for
+        'gracePeriodSeconds': skip_quietly,
         'intervalSeconds': rename('periodSeconds'),
         'maxConsecutiveFailures': rename('failureThreshold'),
         'timeoutSeconds': rename('timeoutSeconds'),
@@ -255,7 +284,6 @@ def health_check_to_probe(check: Dict[str, Any], get_port_by_index: Callable[[in
             get_network_probe_builder(get_port_by_index)
 
     probe, warnings = apply_mapping(mapping, flattened_check, error_location)
-    probe.setdefault('initialDelaySeconds', 300)
     probe.setdefault('periodSeconds', 60)
     probe.setdefault('timeoutSeconds', 20)
 
@@ -319,7 +347,13 @@ def translate_health_checks(fields: Dict[str, Any], error_location: str) -> Tran
         warnings.append('Only the first app health check is converted into a liveness probe.\n'
                         'Dropped health checks:\n{}'.format(try_oneline_dump(excess_health_checks)))
 
-    return Translated(update=main_container({'livenessProbe': liveness_probe}), warnings=warnings)
+    probes = {'livenessProbe': liveness_probe}
+    startup_probe = startup_probe_for(liveness_probe, health_checks[0].get('gracePeriodSeconds',
+                                                                           DEFAULT_GRACE_PERIOD_SECONDS))
+    if startup_probe is not None:
+        probes['startupProbe'] = startup_probe
+
+    return Translated(update=main_container(probes), warnings=warnings)
 
 
 def skip_quietly(_: Any) -> Translated:
@@ -383,29 +417,156 @@ def translate_unreachable_strategy(strategy: Union[Dict[str, Any], str]) -> Tran
     )
 
 
-def translate_upgrade_strategy(strategy: Dict[str, Any]) -> Translated:
-    fields = strategy.copy()
+# what Marathon and Kubernetes assume if not set
+DEFAULT_UPGRADE_STRATEGY = {"minimumHealthCapacity": 1.0, "maximumOverCapacity": 1.0}
+DEFAULT_ROLLING_UPDATE = {"maxUnavailable": "25%", "maxSurge": "25%"}
+DEFAULT_PROGRESS_DEADLINE_SECONDS = 600
+DEFAULT_READINESS_INTERVAL_SECONDS = 30
+DEFAULT_READINESS_TIMEOUT_SECONDS = 10
+
+
+def marathon_upgrade_counts(instances: int, minimum_health_capacity: float,
+                            maximum_over_capacity: float) -> Tuple[int, int]:
+    """
+    Returns how many old tasks Marathon may kill and how many new tasks it may
+    start on top of instances at a time during an upgrade.
+
+    >>> marathon_upgrade_counts(8, 0.625, 0.455)
+    (3, 3)
+    >>> marathon_upgrade_counts(5, 0.6, 0.0)
+    (2, 0)
+    """
+    # rounded first, 5 * 0.6 being 3.0000000000000004
+    min_healthy = math.ceil(round(instances * minimum_health_capacity, 6))
+    max_capacity = math.floor(round(instances * (1.0 + maximum_over_capacity), 6))
+    return max(0, instances - min_healthy), max(0, max_capacity - instances)
+
+
+def rolling_update_count(value: Union[int, str], replicas: int, round_up: bool) -> int:
+    """resolves maxSurge (rounded up) or maxUnavailable (rounded down) like Kubernetes does"""
+    if isinstance(value, str) and value.endswith('%'):
+        scaled = replicas * int(value[:-1]) / 100.0
+        return math.ceil(scaled) if round_up else math.floor(scaled)
+    return int(value)
+
+
+def rolling_update_value(count: int, fraction: float, instances: int, round_up: bool) -> Union[int, str]:
+    """
+    Returns fraction of the replicas as a percentage if Kubernetes resolves it
+    to count for instances, and count otherwise.
+
+    >>> rolling_update_value(2, 0.4, 5, False)
+    '40%'
+    >>> rolling_update_value(1, 0.5, 3, True)
+    1
+    """
+    percent = round(fraction * 100, 6)
+    if percent < 0 or percent != int(percent) or rolling_update_count("{}%".format(int(percent)), instances,
+                                                                      round_up) != count:
+        return count
+    return "{}%".format(int(percent))
+
+
+def rollout_parallelism(deployment: Dict[str, Any]) -> int:
+    """the number of pods of deployment Kubernetes replaces at a time during a rollout"""
+    spec = deployment.get('spec', {})
+    replicas = spec.get('replicas', 1)
+    rolling_update = dict(DEFAULT_ROLLING_UPDATE)
+    rolling_update.update(spec.get('strategy', {}).get('rollingUpdate', {}))
+    return rolling_update_count(rolling_update['maxUnavailable'], replicas, False) + \
+        rolling_update_count(rolling_update['maxSurge'], replicas, True)
+
+
+def marathon_rollout_parallelism(app: Dict[str, Any]) -> int:
+    """the number of tasks of app Marathon replaces at a time during an upgrade"""
+    strategy = dict(DEFAULT_UPGRADE_STRATEGY)
+    strategy.update(app.get('upgradeStrategy', {}))
+    return sum(
+        marathon_upgrade_counts(app.get('instances', 1), strategy['minimumHealthCapacity'],
+                                strategy['maximumOverCapacity']))
+
+
+def progress_deadline_seconds(health_checks: Sequence[Dict[str, Any]],
+                              readiness_checks: Sequence[Dict[str, Any]]) -> Optional[int]:
+    """
+    Returns a progressDeadlineSeconds giving a new pod twice the time Marathon
+    would give the task to become healthy and ready, or None if the default of
+    600 seconds is enough.
+    """
+    seconds = 0
+    if health_checks:
+        seconds += health_checks[0].get('gracePeriodSeconds', DEFAULT_GRACE_PERIOD_SECONDS)
+    if readiness_checks:
+        seconds += readiness_checks[0].get('intervalSeconds', DEFAULT_READINESS_INTERVAL_SECONDS) + \
+            readiness_checks[0].get('timeoutSeconds', DEFAULT_READINESS_TIMEOUT_SECONDS)
+
+    deadline = 2 * seconds
+    return deadline if deadline > DEFAULT_PROGRESS_DEADLINE_SECONDS else None
+
+
+def translate_upgrade_strategy(fields: Dict[str, Any]) -> Translated:
+    """
+    Translates upgradeStrategy into the maxUnavailable and maxSurge that let
+    Kubernetes replace as many pods at a time as Marathon did. They are
+    percentages, following the Deployment when it is scaled like the
+    capacities did on Marathon, unless Kubernetes, rounding maxSurge up where
+    Marathon rounds down, would resolve them to other counts for the app's
+    instances. Only then are they the absolute counts.
+
+    An app without upgradeStrategy gets Marathon's default, maxUnavailable 0%
+    and maxSurge 100%, which starts all new pods at once, rather than
+    Kubernetes' 25% and 25%.
+
+    minReadySeconds is left at 0: Marathon counts a task as soon as it is
+    healthy and ready, and anything more would slow down the rollout.
+    """
+    update: Dict[str, Any] = {}
+    deadline = progress_deadline_seconds(fields.get('healthChecks', []), fields.get('readinessChecks', []))
+    if deadline is not None:
+        update = {"spec": {"progressDeadlineSeconds": deadline}}
+
+    # Marathon's default starts all new tasks at once, Kubernetes' a quarter of the pods
+    strategy = fields.get('upgradeStrategy', DEFAULT_UPGRADE_STRATEGY).copy()
     try:
-        maximum_over_capacity = fields.pop("maximumOverCapacity")
-        minimum_health_capacity = fields.pop("minimumHealthCapacity")
+        maximum_over_capacity = strategy.pop("maximumOverCapacity")
+        minimum_health_capacity = strategy.pop("minimumHealthCapacity")
     except KeyError as key:
         raise InvalidAppDefinition('"upgradeStatregy" missing {}'.format(key))
 
-    if fields:
-        return Translated(warnings=["Unknown fields: {}".format(try_oneline_dump(fields))])
-
-    return Translated(update={
-        "spec": {
-            "strategy": {
-                "type": "RollingUpdate",
-                "rollingUpdate": {
-                    "maxUnavailable": "{}%".format(int(100.0 * (1.0 - minimum_health_capacity))),
-                    "maxSurge": "{}%".format(int(100.0 * maximum_over_capacity))
+    if strategy:
+        return Translated(warnings=["Unknown fields: {}".format(try_oneline_dump(strategy))])
+
+    instances = fields.get('instances', 1)
+    max_unavailable, max_surge = marathon_upgrade_counts(instances, minimum_health_capacity, maximum_over_capacity)
+
+    warnings = []
+    unavailable = rolling_update_value(max_unavailable, 1.0 - minimum_health_capacity, instances, False)
+    surge = rolling_update_value(max_surge, maximum_over_capacity, instances, True)
+    if max_unavailable == 0 and max_surge == 0:
+        # Kubernetes rejects a rolling update that can neither stop nor start a pod
+        surge = 1
+        if instances > 0:
+            warnings.append(
+                "minimumHealthCapacity {} and maximumOverCapacity {} allow neither stopping nor starting a"
+                " task of {} instances at a time; using maxSurge 1, which replaces one pod at a time".format(
+                    minimum_health_capacity, maximum_over_capacity, instances))
+    elif instances > 1 and max_unavailable + max_surge == 1:
+        warnings.append("The rollout replaces one of {} pods at a time. Lower minimumHealthCapacity or raise"
+                        " maximumOverCapacity to speed it up".format(instances))
+
+    update = deep_merge(
+        update, {
+            "spec": {
+                "strategy": {
+                    "type": "RollingUpdate",
+                    "rollingUpdate": {
+                        "maxUnavailable": unavailable,
+                        "maxSurge": surge
+                    }
                 }
             }
-        }
-    },
-                      warnings=[])
+        })
+    return Translated(update=update, warnings=warnings)
 
 
 def get_constraint_translator(
@@ -429,6 +590,8 @@ def generate_root_mapping(k8s_app_id: str, container_defaults: ContainerDefaults
                               Set[str],
                           ], None], is_resident: bool) -> Dict[MappingKey, Any]:
 
+    container_translator = get_container_translator(k8s_app_id, container_defaults, app_secrets_mapping,
+                                                    error_location)
     container_mappings: Dict[MappingKey, Any] = {
         ('args', 'cmd'): translate_container_command,
         ('backoffFactor', 'backoffSeconds'): skip_if_equals({
@@ -436,7 +599,7 @@ def generate_root_mapping(k8s_app_id: str, container_defaults: ContainerDefaults
             'backoffSeconds': 1.0
         }),
         ('constraints', 'id'): get_constraint_translator(register_node_labels),
-        ('container', ): get_container_translator(k8s_app_id, container_defaults, app_secrets_mapping, error_location),
+        ('container', 'fetch'): container_translator,
         ('cpus', 'mem', 'disk', 'gpus', 'resourceLimits'): translate_resources,
         'dependencies': skip_if_equals([]),
         'deployments': skip_quietly,
@@ -465,7 +628,8 @@ def generate_root_mapping(k8s_app_id: str, container_defaults: ContainerDefaults
         'tasksStaged': skip_quietly,
         'tasksUnhealthy': skip_quietly,
         'unreachableStrategy': translate_unreachable_strategy,
-        'upgradeStrategy': skip_quietly if is_resident else translate_upgrade_strategy,
+        ('upgradeStrategy', 'instances', 'healthChecks', 'readinessChecks'):
+        skip_quietly if is_resident else translate_upgrade_strategy,
         'user': skip_if_equals("nobody"),
         'version': skip_quietly,
         'versionInfo': skip_quietly,
@@ -480,7 +644,7 @@ EXTRACT_COMMAND = dict([('.zip', 'gunzip')] + [(ext, 'tar -xf')
                                                for ext in ['.tgz', '.tar.gz', '.tbz2', '.tar.bz2', '.txz', '.tar.xz']])
 
 
-def generate_fetch_command(uri: str, allow_extract: bool, executable: bool) -> str:
+def generate_fetch_command(uri: str, allow_extract: bool, executable: bool, cached: bool = False) -> str:
     # NOTE: The path separator is always '/', even on Windows.
     _, _, filename = uri.rpartition('/')
     _, ext = os.path.splitext(filename)
@@ -488,55 +652,76 @@ def generate_fetch_command(uri: str, allow_extract: bool, executable: bool) -> s
     postprocess = 'chmod a+x' if executable else \
         (EXTRACT_COMMAND.get(ext, '') if allow_extract else '')
 
-    fmt = '( wget -O "{fn}" "{uri}" && {postprocess} "{fn}" )' if postprocess else\
-          '( wget -O "{fn}" "{uri}")'
+    download = 'cached_fetch "{uri}" "{fn}"' if cached else 'wget -O "{fn}" "{uri}"'
+    fmt = '( ' + download + ' && {postprocess} "{fn}" )' if postprocess else\
+          '( ' + download + ')'
 
     return fmt.format(fn=filename, uri=uri, postprocess=postprocess)
 
 
-def translate_fetch(fetches: Sequence[Dict[str, Any]], defaults: ContainerDefaults, error_location: str) -> Translated:
+def require_working_dir(defaults: ContainerDefaults, error_location: str) -> str:
     if not defaults.working_dir:
         raise AdditionalFlagNeeded('{} is using "fetch"; please specify non-empty'
                                    ' `--container-working-dir` and run again'.format(error_location))
+    return defaults.working_dir
 
-    warnings = ['This app uses "fetch"; consider using a container image instead.']
-
-    def iter_command() -> Iterator[str]:
-        yield 'set -x'
-        yield 'set -e'
-        yield 'FETCH_PID_ARRAY=()'
-
-        for fetch in fetches:
-            fetch = fetch.copy()
-            uri = fetch.pop('uri')
-            cache = fetch.pop('cache', False)
-            extract = fetch.pop('extract', True)
-            executable = fetch.pop('executable', False)
-            if fetch:
-                warnings.append('Unknown fields in "fetch": {}'.format(json.dumps(fetch)))
-
-            if cache:
-                warnings.append('`cache=true` requested for fetching "{}" has been ignored'.format(uri))
-
-            if uri.startswith('file://'):
-                warnings.append('Fetching a local file {} is not portable'.format(uri))
 
-            yield generate_fetch_command(uri, extract, executable) + ' & FETCH_PID_ARRAY+=("$!")'
-
-        yield 'for pid in ${FETCH_PID_ARRAY[@]}; do wait $pid || exit $?; done'
+def translate_fetch(fetches: Sequence[Dict[str, Any]], defaults: ContainerDefaults, error_location: str) -> Translated:
+    require_working_dir(defaults, error_location)
+
+    prebaked = defaults.prebaker is not None
+    warnings = [] if prebaked else ['This app uses "fetch"; consider using a container image instead.']
+
+    commands = []
+    any_cached = False
+    for fetch in fetches:
+        fetch = fetch.copy()
+        uri = fetch.pop('uri')
+        cache = fetch.pop('cache', False)
+        extract = fetch.pop('extract', True)
+        executable = fetch.pop('executable', False)
+        if fetch:
+            warnings.append('Unknown fields in "fetch": {}'.format(json.dumps(fetch)))
+
+        cached = bool(cache) and defaults.fetch_cache is not None and is_cacheable(uri)
+        if cache and not cached and not prebaked:
+            warnings.append('`cache=true` requested for fetching "{}" has been ignored{}'.format(
+                uri, '' if defaults.fetch_cache is not None else '; use --marathon-fetch-cache to share a cache'))
+
+        if uri.startswith('file://'):
+            warnings.append('Fetching a local file {} is not portable'.format(uri))
+
+        any_cached = any_cached or cached
+        commands.append(generate_fetch_command(uri, extract, executable, cached))
+
+    if prebaked:
+        # the container translator bakes the artifacts into the image
+        return Translated(warnings=warnings)
+
+    init_container: Dict[str, Any] = {
+        "name": "fetch",
+        "image": "bash:5.0",
+        "command": ['bash', '-c', '\n'.join(iter_fetch_script(commands))],
+        "volumeMounts": [{
+            "name": "fetch-artifacts",
+            "mountPath": "/fetch_artifacts"
+        }],
+        "workingDir": "/fetch_artifacts",
+    }
+    pod_volumes = [{"name": "fetch-artifacts", "emptyDir": {}}]
+    if any_cached:
+        assert defaults.fetch_cache is not None
+        init_container.update({
+            "image": FETCH_CACHE_IMAGE,
+            "command": ['sh', '-c', cached_fetch_script(commands)],
+            "securityContext": defaults.fetch_cache.security_context(),
+        })
+        init_container['volumeMounts'].append(defaults.fetch_cache.volume_mount())
+        pod_volumes.append(defaults.fetch_cache.volume())
 
     return Translated(
         update=pod_spec_update({
-            "initContainers": [{
-                "name": "fetch",
-                "image": "bash:5.0",
-                "command": ['bash', '-c', '\n'.join(iter_command())],
-                "volumeMounts": [{
-                    "name": "fetch-artifacts",
-                    "mountPath": "/fetch_artifacts"
-                }],
-                "workingDir": "/fetch_artifacts",
-            }],
+            "initContainers": [init_container],
             "containers": [{
                 "volumeMounts":
                 ListExtension([{
@@ -545,43 +730,61 @@ def translate_fetch(fetches: Sequence[Dict[str, Any]], defaults: ContainerDefaul
                 }]),
             }],
             "volumes":
-            ListExtension([{
-                "name": "fetch-artifacts",
-                "emptyDir": {}
-            }])
+            ListExtension(pod_volumes)
         }),
         warnings=warnings,
     )
 
 
+def iter_fetch_script(commands: Sequence[str]) -> Iterator[str]:
+    """the bash script running uncached fetch commands in parallel"""
+    yield 'set -x'
+    yield 'set -e'
+    yield 'FETCH_PID_ARRAY=()'
+    for command in commands:
+        yield command + ' & FETCH_PID_ARRAY+=("$!")'
+    yield 'for pid in ${FETCH_PID_ARRAY[@]}; do wait $pid || exit $?; done'
+
+
 def get_container_translator(
     k8s_app_id: str,
     defaults: ContainerDefaults,
     app_secret_mapping: AppSecretMapping,
     error_location: str,
 ) -> Callable[[Mapping[str, Any]], Translated]:
-    def translate_image(image_fields: Mapping[MappingKey, Any]) -> Translated:
+    def translate_image(image_fields: Mapping[MappingKey, Any], fetches: Sequence[Dict[str, Any]]) -> Translated:
         if 'docker.image' in image_fields:
-            return Translated(main_container({'image': image_fields['docker.image']}))
-
-        if not defaults.image:
-            raise AdditionalFlagNeeded('{} has no image; please specify non-empty'
-                                       ' `--default-image` and run again'.format(error_location))
-        container_update = {'image': defaults.image}
-
-        # TODO (asekretenko): This sets 'workingDir' only if 'docker.image' is
-        # not specified. Figure out how we want to treat a combination of
-        # a 'fetch' with a non-default 'docker.image'.
-        if defaults.working_dir:
-            container_update['workingDir'] = defaults.working_dir
-        return Translated(main_container(container_update))
+            container_update = {'image': image_fields['docker.image']}
+        else:
+            if not defaults.image:
+                raise AdditionalFlagNeeded('{} has no image; please specify non-empty'
+                                           ' `--default-image` and run again'.format(error_location))
+            container_update = {'image': defaults.image}
+
+            # TODO (asekretenko): This sets 'workingDir' only if 'docker.image' is
+            # not specified. Figure out how we want to treat a combination of
+            # a 'fetch' with a non-default 'docker.image'.
+            if defaults.working_dir:
+                container_update['workingDir'] = defaults.working_dir
+
+        if not fetches or defaults.prebaker is None:
+            return Translated(main_container(container_update))
+
+        image = defaults.prebaker.bake('marathon/' + k8s_app_id, container_update['image'],
+                                       require_working_dir(defaults, error_location), fetches)
+        container_update['image'] = image
+        return Translated(main_container(container_update),
+                          warnings=[
+                              'Artifacts fetched by this app are baked into {}; build and push it before '
+                              'deploying'.format(image)
+                          ])
 
     def translate_container(fields: Mapping[str, Any]) -> Translated:
         update, warnings = apply_mapping(mapping={
             "docker.forcePullImage":
             lambda _: Translated(main_container({'imagePullPolicy': "Always" if _ else "IfNotPresent"})),
             ("docker.image", ):
-            translate_image,
+            lambda image_fields: translate_image(image_fields, fields.get('fetch', [])),
             "docker.parameters":
             skip_if_equals([]),
             "docker.privileged":
@@ -0,0 +1,625 @@
+"""
+Copies the data in the persistent volumes of a stateful Marathon app to the pods
+of its migrated StatefulSet.
+
+download fetches every volume of every task of the app with `dcos task download`
+into target/download/<instance>/<mount name>, instances numbered in the order of
+their sorted task IDs. upload copies them with `kubectl cp` to the pod with the
+same ordinal: target/download/0 to <statefulset>-0 and so on.
+
+stream does both at once without staging anything locally: a tar of every
+volume created in the task with `dcos task exec` is piped into tar extracting it
+in the pod with `kubectl exec`, optionally gzip compressed.
+
+sync streams like stream but only files and symlinks missing in the pod or
+differing in type, size, modification time or, with --checksum, SHA-256 of
+files. Directories missing in the pod are created, so empty ones are kept.
+What has been synced is recorded in target/sync/<instance>-<mount name>.json
+after every batch of files, so an interrupted sync resumes where it stopped and
+a later one only copies changes. sync never deletes anything in the pod, and
+special files like sockets and FIFOs are left out; use stream for a full copy.
+
+Instances and the volumes of every instance are copied in parallel, failed
+transfers are retried and the throughput of every volume is reported. Only the
+standard library is used as this file is copied next to the scripts generated
+for stateful apps and run from there:
+
+    python3 data_copy.py download --app-id /postgres --mount data=/var/lib/postgresql
+    python3 data_copy.py upload --k8s-app-id postgres --mount data=/var/lib/postgresql
+    python3 data_copy.py sync --app-id /postgres --k8s-app-id postgres --mount data=/var/lib/postgresql --checksum
+    python3 data_copy.py stream --app-id /postgres --k8s-app-id postgres --mount data=/var/lib/postgresql --compress gzip
+
+The dcos and kubectl commands can be replaced by stand-ins with --dcos and --kubectl.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import stat as stat_module
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+TARGET_DIR = os.path.join("target", "download")
+SYNC_DIR = os.path.join("target", "sync")
+CHUNK_SIZE = 1024 * 1024
+# limits of the files passed to a single tar or sha256sum
+BATCH_FILES = 500
+BATCH_ARGS_SIZE = 64 * 1024
+# compression stream supports, by its tar flag
+COMPRESSION = {"none": "", "gzip": "z"}
+
+
+class Mount(NamedTuple):
+    name: str  # the name of the persistent volume in the Mesos sandbox
+    path: str  # the path it is mounted at in the container
+
+    @classmethod
+    def parse(cls, s: str) -> 'Mount':
+        """parses NAME=PATH"""
+        name, sep, path = s.partition("=")
+        if not sep or not name or not path:
+            raise argparse.ArgumentTypeError("expected NAME=PATH, got {}".format(s))
+        return cls(name, path)
+
+
+class Transfer(object):
+    """Transfer is the copy of a single volume of a single instance"""
+    def __init__(self, instance: int, source: str, target: str, mount: Mount):
+        super(Transfer, self).__init__()
+        self.instance = instance
+        self.source = source
+        self.target = target
+        self.mount = mount
+        self.attempts = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+        # files copied by sync
+        self.files = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.attempts > 0 and self.error is None
+
+    @property
+    def throughput(self) -> float:
+        """MiB per second"""
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:  # type: ignore
+        return {
+            "instance": self.instance,
+            "source": self.source,
+            "target": self.target,
+            "mount": self.mount.name,
+            "attempts": self.attempts,
+            "bytes": self.bytes,
+            "files": self.files,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+        }
+
+
+class CommandError(Exception):
+    def __init__(self, argv: Sequence[str], returncode: int, output: str):
+        super(CommandError, self).__init__("{} exited with {}: {}".format(" ".join(argv), returncode,
+                                                                          output.strip()[-500:]))
+
+
+def run_command(argv: Sequence[str]) -> str:
+    """runs argv and returns its output. Raises CommandError if it fails"""
+    p = subprocess.run(list(argv), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    if p.returncode != 0:
+        raise CommandError(argv, p.returncode, p.stdout)
+    return p.stdout
+
+
+def pipe_commands(producer_argv: Sequence[str], consumer_argv: Sequence[str]) -> int:
+    """
+    runs producer_argv | consumer_argv and returns the number of bytes passed.
+    Raises CommandError if either fails
+    """
+    with tempfile.TemporaryFile() as producer_err, tempfile.TemporaryFile() as consumer_err:
+        consumer = subprocess.Popen(list(consumer_argv),
+                                    stdin=subprocess.PIPE,
+                                    stdout=consumer_err,
+                                    stderr=subprocess.STDOUT)
+        producer = subprocess.Popen(list(producer_argv), stdout=subprocess.PIPE, stderr=producer_err)
+        assert producer.stdout is not None and consumer.stdin is not None
+        passed = 0
+        commands = [(producer, producer_argv, producer_err), (consumer, consumer_argv, consumer_err)]
+        try:
+            while True:
+                chunk = producer.stdout.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                consumer.stdin.write(chunk)
+                passed += len(chunk)
+        except BrokenPipeError:
+            # the consumer died, its exit code tells why and not that of the producer killed
+            producer.kill()
+            commands.reverse()
+        finally:
+            producer.stdout.close()
+            try:
+                consumer.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        for p, argv, err in commands:
+            if p.wait() != 0:
+                err.seek(0)
+                raise CommandError(argv, p.returncode, err.read().decode("utf-8", "replace"))
+    return passed
+
+
+# (size, modification time)
+FileStat = Tuple[int, int]
+# (type - "f" for a regular file, "l" for a symlink or "d" for a directory - size, modification time)
+Entry = Tuple[str, int, int]
+
+# Run by find -exec for every batch of paths: their number, a line "<raw mode> <size> <mtime>"
+# per path and all paths terminated by NUL. Only the paths may contain newlines.
+LISTING_SCRIPT = 'printf "%s\\n" "$#" && stat -c "%f %s %Y" "$@" && printf "%s\\0" "$@"'
+
+
+def _entry_type(mode: int) -> Optional[str]:
+    if stat_module.S_ISREG(mode):
+        return "f"
+    if stat_module.S_ISLNK(mode):
+        return "l"
+    if stat_module.S_ISDIR(mode):
+        return "d"
+    return None
+
+
+def parse_listing(out: str, root: str) -> Dict[str, Entry]:
+    """
+    parses the output of find root -mindepth 1 -exec sh -c LISTING_SCRIPT into
+    the regular files, symlinks and directories below root by their path relative
+    to root. Paths may contain any character, even newlines.
+    """
+    entries = {}
+    prefix = root.rstrip("/") + "/"
+    pos = 0
+    while pos < len(out):
+        end = out.index("\n", pos)
+        count = int(out[pos:end])
+        pos = end + 1
+        stats = []
+        for _ in range(count):
+            end = out.index("\n", pos)
+            stats.append(out[pos:end])
+            pos = end + 1
+        for line in stats:
+            end = out.index("\0", pos)
+            path = out[pos:end]
+            pos = end + 1
+            mode, size, mtime = line.split(" ")
+            kind = _entry_type(int(mode, 16))
+            if kind is not None and path.startswith(prefix):
+                entries[path[len(prefix):]] = (kind, int(size), int(mtime))
+    return entries
+
+
+def parse_hashes(out: str, paths: Sequence[str]) -> Dict[str, str]:
+    """
+    parses the output of sha256sum run on paths. Its lines are in the order of
+    paths; a line starting with a backslash has an escaped file name.
+    """
+    lines = out.splitlines()
+    if len(lines) != len(paths):
+        raise ValueError("expected {} checksums, got {}".format(len(paths), len(lines)))
+    return {p: line.lstrip("\\").split(" ", 1)[0] for p, line in zip(paths, lines)}
+
+
+def batches(paths: Sequence[str]) -> Iterator[List[str]]:
+    """splits paths into batches small enough for the arguments of a single command"""
+    batch: List[str] = []
+    size = 0
+    for p in paths:
+        if batch and (len(batch) >= BATCH_FILES or size + len(p) > BATCH_ARGS_SIZE):
+            yield batch
+            batch, size = [], 0
+        batch.append(p)
+        size += len(p) + 1
+    if batch:
+        yield batch
+
+
+class SyncState(object):
+    """
+    SyncState is the manifest of the files synced from a task volume to a pod:
+    path -> [size, modification time, SHA-256 or None if not checksummed].
+    """
+    def __init__(self, path: str, task: str, pod: str):
+        super(SyncState, self).__init__()
+        self.path = path
+        self.task = task
+        self.pod = pod
+        self.files: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def load(cls, path: str, task: str, pod: str) -> 'SyncState':
+        state = cls(path, task, pod)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            # what was synced from or to other instances tells nothing
+            if data.get("task") == task and data.get("pod") == pod:
+                state.files = data.get("files", {})
+        return state
+
+    def synced(self, path: str, stat: FileStat, sha: Optional[str] = None) -> bool:
+        """whether path was synced as it is now. Only if checksummed with sha if given"""
+        entry = self.files.get(path)
+        if entry is None or tuple(entry[:2]) != stat:
+            return False
+        return sha is None or entry[2] == sha
+
+    def checksum(self, path: str, stat: FileStat) -> Optional[str]:
+        entry = self.files.get(path)
+        return entry[2] if entry is not None and tuple(entry[:2]) == stat else None
+
+    def record(self, path: str, stat: FileStat, sha: Optional[str]) -> None:
+        self.files[path] = [stat[0], stat[1], sha]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"task": self.task, "pod": self.pod, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+
+def dir_size(path: str) -> int:
+    """the size of all regular files below path in bytes"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            p = os.path.join(root, f)
+            if os.path.isfile(p) and not os.path.islink(p):
+                size += os.path.getsize(p)
+    return size
+
+
+def ordinal(pod: str) -> int:
+    """the ordinal of a StatefulSet pod: 2 for postgres-2"""
+    m = re.search(r"-(\d+)$", pod)
+    return int(m.group(1)) if m else -1
+
+
+class DataCopy(object):
+    """
+    DataCopy downloads and uploads the volumes of all instances of a stateful app.
+
+    Up to parallel_tasks instances are copied at a time and up to
+    parallel_volumes volumes of each of them. A transfer failing is retried up
+    to retries times, waiting retry_delay seconds, twice as long after every
+    further failure.
+    """
+    def __init__(self,
+                 mounts: Sequence[Mount],
+                 target_dir: str = TARGET_DIR,
+                 dcos: str = "dcos",
+                 kubectl: str = "kubectl",
+                 parallel_tasks: int = 4,
+                 parallel_volumes: int = 2,
+                 retries: int = 3,
+                 retry_delay: float = 5.0,
+                 run: Callable[[Sequence[str]], str] = run_command,
+                 pipe: Callable[[Sequence[str], Sequence[str]], int] = pipe_commands,
+                 out: Callable[[str], None] = print):
+        super(DataCopy, self).__init__()
+        self.mounts = list(mounts)
+        self.target_dir = target_dir
+        self.dcos = dcos
+        self.kubectl = kubectl
+        self.parallel_tasks = max(1, parallel_tasks)
+        self.parallel_volumes = max(1, parallel_volumes)
+        self.retries = max(0, retries)
+        self.retry_delay = retry_delay
+        self.run = run
+        self.pipe = pipe
+        self._out = out
+        self._out_lock = threading.Lock()
+
+    def log(self, message: str) -> None:
+        with self._out_lock:
+            self._out(message)
+
+    def tasks(self, app_id: str) -> List[str]:
+        """the IDs of the tasks of app_id, sorted"""
+        return sorted(self.run([self.dcos, "marathon", "task", "list", "-q", app_id]).split())
+
+    def pods(self, k8s_app_id: str) -> List[str]:
+        """the pods of the StatefulSet k8s_app_id, sorted by their ordinal"""
+        out = self.run([
+            self.kubectl, "get", "pods", "--template", '{{range .items}}{{.metadata.name}}{{"\\n"}}{{end}}', "-l",
+            "app={}".format(k8s_app_id)
+        ])
+        return sorted(out.split(), key=lambda p: (ordinal(p), p))
+
+    def instance_dir(self, instance: int) -> str:
+        return os.path.join(self.target_dir, str(instance))
+
+    def download(self, app_id: str) -> List[Transfer]:
+        tasks = self.tasks(app_id)
+        if not tasks:
+            raise RuntimeError("app {} has no tasks".format(app_id))
+        self.log("Downloading {} volumes of {} tasks of {}".format(len(self.mounts), len(tasks), app_id))
+
+        def download(t: Transfer) -> None:
+            path = os.path.join(t.target, t.mount.name)
+            # a failed attempt may have left a partial download
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.makedirs(t.target, exist_ok=True)
+            self.run([self.dcos, "task", "download", t.source, t.mount.name, "--target-dir", t.target + os.sep])
+            t.bytes = dir_size(path)
+
+        transfers = [[Transfer(i, task, self.instance_dir(i), m) for m in self.mounts] for i, task in enumerate(tasks)]
+        return self._copy(transfers, download)
+
+    def upload(self, k8s_app_id: str) -> List[Transfer]:
+        pods = self.pods(k8s_app_id)
+        instances = sorted(int(d) for d in os.listdir(self.target_dir) if d.isdigit())
+        if not instances:
+            raise RuntimeError("nothing downloaded to {}".format(self.target_dir))
+        if len(pods) < len(instances):
+            raise RuntimeError("{} instances were downloaded but StatefulSet {} only has {} pods".format(
+                len(instances), k8s_app_id, len(pods)))
+        self.log("Uploading {} volumes of {} instances to {}".format(len(self.mounts), len(instances), k8s_app_id))
+
+        def upload(t: Transfer) -> None:
+            self.run([self.kubectl, "cp", t.source + os.sep, "{}:{}".format(t.target, os.path.dirname(t.mount.path))])
+            t.bytes = dir_size(t.source)
+
+        transfers = [[Transfer(i, os.path.join(self.instance_dir(i), m.name), pods[i], m) for m in self.mounts]
+                     for i in instances]
+        return self._copy(transfers, upload)
+
+    def stream(self, app_id: str, k8s_app_id: str, compress: str = "none") -> List[Transfer]:
+        """
+        copies every volume straight from the task to the pod of the same
+        ordinal. The bytes reported are those sent, after compression.
+        """
+        transfers = self._task_to_pod_transfers(app_id, k8s_app_id, "Streaming")
+
+        def stream(t: Transfer) -> None:
+            t.bytes = self._tar(t, ["."], compress)
+
+        return self._copy(transfers, stream)
+
+    def sync(self,
+             app_id: str,
+             k8s_app_id: str,
+             compress: str = "none",
+             checksum: bool = False,
+             state_dir: str = SYNC_DIR) -> List[Transfer]:
+        """
+        streams the files of every volume missing in or differing from the pod
+        of the same ordinal. With checksum, files looking the same are compared
+        by SHA-256 unless the state recorded them already, and copied files are
+        verified. The bytes reported are the size of the files copied.
+        """
+        transfers = self._task_to_pod_transfers(app_id, k8s_app_id, "Syncing")
+
+        def sync(t: Transfer) -> None:
+            state = SyncState.load(os.path.join(state_dir, "{}-{}.json".format(t.instance, t.mount.name)), t.source,
+                                   t.target)
+            listing = self._listing(self._in_task(t), t.mount.name)
+            target = self._listing(self._in_pod(t), t.mount.path)
+
+            # files and symlinks are copied by tar, directories missing in the pod only created
+            missing_dirs = sorted(p for p, e in listing.items() if e[0] == "d" and target.get(p, ("", ))[0] != "d")
+            for batch in batches(missing_dirs):
+                self.run(self._in_pod(t) + ["mkdir", "-p"] + [t.mount.path.rstrip("/") + "/" + p for p in batch])
+
+            source = {p: (e[1], e[2]) for p, e in listing.items() if e[0] != "d"}
+            changed = []
+            unverified = []
+            for path, stat in sorted(source.items()):
+                if target.get(path) != listing[path]:
+                    changed.append(path)
+                elif listing[path][0] == "l":
+                    # a symlink of the same size and modification time, nothing to checksum
+                    state.record(path, stat, None)
+                elif not state.synced(path, stat) or (checksum and state.checksum(path, stat) is None):
+                    unverified.append(path)
+
+            if checksum:
+                source_hashes = self._hashes(self._in_task(t), t.mount.name, unverified)
+                target_hashes = self._hashes(self._in_pod(t), t.mount.path, unverified)
+                for path in unverified:
+                    if source_hashes.get(path) is not None and source_hashes.get(path) == target_hashes.get(path):
+                        state.record(path, source[path], source_hashes[path])
+                    else:
+                        changed.append(path)
+            else:
+                for path in unverified:
+                    state.record(path, source[path], None)
+            state.save()
+
+            self.log("{} {}: {} of {} files to copy, {} directories created".format(
+                t.source, t.mount.name, len(changed), len(source), len(missing_dirs)))
+            t.bytes = t.files = 0
+            for batch in batches(sorted(changed)):
+                self._tar(t, ["./" + p for p in batch], compress)
+                hashes: Dict[str, Optional[str]] = {p: None for p in batch}
+                files = [p for p in batch if listing[p][0] == "f"]
+                if checksum and files:
+                    source_hashes = self._hashes(self._in_task(t), t.mount.name, files)
+                    target_hashes = self._hashes(self._in_pod(t), t.mount.path, files)
+                    corrupt = [p for p in files if source_hashes.get(p) != target_hashes.get(p)]
+                    if corrupt:
+                        raise RuntimeError("checksums of {} differ after copying".format(", ".join(corrupt[:10])))
+                    hashes.update(source_hashes)
+                for p in batch:
+                    state.record(p, source[p], hashes[p])
+                state.save()
+                t.bytes += sum(source[p][0] for p in batch)
+                t.files += len(batch)
+
+        return self._copy(transfers, sync)
+
+    def _task_to_pod_transfers(self, app_id: str, k8s_app_id: str, verb: str) -> List[List[Transfer]]:
+        tasks = self.tasks(app_id)
+        if not tasks:
+            raise RuntimeError("app {} has no tasks".format(app_id))
+        pods = self.pods(k8s_app_id)
+        if len(pods) < len(tasks):
+            raise RuntimeError("app {} has {} tasks but StatefulSet {} only has {} pods".format(
+                app_id, len(tasks), k8s_app_id, len(pods)))
+        self.log("{} {} volumes of {} tasks of {} to {}".format(verb, len(self.mounts), len(tasks), app_id,
+                                                                k8s_app_id))
+        return [[Transfer(i, task, pods[i], m) for m in self.mounts] for i, task in enumerate(tasks)]
+
+    # dcos task exec runs in the sandbox, the volume being the directory named like the mount
+    def _in_task(self, t: Transfer) -> List[str]:
+        return [self.dcos, "task", "exec", t.source]
+
+    def _in_pod(self, t: Transfer) -> List[str]:
+        return [self.kubectl, "exec", t.target, "--"]
+
+    def _tar(self, t: Transfer, paths: List[str], compress: str) -> int:
+        """pipes paths of the volume of the task into the pod, returns the bytes sent"""
+        flag = COMPRESSION[compress]
+        return self.pipe(
+            self._in_task(t) + ["tar", "-c" + flag + "f", "-", "-C", t.mount.name] + paths,
+            [self.kubectl, "exec", "-i", t.target, "--", "tar", "-x" + flag + "f", "-", "-C", t.mount.path])
+
+    def _listing(self, prefix: List[str], root: str) -> Dict[str, Entry]:
+        return parse_listing(
+            self.run(prefix + ["find", root, "-mindepth", "1", "-exec", "sh", "-c", LISTING_SCRIPT, "sh", "{}", "+"]),
+            root)
+
+    def _hashes(self, prefix: List[str], root: str, paths: List[str]) -> Dict[str, str]:
+        hashes = {}
+        for batch in batches(paths):
+            hashes.update(
+                parse_hashes(self.run(prefix + ["sha256sum"] + [root.rstrip("/") + "/" + p for p in batch]), batch))
+        return hashes
+
+    def _attempt(self, t: Transfer, transfer: Callable[[Transfer], None]) -> Transfer:
+        delay = self.retry_delay
+        while True:
+            t.attempts += 1
+            start = time.perf_counter()
+            try:
+                transfer(t)
+                t.seconds = time.perf_counter() - start
+                t.error = None
+                self.log("{} {} {}: {:.1f} MiB in {:.1f}s ({:.1f} MiB/s)".format(t.source, t.mount.name, t.target,
+                                                                                 t.bytes / (1024 * 1024), t.seconds,
+                                                                                 t.throughput))
+                return t
+            except Exception as e:
+                t.error = str(e)
+                if t.attempts > self.retries:
+                    self.log("{} {} failed after {} attempts: {}".format(t.source, t.mount.name, t.attempts, e))
+                    return t
+                self.log("{} {} failed, retrying in {:.0f}s: {}".format(t.source, t.mount.name, delay, e))
+                time.sleep(delay)
+                delay *= 2
+
+    def _copy(self, instances: List[List[Transfer]], transfer: Callable[[Transfer], None]) -> List[Transfer]:
+        def copy_instance(volumes: List[Transfer]) -> List[Transfer]:
+            with ThreadPoolExecutor(max_workers=self.parallel_volumes) as pool:
+                return list(pool.map(lambda t: self._attempt(t, transfer), volumes))
+
+        with ThreadPoolExecutor(max_workers=self.parallel_tasks) as pool:
+            return [t for volumes in pool.map(copy_instance, instances) for t in volumes]
+
+
+def report(transfers: Sequence[Transfer]) -> str:
+    header = "{:>8}  {:<40} {:<20} {:>10} {:>9} {:>8} {:>8}  {}".format("instance", "from", "volume", "MiB", "seconds",
+                                                                        "MiB/s", "attempts", "status")
+    lines = [header]
+    for t in sorted(transfers, key=lambda t: (t.instance, t.mount.name)):
+        lines.append("{:>8}  {:<40} {:<20} {:>10.1f} {:>9.1f} {:>8.1f} {:>8}  {}".format(
+            t.instance, t.source, t.mount.name, t.bytes / (1024 * 1024), t.seconds, t.throughput, t.attempts,
+            "ok" if t.ok else "FAILED"))
+
+    total = sum(t.bytes for t in transfers)
+    # volumes are copied in parallel, so sum up bytes but not time
+    lines.append("{} of {} volumes copied, {:.1f} MiB".format(sum(t.ok for t in transfers), len(transfers),
+                                                              total / (1024 * 1024)))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("direction", choices=["download", "upload", "stream", "sync"])
+    parser.add_argument("--app-id", help="the Marathon app to download from")
+    parser.add_argument("--k8s-app-id", help="the StatefulSet to upload to")
+    parser.add_argument("--mount",
+                        dest="mounts",
+                        action="append",
+                        type=Mount.parse,
+                        required=True,
+                        metavar="NAME=PATH",
+                        help="a persistent volume, by its name in the sandbox and its path in the container")
+    parser.add_argument("--target-dir", default=TARGET_DIR)
+    parser.add_argument("--compress",
+                        choices=sorted(COMPRESSION),
+                        default="none",
+                        help="compression of the data sent by stream and sync")
+    parser.add_argument("--checksum", action="store_true", help="sync compares and verifies files by SHA-256")
+    parser.add_argument("--state-dir", default=SYNC_DIR, help="where sync records what it synced")
+    parser.add_argument("--dcos", default=os.environ.get("DCOS_CLI", "dcos"), help="the dcos command to use")
+    parser.add_argument("--kubectl", default=os.environ.get("KUBECTL", "kubectl"), help="the kubectl command to use")
+    parser.add_argument("--parallel-tasks", type=int, default=4, help="instances copied at a time")
+    parser.add_argument("--parallel-volumes", type=int, default=2, help="volumes of an instance copied at a time")
+    parser.add_argument("--retries", type=int, default=3, help="retries of a failed transfer")
+    parser.add_argument("--retry-delay", type=float, default=5.0, help="seconds before the first retry")
+    parser.add_argument("--report", help="write the transfers as JSON to this file")
+    opts = parser.parse_args(argv)
+
+    copy = DataCopy(opts.mounts,
+                    target_dir=opts.target_dir,
+                    dcos=opts.dcos,
+                    kubectl=opts.kubectl,
+                    parallel_tasks=opts.parallel_tasks,
+                    parallel_volumes=opts.parallel_volumes,
+                    retries=opts.retries,
+                    retry_delay=opts.retry_delay,
+                    out=lambda s: print(s, flush=True))
+
+    if opts.direction == "download":
+        if not opts.app_id:
+            parser.error("download needs --app-id")
+        transfers = copy.download(opts.app_id)
+    elif opts.direction == "upload":
+        if not opts.k8s_app_id:
+            parser.error("upload needs --k8s-app-id")
+        transfers = copy.upload(opts.k8s_app_id)
+    else:
+        if not opts.app_id or not opts.k8s_app_id:
+            parser.error("{} needs --app-id and --k8s-app-id".format(opts.direction))
+        if opts.direction == "stream":
+            transfers = copy.stream(opts.app_id, opts.k8s_app_id, opts.compress)
+        else:
+            transfers = copy.sync(opts.app_id, opts.k8s_app_id, opts.compress, opts.checksum, opts.state_dir)
+
+    print(report(transfers))
+    if opts.report:
+        with open(opts.report, "w") as f:
+            json.dump([t.to_dict() for t in transfers], f, indent=2)
+
+    failed = [t for t in transfers if not t.ok]
+    for t in failed:
+        print("{} of {} failed: {}".format(t.mount.name, t.source, t.error), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,17 @@
-from dcos_migrate.system import Manifest, ManifestList, Migrator, with_comment
+from dcos_migrate.system import Document, Manifest, ManifestList, Migrator, with_comment
 import dcos_migrate.utils as utils
 from kubernetes.client.models import V1Deployment, V1Service, V1ObjectMeta, V1Secret  # type: ignore
 from kubernetes.client import ApiClient, V1StatefulSet  # type: ignore
 
-from .app_translator import ContainerDefaults, translate_app, Settings
+from .app_translator import (ContainerDefaults, translate_app, Settings, marathon_rollout_parallelism,
+                             rollout_parallelism)
 from .app_secrets import TrackingAppSecretMapping, SecretRemapping
 from .service_translator import translate_service
 from .stateful_copy import make_sleeper_stateful_set, configure_stateful_migrate
 
 import logging
 import sys
-from typing import Any, DefaultDict, Mapping, Optional, Set
+from typing import Any, DefaultDict, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Type
 from collections import defaultdict
 
 
@@ -30,6 +31,40 @@ class NodeLabelTracker(object):
         return dict(apps_by_label)
 
 
+class Rollout(NamedTuple):
+    app_id: str
+    instances: int
+    # pods replaced at a time
+    marathon: int
+    kubernetes: int
+
+
+class RolloutTracker(object):
+    """collects how many pods the Deployments migrated replace at a time"""
+    def __init__(self) -> None:
+        self.rollouts: List[Rollout] = []
+
+    def add_rollout(self, marathon_app: Dict[str, Any], deployment: Dict[str, Any]) -> None:
+        self.rollouts.append(
+            Rollout(marathon_app['id'], marathon_app.get('instances', 1), marathon_rollout_parallelism(marathon_app),
+                    rollout_parallelism(deployment)))
+
+    def slower(self) -> List[Rollout]:
+        return [r for r in self.rollouts if r.kubernetes < r.marathon]
+
+    def report(self) -> str:
+        width = max([len(r.app_id) for r in self.rollouts] + [len("app")])
+        lines = ["{:<{w}} {:>9} {:>6} {:>6}".format("app", "instances", "DC/OS", "K8s", w=width)]
+        for r in sorted(self.rollouts):
+            lines.append("{:<{w}} {:>9} {:>6} {:>6}{}".format(r.app_id,
+                                                              r.instances,
+                                                              r.marathon,
+                                                              r.kubernetes,
+                                                              "  slower" if r.kubernetes < r.marathon else "",
+                                                              w=width))
+        return "\n".join(lines)
+
+
 @with_comment
 class V1ServiceWithComment(V1Service):  # type: ignore
     pass
@@ -47,11 +82,22 @@ class V1StatefulSetWithComment(V1StatefulSet):  # type: ignore
 
 class MarathonMigrator(Migrator):
     """docstring for MarathonMigrator."""
-    def __init__(self, node_label_tracker: Optional[NodeLabelTracker] = None, **kw: Any):
+    def __init__(self,
+                 node_label_tracker: Optional[NodeLabelTracker] = None,
+                 documents: bool = False,
+                 rollout_tracker: Optional[RolloutTracker] = None,
+                 fetch_cache: Optional[utils.FetchCache] = None,
+                 prebaker: Optional[utils.Prebaker] = None,
+                 **kw: Any):
         super(MarathonMigrator, self).__init__(**kw)
+        # create Documents instead of kubernetes models
+        self._documents = documents
+        self._fetch_cache = fetch_cache
+        self._prebaker = prebaker
 
         self._node_label_tracker = NodeLabelTracker() if node_label_tracker is None\
             else node_label_tracker
+        self._rollout_tracker = RolloutTracker() if rollout_tracker is None else rollout_tracker
 
         assert self.object is not None
         self._secret_mapping = TrackingAppSecretMapping(self.object['id'], self.object.get('secrets', {}))
@@ -71,20 +117,19 @@ class MarathonMigrator(Migrator):
             return
 
         settings = Settings(
-            container_defaults=ContainerDefaults("alpine:latest", "/"),
+            container_defaults=ContainerDefaults("alpine:latest", "/", self._fetch_cache, self._prebaker),
             app_secret_mapping=self._secret_mapping,
         )
 
-        self.manifest = Manifest(pluginName="marathon", manifestName=self.dnsify(value))
+        self.manifest = Manifest(pluginName="marathon", manifestName=self.dnsify(value), documents=self._documents)
 
         assert self.object is not None
 
         translated = translate_app(self.object, settings)
 
-        kc = ApiClient()
         if translated.deployment['kind'] == "StatefulSet":
-            sleeper_stateful_set = make_sleeper_stateful_set(translated.deployment)
-            dapp = kc._ApiClient__deserialize(sleeper_stateful_set, V1StatefulSetWithComment)
+            app = make_sleeper_stateful_set(translated.deployment)
+            dapp = self.resource(app, V1StatefulSetWithComment, translated.warnings)
             try:
                 configure_stateful_migrate(original_marathon_app=self.object,
                                            k8s_translate_result=translated.deployment)
@@ -92,25 +137,31 @@ class MarathonMigrator(Migrator):
                 print("Unexpected error while preparing Marathon stateful migration:", sys.exc_info()[0])
                 raise
         else:
-            dapp = kc._ApiClient__deserialize(translated.deployment, V1DeploymentWithComment)
-
-        dapp.set_comment(translated.warnings)
+            app = translated.deployment
+            dapp = self.resource(app, V1DeploymentWithComment, translated.warnings)
+            self._rollout_tracker.add_rollout(self.object, app)
 
         self.manifest.append(dapp)
         self._node_label_tracker.add_app_node_labels(self.object['id'], translated.required_node_labels)
 
-        service, service_warnings = translate_service(dapp.metadata.labels['app'], self.object)
+        service, service_warnings = translate_service(app['metadata']['labels']['app'], self.object)
         if service:
-            kc2 = ApiClient()
-            dservice = kc2._ApiClient__deserialize(service, V1ServiceWithComment)
-            dservice.set_comment(service_warnings)
-            self.manifest.append(dservice)
+            self.manifest.append(self.resource(service, V1ServiceWithComment, service_warnings))
 
         for remapping in self._secret_mapping.get_secrets_to_remap():
             secret = _create_remapped_secret(self.manifest_list, remapping, self.object['id'])
             if secret is not None:
                 self.manifest.append(secret)
 
+    def resource(self, body: Dict[str, Any], model: Type[Any], comment: Iterable[str]) -> Any:
+        """returns body with comment as Document or as an instance of model"""
+        if self._documents:
+            return Document(body, comment)
+
+        r = ApiClient()._ApiClient__deserialize(body, model)
+        r.set_comment(comment)
+        return r
+
 
 class NoMigratedSecretFound(RuntimeError):
     pass
@@ -1,76 +1,145 @@
 from dcos_migrate.plugins.plugin import MigratePlugin
-from dcos_migrate.plugins.cluster import ClusterPlugin
-from dcos_migrate.plugins.secret import SecretPlugin
-from dcos_migrate.system import DCOSClient, BackupList, Backup, ManifestList, DictArg, Arg
-from .migrator import MarathonMigrator, NodeLabelTracker
+from dcos_migrate.plugins.marathon import spec
+from dcos_migrate.system import DCOSClient, BackupList, Backup, Manifest, ManifestList
+from dcos_migrate.system.document import resource_body
+from .app_translator import marathon_app_id_to_k8s_app_id, pod_selector_labels
+from .constraints import translate_constraints
+from .migrator import MarathonMigrator, NodeLabelTracker, RolloutTracker
+import dcos_migrate.utils as utils
 
 import json
 import logging
-from typing import Any, Dict
+import urllib
+from typing import cast, Any, Dict, Iterator, Optional
+
+from dcos.errors import DCOSHTTPException  # type: ignore
 
 
 class MarathonPlugin(MigratePlugin):
     """docstring for MarathonPlugin."""
 
-    plugin_name = "marathon"
-    migrate_depends = [ClusterPlugin.plugin_name, SecretPlugin.plugin_name]
+    spec = spec
 
     def __init__(self) -> None:
         super(MarathonPlugin, self).__init__()
-        # TODO: returned config is not yet used
-        self._config_options = [
-            DictArg(
-                "secretoverwrite",
-                plugin_name=self.plugin_name,
-                metavar='DCOS_SECRET=K8s_SECRET',
-                help='Map DC/OS secrets to a different K8s secret. K8s data key must equal DC/OS secret name'  # noqa
-            ),
-            Arg("image",
-                plugin_name=self.plugin_name,
-                default="alpine:latest",
-                metavar="IMAGE",
-                help='Image to be used when assets need to be fetched.'),
-            Arg("workdir",
-                plugin_name=self.plugin_name,
-                default="/",
-                metavar="WORKDIR",
-                help='Workdir which fetched artifacts are downloaded to.')
-        ]
+        self._node_label_tracker = NodeLabelTracker()
+        self._rollout_tracker = RolloutTracker()
+        self._prebaker: Optional[utils.Prebaker] = None
 
     def backup(  # type: ignore
             self, client: DCOSClient, **kwargs) -> BackupList:
         bl = BackupList()
-        apps = client.get("{}/marathon/v2/apps".format(client.dcos_url)).json()
-        for app in apps['apps']:
-            bl.append(self.createBackup(app))
+        bl.extend(self.backup_iter(client, **kwargs))
 
         return bl
 
+    def backup_iter(  # type: ignore
+            self, client: DCOSClient, **kwargs) -> Iterator[Backup]:
+        id_filter = self.config_filter
+        group = id_filter.group()
+        if group == '/':
+            # /v2/apps can be hundreds of MB on large clusters. Parse it incrementally
+            # so only a single app is held as raw text at any time.
+            chunks = client.get_stream("{}/marathon/v2/apps".format(client.dcos_url))
+            apps = utils.iter_json_items(chunks, 'apps')
+        else:
+            apps = self.groupApps(client, group)
+
+        for app in apps:
+            if id_filter.match(app['id']):
+                yield self.createBackup(app)
+
+    def groupApps(self, client: DCOSClient, group: str) -> Iterator[Dict[str, Any]]:
+        """yields all apps in group and its subgroups"""
+        url = "{}/marathon/v2/groups{}?embed=group.groups&embed=group.apps".format(client.dcos_url,
+                                                                                   urllib.parse.quote(group))
+        try:
+            root = utils.load_json(client.get_stream(url))
+        except DCOSHTTPException as e:
+            if e.response.status_code == 404:
+                logging.warning("Marathon group {} does not exist".format(group))
+                return
+            raise
+
+        groups = [root]
+        while groups:
+            g = groups.pop()
+            yield from g.get('apps', [])
+            groups.extend(g.get('groups', []))
+
     def createBackup(self, app: Dict[str, Any]) -> Backup:
         return Backup(pluginName=self.plugin_name, backupName=Backup.renderBackupName(app['id']), data=app)
 
     def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> ManifestList:
-        node_label_tracker = NodeLabelTracker()
-
         ml = ManifestList()
 
+        self.migrate_start()
         for b in backupList.backups(pluginName=self.plugin_name):
-            mig = MarathonMigrator(node_label_tracker=node_label_tracker,
-                                   backup=b,
-                                   backup_list=backupList,
-                                   manifest_list=manifestList)
+            manifest = self.migrate_backup(cast(Backup, b), backupList, manifestList)
+            if manifest:
+                ml.append(manifest)
+        self.migrate_finish()
+
+        return ml
 
-            try:
-                manifest = mig.migrate()
+    def migrate_start(self) -> None:
+        self._node_label_tracker = NodeLabelTracker()
+        self._rollout_tracker = RolloutTracker()
+        config = self.plugin_config or {}
+        self._prebaker = utils.Prebaker(config['prebake'], config.get('prebake-registry')) \
+            if config.get('prebake') else None
 
-                if manifest:
-                    ml.append(manifest)
-            except Exception as e:
-                logging.warning("Cannot migrate: {}".format(e))
+    def migrate_backup(self, backup: Backup, backupList: BackupList, manifestList: ManifestList,
+                       **kwargs: Any) -> Optional[Manifest]:
+        if not self.config_filter.match(backup.data.get('id', '')):
+            return None
 
-        app_node_labels = node_label_tracker.get_apps_by_label()
+        mig = MarathonMigrator(node_label_tracker=self._node_label_tracker,
+                               rollout_tracker=self._rollout_tracker,
+                               documents=bool((self.plugin_config or {}).get('documents')),
+                               fetch_cache=(self.plugin_config or {}).get('fetch-cache'),
+                               prebaker=self._prebaker,
+                               backup=backup,
+                               backup_list=backupList,
+                               manifest_list=manifestList)
+
+        try:
+            return mig.migrate()
+        except Exception as e:
+            logging.warning("Cannot migrate: {}".format(e))
+            return None
+
+    def migrate_resume(self, backup: Backup, manifest: Optional[Manifest]) -> None:
+        app = backup.data
+        if manifest is None or not self.config_filter.match(app.get('id', '')):
+            return
+
+        _, labels = translate_constraints(pod_selector_labels(app['id']), app.get('constraints', []))
+        self._node_label_tracker.add_app_node_labels(app['id'], labels)
+        for resource in manifest:
+            body = resource_body(resource)
+            if body.get('kind') == 'Deployment':
+                self._rollout_tracker.add_rollout(app, body)
+            if self._prebaker is not None:
+                self._prebaker.restore('marathon/' + marathon_app_id_to_k8s_app_id(app['id']),
+                                       utils.container_images(body))
+
+    def migrate_finish(self) -> None:
+        app_node_labels = self._node_label_tracker.get_apps_by_label()
         if app_node_labels:
             logging.info('Node labels used by deployments generated from Marathon apps:\n{}\n'
                          'Please make sure that these labels are properly set on nodes\nof the'
                          ' target Kubernetes cluster!'.format(json.dumps(list(app_node_labels))))
-        return ml
+
+        if self._rollout_tracker.rollouts:
+            logging.info('Pods replaced at a time during rollouts of Deployments generated from Marathon apps:\n'
+                         '{}'.format(self._rollout_tracker.report()))
+        slower = self._rollout_tracker.slower()
+        if slower:
+            logging.warning('{} Deployments will roll out slower than their Marathon apps: {}'.format(
+                len(slower), ', '.join(r.app_id for r in slower)))
+
+        if self._prebaker is not None and self._prebaker.images:
+            logging.warning('Deployments generated from Marathon apps use images with prebaked artifacts. Build and '
+                            'push them before applying the Deployments:\n{}'.format('\n'.join(
+                                self._prebaker.build_commands())))
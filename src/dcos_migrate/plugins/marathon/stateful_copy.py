@@ -9,6 +9,7 @@ from dcos_migrate.plugins.marathon import app_translator
 from dcos_migrate.plugins.marathon import volumes
 
 STATE_PATH: Path = Path("dcos-migrate") / "migrate/marathon/stateful-copy"
+ASSETS_PATH: Path = Path(__file__).parent / "assets"
 
 
 def make_original_k8s_patch(original_service: Dict[str, Any]) -> Dict[str, Any]:
@@ -72,10 +73,12 @@ def __as_bash_array(arr: List[str]) -> str:
 
 
 def copy_assets(output_dir: Path) -> None:
-    shutil.copy("src/dcos_migrate/plugins/marathon/assets/instance/Makefile", output_dir / "Makefile")
-    shutil.copy("src/dcos_migrate/plugins/marathon/assets/Makefile", STATE_PATH / "Makefile")
-    shutil.copy("src/dcos_migrate/plugins/marathon/assets/README.md", STATE_PATH / "README.md")
-    shutil.copytree("src/dcos_migrate/plugins/marathon/assets/bin", STATE_PATH / "bin", dirs_exist_ok=True)
+    shutil.copy(ASSETS_PATH / "instance/Makefile", output_dir / "Makefile")
+    shutil.copy(ASSETS_PATH / "Makefile", STATE_PATH / "Makefile")
+    shutil.copy(ASSETS_PATH / "README.md", STATE_PATH / "README.md")
+    shutil.copytree(ASSETS_PATH / "bin", STATE_PATH / "bin", dirs_exist_ok=True)
+    # the bin scripts run the copy engine from there
+    shutil.copy(Path(__file__).parent / "data_copy.py", STATE_PATH / "bin" / "data_copy.py")
 
 
 def stateful_migrate_artifacts(original_marathon_app: Dict[str, Any],
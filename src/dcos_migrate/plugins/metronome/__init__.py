@@ -1,2 +1,34 @@
-from .plugin import MetronomePlugin
-from .migrator import MetronomeMigrator
+from typing import TYPE_CHECKING
+
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
+from dcos_migrate.system import Arg
+from dcos_migrate.utils import FetchCache
+
+spec = PluginSpec("metronome",
+                  "dcos_migrate.plugins.metronome.plugin:MetronomePlugin",
+                  migrate_depends=["cluster", "secret"],
+                  migrate_streaming=True,
+                  config_options=[
+                      Arg("fetch-cache",
+                          plugin_name="metronome",
+                          type=FetchCache.parse,
+                          metavar="hostPath:PATH|pvc:CLAIM_NAME",
+                          help='Share artifacts fetched with cache=true between job runs in this hostPath or '
+                          'ReadWriteMany PersistentVolumeClaim, downloading them again only if they changed.'),
+                      Arg("prebake",
+                          plugin_name="metronome",
+                          metavar="DIR",
+                          help='Download fetched artifacts once into DIR and write a docker build context per job '
+                          'baking them into its image. Migrated jobs use these images and fetch nothing when they '
+                          'run.'),
+                      Arg("prebake-registry",
+                          plugin_name="metronome",
+                          metavar="REGISTRY",
+                          help='Registry the images with prebaked artifacts are pushed to.')
+                  ])
+
+if TYPE_CHECKING:
+    from .plugin import MetronomePlugin
+    from .migrator import MetronomeMigrator
+
+__getattr__ = lazy_exports(__name__, {"MetronomePlugin": ".plugin", "MetronomeMigrator": ".migrator"})
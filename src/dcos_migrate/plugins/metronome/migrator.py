@@ -1,5 +1,6 @@
 from dcos_migrate.system import Migrator, Manifest
 import dcos_migrate.utils as utils
+from dcos_migrate.utils.fetch_cache import FETCH_CACHE_IMAGE, cached_fetch_script, is_cacheable
 import kubernetes.client.models as K  # type: ignore
 import json
 import os
@@ -9,13 +10,14 @@ EXTRACT_COMMAND = dict([(".zip", "unzip")] + [(ext, "tar -xf")
                                               for ext in [".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".txz", ".tar.xz"]])
 
 
-def generate_fetch_command(uri: str, allow_extract: bool, executable: bool) -> str:
+def generate_fetch_command(uri: str, allow_extract: bool, executable: bool, cached: bool = False) -> str:
     # NOTE: The path separator is always '/', even on Windows.
     _, _, filename = uri.rpartition("/")
     _, ext = os.path.splitext(filename)
     postprocess = ("chmod a+x" if executable else (EXTRACT_COMMAND.get(ext, "") if allow_extract else ""))
 
-    fmt = ('( wget -O "{fn}" "{uri}" && {postprocess} "{fn}" )' if postprocess else '( wget -O "{fn}" "{uri}")')
+    download = 'cached_fetch "{uri}" "{fn}"' if cached else 'wget -O "{fn}" "{uri}"'
+    fmt = ("( " + download + ' && {postprocess} "{fn}" )' if postprocess else "( " + download + ")")
 
     return fmt.format(fn=filename, uri=uri, postprocess=postprocess)
 
@@ -26,6 +28,8 @@ class MetronomeMigrator(Migrator):
         self,
         defaultImage: str = "alpine:latest",
         workingDir: str = "/work",
+        fetchCache: T.Optional[utils.FetchCache] = None,
+        prebaker: T.Optional[utils.Prebaker] = None,
         **kw: T.Any,
     ):
         super(MetronomeMigrator, self).__init__(**kw)
@@ -33,6 +37,11 @@ class MetronomeMigrator(Migrator):
         self.manifest: "Manifest"
         self.image = defaultImage
         self.workingDir = workingDir
+        # artifacts with cache=true are shared in this volume if set
+        self.fetchCache = fetchCache
+        # artifacts are baked into the image instead of fetched if set
+        self.prebaker = prebaker
+        self.prebakedImage: T.Optional[str] = None
         self.jobSecret: T.Any = None
         self._warnings: T.Dict[str, str] = dict()
         self.translate = {
@@ -121,26 +130,38 @@ class MetronomeMigrator(Migrator):
         if len(value) < 1:
             return
 
+        if self.prebaker is not None:
+            self.prebakeArtifacts(value, full_path)
+            return
+
+        commands = []
+        anyCached = False
+        for fetch in value:
+            fetch = fetch.copy()
+            uri = fetch.pop("uri")
+            cache = fetch.pop("cache", False)
+            extract = fetch.pop("extract", True)
+            executable = fetch.pop("executable", False)
+            if fetch:
+                self.warn(full_path, f'Unknown fields in "fetch": {json.dumps(fetch)}')
+            cached = bool(cache) and self.fetchCache is not None and is_cacheable(uri)
+            if cache and not cached:
+                self.warn(
+                    full_path,
+                    f'`cache=true` requested for fetching "{uri}" has been ignored' +
+                    ('' if self.fetchCache is not None else '; use --metronome-fetch-cache to share a cache'),
+                )
+            if uri.startswith("file://"):
+                self.warn(full_path, f"Fetching a local file {uri} is not portable")
+            anyCached = anyCached or cached
+            commands.append(generate_fetch_command(uri, extract, executable, cached))
+
         def iter_command() -> T.Generator[str, None, None]:
             yield "set -x"
             yield "set -e"
             yield "FETCH_PID_ARRAY=()"
-            for fetch in value:
-                fetch = fetch.copy()
-                uri = fetch.pop("uri")
-                cache = fetch.pop("cache", False)
-                extract = fetch.pop("extract", True)
-                executable = fetch.pop("executable", False)
-                if fetch:
-                    self.warn(full_path, f'Unknown fields in "fetch": {json.dumps(fetch)}')
-                if cache:
-                    self.warn(
-                        full_path,
-                        f'`cache=true` requested for fetching "{uri}" has been ignored',
-                    )
-                if uri.startswith("file://"):
-                    self.warn(full_path, f"Fetching a local file {uri} is not portable")
-                yield generate_fetch_command(uri, extract, executable) + ' & FETCH_PID_ARRAY+=("$!")'
+            for command in commands:
+                yield command + ' & FETCH_PID_ARRAY+=("$!")'
             yield "for pid in ${FETCH_PID_ARRAY[@]}; do wait $pid || exit $?; done"
 
         self.container.volume_mounts = [{
@@ -162,6 +183,32 @@ class MetronomeMigrator(Migrator):
         }]
         self.jobSpec.template.spec.volumes = [{"name": "fetch-artifacts", "emptyDir": {}}]
 
+        if anyCached:
+            assert self.fetchCache is not None
+            fetchContainer = self.jobSpec.template.spec.init_containers[0]
+            fetchContainer["image"] = FETCH_CACHE_IMAGE
+            fetchContainer["command"] = ["sh", "-c", cached_fetch_script(commands)]
+            fetchContainer["securityContext"] = self.fetchCache.security_context()
+            fetchContainer["volumeMounts"].append(self.fetchCache.volume_mount())
+            self.jobSpec.template.spec.volumes.append(self.fetchCache.volume())
+
+    def prebakeArtifacts(self, value: T.List[T.Any], full_path: str) -> None:
+        for fetch in value:
+            unknown = set(fetch) - {"uri", "cache", "extract", "executable"}
+            if unknown:
+                self.warn(full_path, f'Unknown fields in "fetch": {json.dumps({k: fetch[k] for k in unknown})}')
+
+        assert self.object is not None and self.prebaker is not None
+        run = self.object.get("run", {})
+        ucr = run.get("ucr", {}).get("image", {})
+        baseImage = (run.get("docker", {}).get("image") or (ucr.get("id") if ucr.get("kind") == "docker" else None)
+                     or self.image)
+        self.prebakedImage = self.prebaker.bake("metronome/" + self.cronJob.metadata.name, baseImage, self.workingDir,
+                                                value)
+        self.container.image = self.prebakedImage
+        self.warn(full_path,
+                  f"Artifacts are baked into {self.prebakedImage}; build and push it before running the job")
+
     def handleCmd(self, key: str, value: str, full_path: str) -> None:
         if value and value != "":
             self.container.command = ["/bin/sh", "-c", value]
@@ -224,7 +271,9 @@ class MetronomeMigrator(Migrator):
         self.container.image_pull_policy = "Always" if value else "IfNotPresent"
 
     def handleImage(self, key: str, value: str, full_path: str) -> None:
-        self.container.image = value
+        # the prebaked image is built on top of this one
+        if self.prebakedImage is None:
+            self.container.image = value
 
     def handleLabels(self, key: str, value: str, full_path: str) -> None:
         k = f"migration.dcos.d2iq.com/label/{key}"
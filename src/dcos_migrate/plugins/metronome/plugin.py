@@ -1,29 +1,37 @@
+import logging
 import typing as T
 from dcos_migrate.plugins.plugin import MigratePlugin
-from dcos_migrate.plugins.cluster import ClusterPlugin
-from dcos_migrate.plugins.secret import SecretPlugin
-from dcos_migrate.system import DCOSClient, BackupList, Backup, ManifestList
+from dcos_migrate.plugins.metronome import spec
+from dcos_migrate.system import DCOSClient, BackupList, Backup, Manifest, ManifestList
+from dcos_migrate.system.document import resource_body
 from .migrator import MetronomeMigrator
+import dcos_migrate.utils as utils
 
 
 class MetronomePlugin(MigratePlugin):
     """docstring for MetronomePlugin."""
 
-    plugin_name = "metronome"
-    migrate_depends = [ClusterPlugin.plugin_name, SecretPlugin.plugin_name]
+    spec = spec
 
     def __init__(self) -> None:
         super(MetronomePlugin, self).__init__()
+        self._prebaker: T.Optional[utils.Prebaker] = None
 
     def backup(  # type: ignore
             self, client: DCOSClient, **kwargs) -> BackupList:
         bl = BackupList()
-        jobs = client.get(f"{client.dcos_url}/service/metronome/v1/jobs?embed=schedules").json()
-        for job in jobs:
-            bl.append(self.createBackup(job))
+        bl.extend(self.backup_iter(client, **kwargs))
 
         return bl
 
+    def backup_iter(  # type: ignore
+            self, client: DCOSClient, **kwargs) -> T.Iterator[Backup]:
+        chunks = client.get_stream(f"{client.dcos_url}/service/metronome/v1/jobs?embed=schedules")
+        id_filter = self.config_filter
+        for job in utils.iter_json_items(chunks):
+            if id_filter.match(job["id"], "."):
+                yield self.createBackup(job)
+
     def createBackup(self, job: T.Dict[str, T.Any]) -> Backup:
         return Backup(
             pluginName=self.plugin_name,
@@ -34,11 +42,44 @@ class MetronomePlugin(MigratePlugin):
     def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: T.Any) -> ManifestList:
         ml = ManifestList()
 
+        self.migrate_start()
         for b in backupList.backups(pluginName=self.plugin_name):
-            mig = MetronomeMigrator(backup=b, backup_list=backupList, manifest_list=manifestList)
-
-            manifest = mig.migrate()
+            manifest = self.migrate_backup(T.cast(Backup, b), backupList, manifestList)
             if manifest:
                 ml.append(manifest)
+        self.migrate_finish()
 
         return ml
+
+    def migrate_start(self) -> None:
+        config = self.plugin_config or {}
+        self._prebaker = utils.Prebaker(config["prebake"], config.get("prebake-registry")) \
+            if config.get("prebake") else None
+
+    def migrate_backup(self, backup: Backup, backupList: BackupList, manifestList: ManifestList,
+                       **kwargs: T.Any) -> T.Optional[Manifest]:
+        if not self.config_filter.match(backup.data.get("id", ""), "."):
+            return None
+
+        mig = MetronomeMigrator(fetchCache=(self.plugin_config or {}).get("fetch-cache"),
+                                prebaker=self._prebaker,
+                                backup=backup,
+                                backup_list=backupList,
+                                manifest_list=manifestList)
+
+        return mig.migrate()
+
+    def migrate_resume(self, backup: Backup, manifest: T.Optional[Manifest]) -> None:
+        if manifest is None or self._prebaker is None:
+            return
+
+        for resource in manifest:
+            body = resource_body(resource)
+            if body.get("kind") == "CronJob":
+                self._prebaker.restore("metronome/" + body["metadata"]["name"], utils.container_images(body))
+
+    def migrate_finish(self) -> None:
+        if self._prebaker is not None and self._prebaker.images:
+            logging.warning("CronJobs generated from Metronome jobs use images with prebaked artifacts. Build and "
+                            "push them before applying the CronJobs:\n{}".format("\n".join(
+                                self._prebaker.build_commands())))
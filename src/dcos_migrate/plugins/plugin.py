@@ -1,5 +1,9 @@
-from typing import List, Dict, Any, Optional
-from dcos_migrate.system import DCOSClient, BackupList, ManifestList, Arg
+from typing import cast, List, Dict, Any, Iterator, Optional, TYPE_CHECKING
+from dcos_migrate.system import DCOSClient, Backup, BackupList, Manifest, ManifestList, Arg
+from dcos_migrate.utils import IDFilter
+
+if TYPE_CHECKING:
+    from .spec import PluginSpec
 
 
 class MigratePlugin(object):
@@ -9,11 +13,31 @@ class MigratePlugin(object):
     backup_data_depends: List[str] = []
     migrate_depends: List[str] = []
     migrate_data_depends: List[str] = []
+    # set by plugins implementing migrate_backup
+    migrate_streaming: bool = False
+    # the declaration of this plugin. Name, dependencies and options are taken from it
+    spec: Optional['PluginSpec'] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)  # type: ignore
+        spec = cls.__dict__.get('spec')
+        if spec is not None:
+            cls.plugin_name = spec.plugin_name
+            cls.backup_depends = spec.backup_depends
+            cls.backup_data_depends = spec.backup_data_depends
+            cls.migrate_depends = spec.migrate_depends
+            cls.migrate_data_depends = spec.migrate_data_depends
+            cls.migrate_streaming = spec.migrate_streaming
+        # migrate_backup is abstract for streaming plugins. All others are migrated by migrate
+        if cls.migrate_streaming and cls.migrate_backup is MigratePlugin.migrate_backup:
+            raise TypeError("plugin {} sets migrate_streaming but does not implement migrate_backup".format(
+                cls.plugin_name))
 
     def __init__(self, config: Dict[str, Any] = {}):
-        self._config_options: List[Arg] = []
+        self._config_options: List[Arg] = list(self.spec.config_options) if self.spec else []
         self._config = config
         self._plugin_config: Optional[Dict[str, Any]] = {}
+        self._id_filter = IDFilter()
         if self.plugin_name in config:
             self._plugin_config = config[self.plugin_name]
 
@@ -56,6 +80,17 @@ class MigratePlugin(object):
         """
         return self._config['global'].get('oss', False) and True
 
+    @property
+    def config_filter(self) -> IDFilter:
+        """
+        Return the filter on object IDs given by --filter. It matches everything if
+        no filter is configured.
+        """
+        patterns = self._config.get('global', {}).get('filter') or []
+        if patterns != self._id_filter.patterns:
+            self._id_filter = IDFilter(patterns)
+        return self._id_filter
+
     def backup(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> BackupList:
         """
         backup gets a DCOSClient and BackupList of all previously ran backups.
@@ -66,6 +101,20 @@ class MigratePlugin(object):
         """
         pass
 
+    def backup_iter(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> Iterator[Backup]:
+        """
+        backup_iter yields the Backups of this plugin one by one. By default it yields
+        the result of backup. Plugins which fetch their Backups incrementally should
+        override it so a pipelined run can migrate them as soon as they arrive.
+
+        When resuming, kwargs['completed'] holds the names of Backups which are already
+        stored. Plugins may skip fetching these; the caller ignores them either way.
+        """
+        bl = self.backup(client=client, backupList=backupList, **kwargs)
+        if bl:
+            for b in bl:
+                yield cast(Backup, b)
+
     def backup_data(self, client: DCOSClient, backupList: BackupList, backupFolder: str, **kwargs: Any) -> None:
         """
         backup_data gets the DCOSCLient and a folder path. The data functions are
@@ -86,6 +135,38 @@ class MigratePlugin(object):
         """
         pass
 
+    def migrate_start(self) -> None:
+        """
+        migrate_start is called before the first migrate_backup of a run.
+        """
+        pass
+
+    def migrate_backup(self, backup: Backup, backupList: BackupList, manifestList: ManifestList,
+                       **kwargs: Any) -> Optional[Manifest]:
+        """
+        migrate_backup migrates a single Backup of this plugin. backupList might not
+        be complete yet but manifestList contains the Manifests of all migrate_depends.
+
+        Plugins setting migrate_streaming must implement it; defining one without it
+        raises a TypeError. It is never called for any other plugin, they are migrated
+        by migrate instead, and returns no Manifest for them.
+        """
+        return None
+
+    def migrate_resume(self, backup: Backup, manifest: Optional[Manifest]) -> None:
+        """
+        migrate_resume is called after migrate_start instead of migrate_backup for
+        every Backup an interrupted earlier run migrated already, with the Manifest
+        it stored, if any. Plugins rebuild what they collect across Backups from it.
+        """
+        pass
+
+    def migrate_finish(self) -> None:
+        """
+        migrate_finish is called after the last migrate_backup of a run.
+        """
+        pass
+
     def migrate_data(self, backupList: BackupList, manifestList: ManifestList, backupFolder: str, migrateFolder: str,
                      **kwargs: Any) -> None:
         """
@@ -1,18 +1,14 @@
 import importlib
 import pkgutil
-import inspect
 import logging
-from typing import Any, Dict, Iterator, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
 import dcos_migrate.plugins
 from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.spec import PluginSpec
 from dcos_migrate.system import Arg
 
 
-def is_plugin(obj: Any) -> bool:
-    return (inspect.isclass(obj) and issubclass(obj, MigratePlugin) and obj.plugin_name is not None)
-
-
 def get_dependency_batches(plugins: Dict[str, MigratePlugin], depattr: str) -> List[List[MigratePlugin]]:
     """
     Return a list of lists of plugins. The plugins in the first list must be run
@@ -55,6 +51,18 @@ def get_dependency_batches(plugins: Dict[str, MigratePlugin], depattr: str) -> L
     return batches
 
 
+def get_dependency_closure(plugins: Dict[str, MigratePlugin], name: str, depattr: str) -> Set[str]:
+    """returns the names of all plugins name depends on in `depattr`, transitively"""
+    closure: Set[str] = set()
+    pending = [name]
+    while pending:
+        for dep in getattr(plugins[pending.pop()], depattr):
+            if dep in plugins and dep not in closure:
+                closure.add(dep)
+                pending.append(dep)
+    return closure
+
+
 class PluginManager(object):
     """docstring for PluginManager."""
 
@@ -66,7 +74,7 @@ class PluginManager(object):
         self.backup_data: List[List[MigratePlugin]] = []
         self.migrate: List[List[MigratePlugin]] = []
         self.migrate_data: List[List[MigratePlugin]] = []
-        self.plugins = plugins
+        self.plugins = dict(plugins)
         self._config_options: List[Arg] = []
         self._config: Dict[str, Any] = {}
 
@@ -101,6 +109,26 @@ class PluginManager(object):
         """list: List of tuples plugin name and plugin class."""
         return self.migrate_data
 
+    def select(self, batches: List[List[MigratePlugin]], depattr: str,
+               selection: Optional[Iterable[str]]) -> List[List[MigratePlugin]]:
+        """
+        returns batches limited to the plugins in selection and all plugins they
+        depend on in `depattr`. Without selection batches are returned unchanged.
+        """
+        if not selection:
+            return batches
+
+        names = set(selection)
+        for name in selection:
+            names |= get_dependency_closure(self.plugins, name, depattr)
+
+        selected = [[p for p in batch if p.plugin_name in names] for batch in batches]
+        return [batch for batch in selected if batch]
+
+    def dependencies(self, depattr: str) -> Set[str]:
+        """returns the names of all plugins another plugin depends on in `depattr`"""
+        return {dep for p in self.plugins.values() for dep in getattr(p, depattr)}
+
     @property
     def config_options(self) -> List[Arg]:
         return self._config_options
@@ -114,20 +142,30 @@ class PluginManager(object):
         self._config = config
         for p in self.plugins.values():
             p.config = config
+        # dependencies may change with the config
+        self.build_batches()
 
     def discover_modules(self) -> None:
         # https://packaging.python.org/guides/creating-and-discovering-plugins/#using-namespace-packages
+        # Plugin packages declare a PluginSpec as `spec`. Their implementation is
+        # only imported once the plugin is used.
         for finder, name, ispkg in self.iter_namespace():
-            plugin_module = importlib.import_module(name)
-
-            for clsName, cls in inspect.getmembers(plugin_module, is_plugin):
-                logging.info("found plugin {} - {}".format(cls.plugin_name, clsName))
-                self.plugins[cls.plugin_name] = cls()
+            if not ispkg:
+                continue
+            spec = getattr(importlib.import_module(name), 'spec', None)
+            if isinstance(spec, PluginSpec):
+                logging.info("found plugin {} - {}".format(spec.plugin_name, name))
+                # a copy, so every manager gets its own plugin instances
+                self.plugins[spec.plugin_name] = spec.copy()
 
         # if we discover we need to build dependencies
         self.build_dependencies()
 
     def build_dependencies(self) -> None:
+        self.build_batches()
+        self.build_config_options()
+
+    def build_batches(self) -> None:
         self.backup = get_dependency_batches(plugins=self.plugins, depattr="backup_depends")
         logging.debug("Backup batches {}".format(self.backup))
         self.backup_data = get_dependency_batches(plugins=self.plugins, depattr="backup_data_depends")
@@ -137,8 +175,6 @@ class PluginManager(object):
         self.migrate_data = get_dependency_batches(plugins=self.plugins, depattr="migrate_data_depends")
         logging.debug("Migrate Data batches {}".format(self.migrate_data))
 
-        self.build_config_options()
-
     def build_config_options(self) -> None:
         for p in self.plugins.values():
             co = p._config_options
@@ -1,3 +1,37 @@
-from .plugin import SecretPlugin
+from typing import TYPE_CHECKING, Any, Dict, List
 
-__all__ = ['SecretPlugin']
+from dcos_migrate.plugins.spec import PluginSpec, lazy_exports
+from dcos_migrate.system import Arg
+
+
+def referenced_only(config: Dict[str, Any]) -> bool:
+    return bool((config.get("secret") or {}).get("referenced-only")) or bool(
+        (config.get("global") or {}).get("filter"))
+
+
+def referenced_secrets_depends(config: Dict[str, Any]) -> List[str]:
+    # The backups of marathon and metronome tell which secrets are in use. Without
+    # --referenced-only or --filter all secrets are backed up without waiting for them.
+    return ["marathon", "metronome"] if referenced_only(config) else []
+
+
+spec = PluginSpec("secret",
+                  "dcos_migrate.plugins.secret.plugin:SecretPlugin",
+                  config_backup_depends=referenced_secrets_depends,
+                  migrate_depends=["cluster"],
+                  migrate_streaming=True,
+                  config_options=[
+                      Arg("referenced-only",
+                          plugin_name="secret",
+                          action="store_true",
+                          default=False,
+                          help="Only back up and migrate secrets referenced by Marathon apps or Metronome jobs. "
+                          "Implied by --filter.")
+                  ])
+
+if TYPE_CHECKING:
+    from .plugin import SecretPlugin
+
+__getattr__ = lazy_exports(__name__, {"SecretPlugin": ".plugin"})
+
+__all__ = ['SecretPlugin', 'spec']
@@ -1,16 +1,17 @@
 from dcos.errors import DCOSHTTPException  # type: ignore
 
 from dcos_migrate.plugins.plugin import MigratePlugin
-from dcos_migrate.plugins.cluster import ClusterPlugin
+from dcos_migrate.plugins.secret import spec, referenced_only
 from dcos_migrate.system import DCOSClient, BackupList, Backup, Manifest, ManifestList
 import dcos_migrate.utils as utils
+from .usage import SecretUsageIndex
 
 from kubernetes.client.models import V1Secret, V1ObjectMeta  # type: ignore
 
 import urllib
 import base64
 import logging
-from typing import cast, Any, Dict, List
+from typing import cast, Any, Dict, Iterator, List, Optional, Set
 
 
 class DCOSSecretsService:
@@ -69,21 +70,43 @@ class DCOSSecretsService:
 class SecretPlugin(MigratePlugin):
     """docstring for SecretPlugin."""
 
-    plugin_name = "secret"
-    depends_migrate = [ClusterPlugin.plugin_name]
+    spec = spec
 
     def __init__(self) -> None:
         super(SecretPlugin, self).__init__()
+        self._usage: Optional[SecretUsageIndex] = None
+
+    @property
+    def referenced_only(self) -> bool:
+        return referenced_only(self.config)
+
+    def usage(self, backupList: BackupList) -> SecretUsageIndex:
+        """returns the index of secrets used by the Marathon and Metronome backups in backupList"""
+        if self._usage is None:
+            self._usage = SecretUsageIndex.from_backups(backupList)
+        return self._usage
 
     def backup(  # type: ignore
             self, client: DCOSClient, **kwargs) -> BackupList:
         backupList = BackupList()
+        backupList.extend(self.backup_iter(client, **kwargs))
+
+        return backupList
+
+    def backup_iter(  # type: ignore
+            self, client: DCOSClient, **kwargs) -> Iterator[Backup]:
         sec = DCOSSecretsService(client)
         path = ""
 
         if self.config_oss:
             # OSS clusters do not have secrets; return empty secret list and do not attempt to fetch.
             keys = []
+        elif self.referenced_only:
+            # only fetch the secrets used by apps and jobs instead of listing all
+            usage = SecretUsageIndex.from_backups(kwargs.get('backupList') or BackupList())
+            logging.info("Fetching {} referenced secrets".format(len(usage)))
+            yield from self.backup_referenced(sec, usage.paths(), **kwargs)
+            return
         else:
             try:
                 keys = sec.list(path)
@@ -92,43 +115,75 @@ class SecretPlugin(MigratePlugin):
                       "Provide the flag --oss to disable fetching of secrets.\n\n")
                 raise e
 
+        completed = kwargs.get('completed', ())
         if keys:
             for key in keys:
+                name = Backup.renderBackupName(path + key)
+                if name in completed:
+                    continue
                 secData = sec.get(path, key)
 
-                backupList.append(Backup(self.plugin_name, Backup.renderBackupName(path + key), data=secData))
+                yield Backup(self.plugin_name, name, data=secData)
 
-        return backupList
+    def backup_referenced(self, sec: DCOSSecretsService, paths: Set[str], **kwargs: Any) -> Iterator[Backup]:
+        completed = kwargs.get('completed', ())
+        for path in sorted(paths):
+            name = Backup.renderBackupName(path)
+            if name in completed:
+                continue
+            try:
+                secData = sec.get('', path)
+            except DCOSHTTPException as e:
+                if e.response.status_code == 404:
+                    logging.warning("Referenced secret {} does not exist".format(path))
+                    continue
+                raise
+
+            yield Backup(self.plugin_name, name, data=secData)
 
     def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> ManifestList:
         ml = ManifestList()
 
+        self.migrate_start()
         for ba in backupList.backups(pluginName='secret'):
             assert isinstance(ba, Backup)
-            metadata = V1ObjectMeta()
-            metadata.annotations = {}
+            manifest = self.migrate_backup(ba, backupList, manifestList)
+            if manifest:
+                ml.append(manifest)
 
-            clusterMeta = manifestList.clusterMeta()
-            if clusterMeta:
-                metadata.annotations = clusterMeta.annotations
+        return ml
 
-            logging.debug("Found backup {}".format(ba))
-            b = ba.data
-            fullPath = "/".join(filter(None, [b["path"], b["key"]]))
-            name = b["key"]
+    def migrate_start(self) -> None:
+        self._usage = None
 
-            metadata.annotations[utils.namespace_path("secret-path")] = fullPath
-            metadata.name = utils.make_subdomain(name.split('/'))
-            sec = V1Secret(metadata=metadata)
-            sec.api_version = 'v1'
-            sec.kind = 'Secret'
-            # K8s requires secret values to be base64-encoded.  The secret value
-            # is base64-encoded during backup so it can be passed as-is here.
-            sec.data = {utils.dnsify(name): b['value']}
+    def migrate_backup(self, backup: Backup, backupList: BackupList, manifestList: ManifestList,
+                       **kwargs: Any) -> Optional[Manifest]:
+        metadata = V1ObjectMeta()
+        metadata.annotations = {}
 
-            manifest = Manifest(pluginName=self.plugin_name, manifestName=utils.dnsify(fullPath))
-            manifest.append(sec)
+        clusterMeta = manifestList.clusterMeta()
+        if clusterMeta:
+            metadata.annotations = clusterMeta.annotations
 
-            ml.append(manifest)
+        logging.debug("Found backup {}".format(backup))
+        b = backup.data
+        fullPath = "/".join(filter(None, [b["path"], b["key"]]))
+        name = b["key"]
 
-        return ml
+        if self.referenced_only and not self.usage(backupList).is_used(fullPath):
+            logging.debug("Skipping unused secret {}".format(fullPath))
+            return None
+
+        metadata.annotations[utils.namespace_path("secret-path")] = fullPath
+        metadata.name = utils.make_subdomain(name.split('/'))
+        sec = V1Secret(metadata=metadata)
+        sec.api_version = 'v1'
+        sec.kind = 'Secret'
+        # K8s requires secret values to be base64-encoded.  The secret value
+        # is base64-encoded during backup so it can be passed as-is here.
+        sec.data = {utils.dnsify(name): b['value']}
+
+        manifest = Manifest(pluginName=self.plugin_name, manifestName=utils.dnsify(fullPath))
+        manifest.append(sec)
+
+        return manifest
@@ -0,0 +1,54 @@
+from typing import cast, Dict, Iterable, Mapping, Set
+
+from dcos_migrate.system import Backup, BackupList
+
+
+def _sources(secrets: Mapping[str, Mapping[str, str]]) -> Iterable[str]:
+    for s in secrets.values():
+        if s.get('source'):
+            yield s['source']
+
+
+class SecretUsageIndex(object):
+    """
+    SecretUsageIndex maps DC/OS secret paths to the Marathon apps and Metronome
+    jobs referencing them. Users are named `marathon:<app id>` and `metronome:<job id>`.
+    """
+    def __init__(self) -> None:
+        super(SecretUsageIndex, self).__init__()
+        self._users: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        """secret sources may be given with or without a leading slash"""
+        return path.strip('/')
+
+    @classmethod
+    def from_backups(cls, backupList: BackupList) -> 'SecretUsageIndex':
+        index = cls()
+        for b in backupList.backups(pluginName='marathon'):
+            app = cast(Backup, b).data
+            for source in _sources(app.get('secrets') or {}):
+                index.add(source, "marathon:{}".format(app.get('id', b.name)))
+
+        for b in backupList.backups(pluginName='metronome'):
+            job = cast(Backup, b).data
+            for source in _sources(job.get('run', {}).get('secrets') or {}):
+                index.add(source, "metronome:{}".format(job.get('id', b.name)))
+
+        return index
+
+    def add(self, path: str, user: str) -> None:
+        self._users.setdefault(self.normalize(path), set()).add(user)
+
+    def users(self, path: str) -> Set[str]:
+        return self._users.get(self.normalize(path), set())
+
+    def is_used(self, path: str) -> bool:
+        return self.normalize(path) in self._users
+
+    def paths(self) -> Set[str]:
+        return set(self._users)
+
+    def __len__(self) -> int:
+        return len(self._users)
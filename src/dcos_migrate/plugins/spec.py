@@ -0,0 +1,146 @@
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from dcos_migrate.system import DCOSClient, Backup, BackupList, Manifest, ManifestList, Arg
+from .plugin import MigratePlugin
+
+
+class PluginSpec(MigratePlugin):
+    """
+    PluginSpec declares a plugin - its name, dependencies and config options -
+    without importing its implementation. Plugin packages declare it as `spec`
+    in their `__init__` so discovery and `--help` stay cheap:
+
+    spec = PluginSpec("secret", "dcos_migrate.plugins.secret.plugin:SecretPlugin", migrate_depends=["cluster"])
+
+    A PluginSpec stands in for the plugin. The implementation is imported and
+    instantiated on the first call of a plugin method or access of any attribute
+    the spec does not declare. Implementations refer back to it with
+    `spec = spec` and take their metadata from it.
+
+    config_backup_depends returns further backup_depends needed only with some
+    configs. They are added whenever the config is set.
+    """
+    def __init__(self,
+                 name: str,
+                 implementation: str,
+                 backup_depends: Iterable[str] = (),
+                 backup_data_depends: Iterable[str] = (),
+                 migrate_depends: Iterable[str] = (),
+                 migrate_data_depends: Iterable[str] = (),
+                 migrate_streaming: bool = False,
+                 config_options: Iterable[Arg] = (),
+                 config_backup_depends: Optional[Callable[[Dict[str, Any]], Iterable[str]]] = None):
+        super(PluginSpec, self).__init__()
+        self.plugin_name = name
+        self.backup_depends = list(backup_depends)
+        self._declared_backup_depends = list(backup_depends)
+        self._config_backup_depends = config_backup_depends
+        self.backup_data_depends = list(backup_data_depends)
+        self.migrate_depends = list(migrate_depends)
+        self.migrate_data_depends = list(migrate_data_depends)
+        self.migrate_streaming = migrate_streaming
+        self._config_options = list(config_options)
+        self._implementation = implementation
+        self._plugin: Optional[MigratePlugin] = None
+        self._lock = threading.Lock()
+
+    def copy(self) -> 'PluginSpec':
+        """returns a spec declaring the same plugin, with an implementation of its own"""
+        return PluginSpec(self.plugin_name,
+                          self._implementation,
+                          backup_depends=self._declared_backup_depends,
+                          backup_data_depends=self.backup_data_depends,
+                          migrate_depends=self.migrate_depends,
+                          migrate_data_depends=self.migrate_data_depends,
+                          migrate_streaming=self.migrate_streaming,
+                          config_options=self._config_options,
+                          config_backup_depends=self._config_backup_depends)
+
+    def __repr__(self) -> str:
+        return "PluginSpec({})".format(self.plugin_name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._plugin is not None
+
+    @property
+    def plugin(self) -> MigratePlugin:
+        """the plugin implementation. Imported and created on first access"""
+        if self._plugin is None:
+            with self._lock:
+                if self._plugin is None:
+                    module, _, name = self._implementation.partition(":")
+                    plugin = getattr(importlib.import_module(module), name)()
+                    plugin.config = self._config
+                    self._plugin = plugin
+        return self._plugin
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes the spec does not have itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.plugin, name)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._config
+
+    @config.setter
+    def config(self, config: Dict[str, Any]) -> None:
+        self._config = config
+        self._plugin_config = config.get(self.plugin_name)
+        if self._config_backup_depends is not None:
+            extra = [d for d in self._config_backup_depends(config) if d not in self._declared_backup_depends]
+            self.backup_depends = self._declared_backup_depends + extra
+        if self._plugin is not None:
+            self._plugin.config = config
+
+    def backup(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> BackupList:
+        return self.plugin.backup(client=client, backupList=backupList, **kwargs)
+
+    def backup_iter(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> Iterator[Backup]:
+        return self.plugin.backup_iter(client=client, backupList=backupList, **kwargs)
+
+    def backup_data(self, client: DCOSClient, backupList: BackupList, backupFolder: str, **kwargs: Any) -> None:
+        return self.plugin.backup_data(client=client, backupList=backupList, backupFolder=backupFolder, **kwargs)
+
+    def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> ManifestList:
+        return self.plugin.migrate(backupList=backupList, manifestList=manifestList, **kwargs)
+
+    def migrate_start(self) -> None:
+        self.plugin.migrate_start()
+
+    def migrate_backup(self, backup: Backup, backupList: BackupList, manifestList: ManifestList,
+                       **kwargs: Any) -> Optional[Manifest]:
+        return self.plugin.migrate_backup(backup, backupList=backupList, manifestList=manifestList, **kwargs)
+
+    def migrate_resume(self, backup: Backup, manifest: Optional[Manifest]) -> None:
+        self.plugin.migrate_resume(backup, manifest)
+
+    def migrate_finish(self) -> None:
+        self.plugin.migrate_finish()
+
+    def migrate_data(self, backupList: BackupList, manifestList: ManifestList, backupFolder: str, migrateFolder: str,
+                     **kwargs: Any) -> None:
+        return self.plugin.migrate_data(backupList=backupList,
+                                        manifestList=manifestList,
+                                        backupFolder=backupFolder,
+                                        migrateFolder=migrateFolder,
+                                        **kwargs)
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    returns a module __getattr__ importing the names in exports from the given
+    submodules of package on first access:
+
+    __getattr__ = lazy_exports(__name__, {"SecretPlugin": ".plugin"})
+    """
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError("module {} has no attribute {}".format(package, name))
+        return getattr(importlib.import_module(exports[name], package), name)
+
+    return __getattr__
@@ -1,6 +1,8 @@
-from .argparse import Arg, BoolArg, DictArg, ArgParse
+from .argparse import Arg, BoolArg, DictArg, ListArg, ArgParse
 from .backup_list import BackupList
 from .client import DCOSClient
+from .document import Document
+from .recording import RecordingClient, ReplayClient
 from .backup import Backup
 from .manifest_list import ManifestList
 from .manifest import Manifest, with_comment
@@ -11,9 +13,13 @@ __all__ = [
     'Arg',
     'BoolArg',
     'DictArg',
+    'ListArg',
     'ArgParse',
     'BackupList',
     'DCOSClient',
+    'Document',
+    'RecordingClient',
+    'ReplayClient',
     'Backup',
     'ManifestList',
     'Manifest',
@@ -129,6 +129,26 @@ class DictArg(Arg):
         return res
 
 
+class ListArg(Arg):
+    """
+    ListArg collects comma separated values. It can be given multiple times:
+    --plugins marathon,secret --plugins metronome
+    """
+    def __init__(self, name: str, **kwargs: Any):
+        super(ListArg, self).__init__(name, **kwargs)
+
+        self._action = 'append'
+        if not self._metavar:
+            self._metavar = "A,B"
+
+    def get_result(self, namespace: argparse.Namespace) -> Optional[List[str]]:
+        attr = getattr(namespace, self.attr_arg)
+        if not attr:
+            return None
+
+        return [v.strip() for a in attr for v in a.split(",") if v.strip()]
+
+
 class ArgParse(object):
     """docstring for ArgParse."""
     def __init__(self,
@@ -1,19 +1,34 @@
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
 
 class Backup(object):
-    """docstring for Backup."""
-    def __init__(self, pluginName: str, backupName: str, data: Dict[str, Any] = {}, extension: str = 'json'):
+    """
+    Backup holds the state of a single DC/OS object.
+
+    A Backup created from raw JSON - like the ones loaded from disk - keeps only
+    these bytes until data is accessed for the first time. It is parsed then and
+    the parsed data is kept instead. As long as data was never accessed, serialize
+    returns the raw bytes as they were, without parsing and encoding them again.
+    """
+
+    # 50k backups easily live in memory at once. Without a __dict__ each is a lot smaller.
+    __slots__ = ('_plugin_name', '_name', '_data', '_raw', '_extension')
+
+    def __init__(self,
+                 pluginName: str,
+                 backupName: str,
+                 data: Optional[Dict[str, Any]] = None,
+                 extension: str = 'json',
+                 raw: Optional[bytes] = None):
         super(Backup, self).__init__()
         self._plugin_name = pluginName
         if "/" in backupName:
             raise AttributeError("backupName {} contains not allowed '/'".format(backupName))
         self._name = backupName
-        self._data = data
+        self._raw = raw
+        self._data = data if data is not None or raw is not None else {}
         self._extension = extension
-        self._serializer = self.dump_pretty
-        self._deserializer = json.loads
 
     @staticmethod
     def renderBackupName(name: str) -> str:
@@ -36,12 +51,32 @@ class Backup(object):
     def extension(self) -> str:
         return self._extension
 
+    @property
+    def parsed(self) -> bool:
+        """returns if data was parsed from the raw bytes, or never had any"""
+        return self._data is not None
+
     @property
     def data(self) -> Dict[str, Any]:
-        return self._data
+        data = self._data
+        if data is None:
+            raw = self._raw
+            if raw is None:
+                # parsed by another thread meanwhile
+                return self._data  # type: ignore
+            data = json.loads(raw)
+            self._data = data
+            self._raw = None
+        return data
 
     def serialize(self) -> str:
-        return self._serializer(self._data)
+        raw = self._raw
+        if raw is not None:
+            return raw.decode('utf-8')
+        # data may have been changed since it was parsed
+        return self.dump_pretty(self.data)
 
-    def deserialize(self, data: str) -> None:
-        self._data = self._deserializer(data)
+    def deserialize(self, data: Union[str, bytes]) -> None:
+        """sets the raw JSON of this Backup. It is parsed on first access of data"""
+        self._raw = data.encode('utf-8') if isinstance(data, str) else data
+        self._data = None
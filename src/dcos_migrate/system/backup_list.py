@@ -13,6 +13,7 @@ class BackupList(StorableList):
     def backups(self, pluginName: str) -> 'BackupList':
         newList = BackupList()
 
+        self.load_pending(pluginName)
         for b in self:
             if b.plugin_name == pluginName:
                 newList.append(b)
@@ -29,6 +30,7 @@ class BackupList(StorableList):
         bl = BackupList()
         jsonpath_expr = parse(jsonPath)
 
+        self.load_pending()
         for b in self:
             # this is quite stupid but related to the Backup object structure
             # maybe there is a better way to make .data directly part of the list
@@ -39,6 +41,16 @@ class BackupList(StorableList):
 
         return bl
 
+    def load_file(self, f: str, pluginName: str, name: str, className: str, extension: str) -> None:
+        """loads a single stored Backup. It is only parsed once its data is accessed"""
+        with open(f, 'rb') as file:
+            raw = file.read()
+
+        if not raw:
+            return
+
+        self.append(Backup(pluginName=pluginName, backupName=name, extension=extension, raw=raw))
+
     def append_data(  # type: ignore
             self, pluginName: str, backupName: str, extension: str, data: str, **kwargs) -> None:
         b = Backup(pluginName=pluginName, backupName=backupName, extension=extension)
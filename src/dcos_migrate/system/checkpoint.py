@@ -0,0 +1,81 @@
+import os
+import shutil
+import logging
+from typing import Dict, Optional, TextIO
+
+
+class Checkpoint(object):
+    """
+    Checkpoint records which plugins and which of their items completed a phase,
+    so an interrupted run can be resumed where it stopped.
+
+    ./dcos-migrate/checkpoint/<phase>/<pluginName>.done   - the plugin completed the phase
+    ./dcos-migrate/checkpoint/<phase>/<pluginName>.items  - a line per completed item: <name>\t<output>
+    """
+    def __init__(self, path: str = './dcos-migrate/checkpoint', dry: bool = False):
+        super(Checkpoint, self).__init__()
+        self._path = path
+        self._dry = dry
+        self._files: Dict[str, TextIO] = {}
+
+    def _file(self, phase: str, pluginName: str, suffix: str) -> str:
+        return os.path.join(self._path, phase, "{}.{}".format(pluginName, suffix))
+
+    def reset(self, phase: str, pluginName: Optional[str] = None) -> None:
+        """forget everything recorded for phase or only for pluginName in phase"""
+        self.close()
+        if self._dry:
+            return
+
+        if pluginName is None:
+            shutil.rmtree(os.path.join(self._path, phase), ignore_errors=True)
+            return
+
+        for suffix in ['done', 'items']:
+            try:
+                os.remove(self._file(phase, pluginName, suffix))
+            except FileNotFoundError:
+                pass
+
+    def plugin_done(self, phase: str, pluginName: str) -> bool:
+        return os.path.exists(self._file(phase, pluginName, 'done'))
+
+    def mark_plugin(self, phase: str, pluginName: str) -> None:
+        self.close()
+        filepath = self._file(phase, pluginName, 'done')
+        logging.debug("checkpoint {}".format(filepath))
+        if not self._dry:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            open(filepath, 'w').close()
+
+    def items(self, phase: str, pluginName: str) -> Dict[str, str]:
+        """returns the completed items of pluginName in phase mapped to the name of their output"""
+        items = {}
+        filepath = self._file(phase, pluginName, 'items')
+        if os.path.exists(filepath):
+            with open(filepath, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    # ignore a line truncated by a crash while writing it
+                    if not line.endswith('\n'):
+                        continue
+                    name, _, output = line[:-1].partition('\t')
+                    items[name] = output
+        return items
+
+    def mark_item(self, phase: str, pluginName: str, name: str, output: Optional[str] = None) -> None:
+        """records that name was completed. output names the stored result, if any"""
+        if self._dry:
+            return
+
+        filepath = self._file(phase, pluginName, 'items')
+        f = self._files.get(filepath)
+        if f is None:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            f = self._files[filepath] = open(filepath, 'at', encoding='utf-8')
+        f.write("{}\t{}\n".format(name, output or ''))
+        f.flush()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
@@ -1,17 +1,56 @@
+import threading
 from dcos import http, config  # type: ignore
-from typing import cast, Any, Dict, Optional
+from dcos.errors import DCOSHTTPException, DCOSUnprocessableException  # type: ignore
+from typing import cast, Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse, ParseResult
 
+# chunk size used when streaming response bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class RequestStats(object):
+    """
+    RequestStats counts requests and received body bytes, in total and per
+    thread, so concurrently running plugins can be told apart.
+    """
+    def __init__(self) -> None:
+        super(RequestStats, self).__init__()
+        self._lock = threading.Lock()
+        self._total = [0, 0]
+        self._threads: Dict[int, List[int]] = {}
+
+    def add(self, requests: int = 0, received: int = 0) -> None:
+        with self._lock:
+            counters = self._threads.setdefault(threading.get_ident(), [0, 0])
+            for c in (self._total, counters):
+                c[0] += requests
+                c[1] += received
+
+    def snapshot(self, thread: bool = False) -> Tuple[int, int]:
+        """returns (requests, bytes) of all threads or of the calling thread only"""
+        with self._lock:
+            c = self._threads.get(threading.get_ident(), [0, 0]) if thread else self._total
+            return c[0], c[1]
+
+    def count(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """passes chunks through, counting their bytes"""
+        for chunk in chunks:
+            self.add(received=len(chunk))
+            yield chunk
+
 
 class DCOSClient(object):
     """docstring for DCOSClient."""
-    def __init__(self, toml_config: Optional[Any] = None):
+    def __init__(self, toml_config: Optional[Any] = None, dcos_url: Optional[str] = None):
         super(DCOSClient, self).__init__()
         self.toml_config = toml_config
-        if toml_config is None:
+        if toml_config is None and dcos_url is None:
             self.toml_config = config.get_config()
 
-        self._dcos_url = cast(ParseResult, urlparse(config.get_config_val("core.dcos_url", toml_config)))
+        if dcos_url is None:
+            dcos_url = config.get_config_val("core.dcos_url", toml_config)
+        self._dcos_url: ParseResult = urlparse(dcos_url)
+        self.stats = RequestStats()
 
     @property
     def dcos_url(self) -> str:
@@ -20,8 +59,18 @@ class DCOSClient(object):
     def full_dcos_url(self, url_path: str) -> str:
         return "{dcos}/{url}".format(dcos=self.dcos_url, url=url_path)
 
+    def account(self, response: http.requests.Response, stream: bool = False) -> http.requests.Response:
+        """counts a response in stats. The bytes of streamed bodies are counted as they are read"""
+        self.stats.add(requests=1, received=0 if stream else len(response.content))
+        return response
+
     def request(self, method: str, url: str, **kwargs: Any) -> http.requests.Response:
-        return http.request(method, url, toml_config=self.toml_config, **kwargs)
+        try:
+            response = http.request(method, url, toml_config=self.toml_config, **kwargs)
+        except (DCOSHTTPException, DCOSUnprocessableException) as e:
+            self.account(e.response)
+            raise
+        return self.account(response, stream=bool(kwargs.get('stream')))
 
     def head(self, url: str, **kwargs: Any) -> http.requests.Response:
         return self.request("head", url, **kwargs)
@@ -29,6 +78,14 @@ class DCOSClient(object):
     def get(self, url: str, **kwargs: Any) -> http.requests.Response:
         return self.request("get", url, **kwargs)
 
+    def get_stream(self, url: str, chunk_size: int = STREAM_CHUNK_SIZE, **kwargs: Any) -> Iterator[bytes]:
+        """
+        Sends a GET request and returns an iterator over the chunks of the response
+        body instead of loading the whole body into memory.
+        """
+        resp = self.get(url, stream=True, **kwargs)
+        return self.stats.count(cast(Iterator[bytes], resp.iter_content(chunk_size=chunk_size)))
+
     def post(self,
              url: str,
              data: Optional[Any] = None,
@@ -42,5 +99,9 @@ class DCOSClient(object):
     def patch(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> http.requests.Response:
         return self.request('patch', url, data=data, **kwargs)
 
+    def close(self) -> None:
+        """releases resources held by the client. Nothing to do for plain requests"""
+        pass
+
     def delete(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> http.requests.Response:
         return self.request('delete', url, **kwargs)
@@ -0,0 +1,109 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Document(object):
+    """
+    Document is a lightweight Kubernetes resource: the resource as plain dict,
+    as it is written to YAML, and the comment written above it.
+
+    kubernetes.client models carry a Configuration and property machinery per
+    object and take several times the memory of their YAML. Manifests hold
+    Documents just like models, plugins opt into creating them.
+
+    doc = Document({"apiVersion": "v1", "kind": "Service", "metadata": {"name": "foo"}})
+    """
+
+    __slots__ = ('body', 'comment')
+
+    def __init__(self, body: Dict[str, Any], comment: Iterable[str] = ()):
+        super(Document, self).__init__()
+        self.body = body
+        self.comment = list(comment)
+
+    def __repr__(self) -> str:
+        return "Document({}/{} {})".format(self.api_version, self.kind, self.name)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Document) and self.body == other.body
+
+    @property
+    def api_version(self) -> Optional[str]:
+        return self.body.get('apiVersion')
+
+    @property
+    def kind(self) -> Optional[str]:
+        return self.body.get('kind')
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.body.setdefault('metadata', {})  # type: ignore
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.metadata.get('name')
+
+    @property
+    def annotations(self) -> Dict[str, str]:
+        return self.metadata.get('annotations') or {}
+
+    # the interface of with_comment, so Documents and commented models are written the same way
+    def set_comment(self, comment: Iterable[str]) -> None:
+        self.comment = list(comment)
+
+    def get_comment(self) -> List[str]:
+        return self.comment
+
+    def to_dict(self) -> Dict[str, Any]:
+        """returns the body without empty values, the way models are serialized"""
+        return _without_none(self.body)  # type: ignore
+
+
+def _without_none(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: _without_none(v) for k, v in obj.items() if v is not None}
+    if isinstance(obj, list):
+        return [_without_none(v) for v in obj]
+    return obj
+
+
+# Manifests hold Documents, kubernetes.client models and plain dicts for kinds
+# without model. These read the fields common to all of them.
+
+
+def resource_api_version(r: Any) -> Optional[str]:
+    if isinstance(r, dict):
+        return r.get('apiVersion')
+    return r.api_version  # type: ignore
+
+
+def resource_kind(r: Any) -> Optional[str]:
+    if isinstance(r, dict):
+        return r.get('kind')
+    return r.kind  # type: ignore
+
+
+def resource_name(r: Any) -> Optional[str]:
+    if isinstance(r, Document):
+        return r.name
+    if isinstance(r, dict):
+        return (r.get('metadata') or {}).get('name')
+    return r.metadata.name if r.metadata else None
+
+
+def resource_annotations(r: Any) -> Dict[str, str]:
+    if isinstance(r, Document):
+        return r.annotations
+    if isinstance(r, dict):
+        return (r.get('metadata') or {}).get('annotations') or {}
+    return (r.metadata.annotations if r.metadata else None) or {}
+
+
+def resource_body(r: Any) -> Dict[str, Any]:
+    """returns r as the plain dict it is written as"""
+    if isinstance(r, Document):
+        return r.to_dict()
+    if isinstance(r, dict):
+        return r
+    from kubernetes.client import ApiClient  # type: ignore
+
+    return ApiClient().sanitize_for_serialization(r)  # type: ignore
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .client import RequestStats
+from .profiling import Profiler
+
+# number of slowest items shown per plugin in the summary
+SLOWEST_ITEMS = 5
+
+
+def peak_rss_kb() -> int:
+    """peak resident set size of this process in KiB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    if sys.platform == "darwin":
+        return int(rss // 1024)
+    return int(rss)
+
+
+class Measurement(object):
+    """
+    Measurement holds the resources a phase or a phase of a single plugin used.
+
+    cpu is the CPU time of the measuring thread for plugins and of the whole
+    process for phases. requests and received are the HTTP requests sent and body
+    bytes received by the same thread, or process. rss_delta_kb is how much the
+    process' peak RSS grew meanwhile.
+    """
+    def __init__(self, phase: str, plugin: Optional[str] = None):
+        super(Measurement, self).__init__()
+        self.phase = phase
+        self.plugin = plugin
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.requests = 0
+        self.received = 0
+        self.objects = 0
+        self.rss_delta_kb = 0
+        self.items: Optional[List[Tuple[str, float]]] = None
+
+    def item(self, name: str, seconds: float) -> None:
+        """records the time spent on a single item if items are recorded"""
+        if self.items is not None:
+            self.items.append((name, seconds))
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {
+            "phase": self.phase,
+            "plugin": self.plugin,
+            "wall_seconds": round(self.wall, 6),
+            "cpu_seconds": round(self.cpu, 6),
+            "requests": self.requests,
+            "received_bytes": self.received,
+            "objects": self.objects,
+            "rss_delta_kb": self.rss_delta_kb,
+        }
+        if self.items is not None:
+            d["items"] = [{"name": n, "seconds": round(s, 6)} for n, s in self.items]
+        return d
+
+
+class Instrumentation(object):
+    """
+    Instrumentation records a Measurement per phase and per phase of every plugin.
+
+    stats returns the RequestStats of the client in use, or None as long as no
+    client was created. With items, the time spent on every single item is
+    recorded, too. Plugins selected by profiler are profiled while measured.
+    """
+    def __init__(self, stats: Optional[Callable[[], Optional[RequestStats]]] = None, items: bool = False):
+        super(Instrumentation, self).__init__()
+        self._stats = stats or (lambda: None)
+        self.items = items
+        self.measurements: List[Measurement] = []
+        self.profiler: Optional[Profiler] = None
+        self._lock = threading.Lock()
+
+    def _requests(self, thread: bool) -> Tuple[int, int]:
+        stats = self._stats()
+        if stats is None:
+            return 0, 0
+        return stats.snapshot(thread=thread)
+
+    @contextmanager
+    def measure(self, phase: str, plugin: Optional[str] = None) -> Iterator[Measurement]:
+        """measures the enclosed block. Plugin measurements only account for the calling thread"""
+        m = Measurement(phase, plugin)
+        if self.items and plugin:
+            m.items = []
+        thread = plugin is not None
+        clock = time.thread_time if thread else time.process_time
+
+        with self._lock:
+            first = len(self.measurements)
+        requests, received = self._requests(thread)
+        rss = peak_rss_kb()
+        cpu = clock()
+        start = time.perf_counter()
+        try:
+            with self.profiler.profile(phase, plugin) if self.profiler and thread else nullcontext():
+                yield m
+        finally:
+            m.wall = time.perf_counter() - start
+            m.cpu = clock() - cpu
+            m.rss_delta_kb = peak_rss_kb() - rss
+            end_requests, end_received = self._requests(thread)
+            m.requests = end_requests - requests
+            m.received = end_received - received
+            with self._lock:
+                if not thread:
+                    # a phase produced what its plugins produced
+                    m.objects += sum(p.objects for p in self.measurements[first:] if p.phase == phase)
+                self.measurements.append(m)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "peak_rss_kb": peak_rss_kb(),
+            "measurements": [m.to_dict() for m in self.measurements],
+        }
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logging.info("Instrumentation written to {}".format(path))
+
+    def summary(self) -> str:
+        """renders all measurements as a table. Plugins are listed below the phase they ran in"""
+        header = "{:<14} {:<12} {:>10} {:>10} {:>9} {:>10} {:>9} {:>10}".format("phase", "plugin", "wall s", "cpu s",
+                                                                                "requests", "recv MiB", "objects",
+                                                                                "RSS +MiB")
+        lines = [header, "-" * len(header)]
+
+        phases: List[str] = []
+        for m in self.measurements:
+            if m.phase not in phases:
+                phases.append(m.phase)
+
+        for phase in phases:
+            ms = [m for m in self.measurements if m.phase == phase]
+            # the phase total first, then its plugins by the time they took
+            ms.sort(key=lambda m: (m.plugin is not None, -m.wall))
+            for m in ms:
+                lines.append("{:<14} {:<12} {:>10.3f} {:>10.3f} {:>9} {:>10.2f} {:>9} {:>10.1f}".format(
+                    m.phase if m.plugin is None else "", m.plugin or "total", m.wall, m.cpu, m.requests,
+                    m.received / (1024 * 1024), m.objects, m.rss_delta_kb / 1024))
+
+        slowest = [m for m in self.measurements if m.items]
+        for m in slowest:
+            lines.append("")
+            lines.append("slowest items of {} {}:".format(m.phase, m.plugin))
+            for name, seconds in sorted(m.items or [], key=lambda i: -i[1])[:SLOWEST_ITEMS]:
+                lines.append("  {:>10.3f}s {}".format(seconds, name))
+
+        return "\n".join(lines)
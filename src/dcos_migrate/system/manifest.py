@@ -2,11 +2,18 @@ import yaml
 import logging
 import inspect
 import itertools
+import weakref
 
-from typing import Any, Iterable, List, Optional, Type
+from typing import Any, Dict, Iterable, List, Optional, Type, TYPE_CHECKING
 
-from kubernetes.client import ApiClient  # type: ignore
-import kubernetes.client.models  # type: ignore
+from .document import Document
+from .resource_index import ResourceIndex, drops_index
+
+if TYPE_CHECKING:
+    from .manifest_list import ManifestIndex
+
+# kubernetes.client imports about a thousand model classes. It is imported on
+# first use so commands not touching manifests start quickly.
 
 
 def with_comment(object_cls: Type[object]) -> Type[object]:
@@ -51,23 +58,47 @@ def _extract_comment(obj: Any) -> str:
     return ''.join('# {}\n'.format(line) for line in lines_iter)
 
 
+@drops_index
 class Manifest(List[Any]):
-    """docstring for Manifest."""
-    def __init__(self, pluginName: str, manifestName: str = "", data: List[Any] = [], extension: str = 'yaml'):
+    """
+    Manifest holds the Kubernetes resources written into a single file. These are
+    kubernetes.client models or lightweight Documents. With documents, deserialize
+    creates Documents instead of models.
+
+    Lookups by name and annotation use an index built on first use and updated
+    on append. Call reindex after changing names or annotations of resources
+    already looked up. The ManifestIndexes of all ManifestLists holding this
+    Manifest follow the same changes.
+    """
+    def __init__(self,
+                 pluginName: str,
+                 manifestName: str = "",
+                 data: List[Any] = [],
+                 extension: str = 'yaml',
+                 documents: bool = False):
         super(Manifest, self).__init__(data)
         self._plugin_name = pluginName
         self._name = manifestName
         self._extension = extension
+        self.documents = documents
         self._serializer = self.dumps
         self._deserializer = yaml.safe_load_all
-
-        self.resources = []  # type: ignore
+        # resource positions by name and annotation
+        self._index: Optional[ResourceIndex[int]] = None
+        # indexes of ManifestLists holding this Manifest
+        self._list_indexes: 'weakref.WeakSet[ManifestIndex]' = weakref.WeakSet()
 
     def dumps(self, data: Any) -> str:
+        from kubernetes.client import ApiClient  # type: ignore
+
         docs = []
+        kc = None
         for d in self:
-            kc = ApiClient()
-            doc = kc.sanitize_for_serialization(d)
+            if isinstance(d, Document):
+                doc = d.to_dict()
+            else:
+                kc = kc or ApiClient()
+                doc = kc.sanitize_for_serialization(d)
             orderedDoc = {}
             # specify the key order: a,k,m,s/d
             for k in ['apiVersion', 'kind', 'metadata', 'type', 'spec', 'data', 'stringData']:
@@ -87,6 +118,8 @@ class Manifest(List[Any]):
     @name.setter
     def name(self, val: str) -> None:
         self._name = val
+        for list_index in list(self._list_indexes):
+            list_index.stale = True
 
     @property
     def plugin_name(self) -> str:
@@ -96,17 +129,59 @@ class Manifest(List[Any]):
     def extension(self) -> str:
         return self._extension
 
+    def append(self, resource: Any) -> None:
+        super(Manifest, self).append(resource)
+        if self._index is not None:
+            self._index.add(resource, len(self) - 1)
+        for list_index in list(self._list_indexes):
+            list_index.add_resource(self, resource)
+
+    def extend(self, resources: Iterable[Any]) -> None:
+        for r in resources:
+            self.append(r)
+
+    @property
+    def resource_index(self) -> ResourceIndex[int]:
+        if self._index is None:
+            index: ResourceIndex[int] = ResourceIndex()
+            for i, r in enumerate(self):
+                index.add(r, i)
+            self._index = index
+        return self._index
+
+    def _drop_index(self) -> None:
+        self._index = None
+        for list_index in list(self._list_indexes):
+            list_index.stale = True
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # copies are not held by the lists holding this Manifest
+        state = self.__dict__.copy()
+        del state['_list_indexes']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._list_indexes = weakref.WeakSet()
+
+    def watch(self, list_index: 'ManifestIndex') -> None:
+        """makes list_index follow the changes of this Manifest"""
+        self._list_indexes.add(list_index)
+
+    def reindex(self) -> None:
+        """drops the index, so it is built again from the current resources"""
+        self._drop_index()
+
     def resource_by_name(self, name: str, apiVersion: str, kind: str) -> Optional[Any]:
-        for r in self.resources:
-            if r.Name == name and r.apiVersion == apiVersion and r.kind == kind:
-                return r
-        return None
+        i = self.resource_idx_by_name(name=name, apiVersion=apiVersion, kind=kind)
+        if i is None:
+            return None
+        return self[i]
 
     def resource_idx_by_name(self, name: str, apiVersion: str, kind: str) -> Optional[int]:
-        for i in range(len(self.resources)):
-            r = self.resources[i]
-            if r.Name == name and r.apiVersion == apiVersion and r.kind == kind:
-                return i
+        found = self.resource_index.by_name(name=name, apiVersion=apiVersion, kind=kind)
+        if found:
+            return found[0]
         return None
 
     def serialize(self) -> str:
@@ -120,9 +195,15 @@ class Manifest(List[Any]):
                 logging.warning("serialized object is none of data: {}".format(data))
                 continue
 
+            if self.documents:
+                self.append(Document(ds))
+                continue
+
             if 'apiVersion' in ds and 'kind' in ds:
                 model = self.getModel(ds['kind'], ds['apiVersion'])
                 if model:
+                    from kubernetes.client import ApiClient
+
                     kc = ApiClient()
                     di = kc._ApiClient__deserialize(ds, model)
                     self.append(di)
@@ -139,27 +220,22 @@ class Manifest(List[Any]):
 
     @classmethod
     def getModel(self, kind: str, apiVersion: str) -> Optional[Any]:
-        for cls in inspect.getmembers(kubernetes.client.models, inspect.isclass):
-            if cls[0] == self.genModelName(apiVersion, kind):
-                return cls[1]
+        import kubernetes.client.models  # type: ignore
+
+        model = getattr(kubernetes.client.models, self.genModelName(apiVersion, kind), None)
+        if inspect.isclass(model):
+            return model
         return None
 
-    def findall_by_annotation(self, annotation: str, value: Optional[str] = None) -> Optional[List[str]]:
-        rs = []
-        for r in self.resources:
-            for a, v in r.metadata.annotations.items():
-                if a == annotation:
-                    if value is None:
-                        rs.append(r)
-                    else:
-                        if v == value:
-                            rs.append(r)
+    def findall_by_annotation(self, annotation: str, value: Optional[str] = None) -> Optional[List[Any]]:
+        """returns all resources having annotation, with value if given, or None"""
+        rs = [self[i] for i in self.resource_index.by_annotation(annotation, value)]
 
         if len(rs) > 0:
             return rs
         return None
 
-    def find_by_annotation(self, annotation: str, value: Optional[str] = None) -> Optional[str]:
+    def find_by_annotation(self, annotation: str, value: Optional[str] = None) -> Optional[Any]:
         r = self.findall_by_annotation(annotation=annotation, value=value)
         if r is None:
             return r
@@ -1,26 +1,128 @@
-from typing import cast, Optional
+from typing import cast, Any, Container, Dict, Iterable, List, Optional, Tuple, Union
+from .backup import Backup
 from .storable_list import StorableList
 from .manifest import Manifest
-from kubernetes.client.models import V1ObjectMeta  # type: ignore
+from .resource_index import ResourceIndex, drops_index
 import copy
+import threading
 
 
+class ManifestIndex(object):
+    """
+    indexes the Manifests of a ManifestList by plugin and name, and all their
+    resources. Resources appended to an indexed Manifest are added as well. Any
+    other change of an indexed Manifest marks the index stale.
+    """
+    def __init__(self) -> None:
+        super(ManifestIndex, self).__init__()
+        self.by_plugin: Dict[str, List[Manifest]] = {}
+        self.by_name: Dict[Tuple[str, str], Manifest] = {}
+        self.resources: ResourceIndex[Tuple[Manifest, Any]] = ResourceIndex()
+        self.stale = False
+        self._lock = threading.Lock()
+
+    def add(self, m: Manifest) -> None:
+        with self._lock:
+            self.by_plugin.setdefault(m.plugin_name, []).append(m)
+            self.by_name.setdefault((m.plugin_name, m.name), m)
+            m.watch(self)
+            for r in list(m):
+                self.resources.add(r, (m, r))
+
+    def add_resource(self, m: Manifest, resource: Any) -> None:
+        with self._lock:
+            self.resources.add(resource, (m, resource))
+
+
+@drops_index
 class ManifestList(StorableList):
-    """docstring for ManifestList."""
-    def __init__(self, dry: bool = False, path: str = './dcos-migrate/migrate'):
+    """
+    ManifestList holds the Manifests created by all plugins.
+
+    In streaming mode every Manifest passed to add is stored right away. Only
+    Manifests of resident plugins - the ones other plugins look up while
+    migrating, like cluster and secret - are kept in memory. Of all others only
+    their path is kept and they are loaded from disk again when
+    looked up with manifest or manifests.
+
+    Manifests are indexed by plugin and name, their resources by name and
+    annotation. The index is built on first use and updated on append, of
+    Manifests to this list and of resources to its Manifests.
+    """
+    def __init__(self,
+                 dry: bool = False,
+                 path: str = './dcos-migrate/migrate',
+                 streaming: bool = False,
+                 resident: Iterable[str] = ()):
         super(ManifestList, self).__init__(path)
         self._dry = dry
+        self.streaming = streaming
+        self.resident = set(resident)
+        # (pluginName, manifestName) -> file path of manifests not kept in memory
+        self._on_disk: Dict[Tuple[str, str], str] = {}
+        self._on_disk_lock = threading.Lock()
+        self._index: Optional[ManifestIndex] = None
+        self._lock = threading.RLock()
+
+    def append(self, m: Union[Backup, Manifest]) -> None:
+        with self._lock:
+            super(ManifestList, self).append(m)
+            if self._index is not None:
+                self._index.add(cast(Manifest, m))
+
+    def extend(self, ms: Iterable[Union[Backup, Manifest]]) -> None:
+        for m in ms:
+            self.append(m)
+
+    @property
+    def manifest_index(self) -> ManifestIndex:
+        with self._lock:
+            if self._index is None or self._index.stale:
+                index = ManifestIndex()
+                for m in self:
+                    index.add(cast(Manifest, m))
+                self._index = index
+            return self._index
+
+    def is_resident(self, pluginName: str) -> bool:
+        """returns if manifests of pluginName are kept in memory"""
+        return not self.streaming or self._dry or pluginName in self.resident
+
+    def add(self, m: Manifest) -> str:
+        """appends and stores m. Returns the path it was stored at"""
+        filepath, _ = self.store_item(m)
+        if self.is_resident(m.plugin_name):
+            self.append(m)
+        else:
+            with self._on_disk_lock:
+                self._on_disk[(m.plugin_name, m.name)] = filepath
+        return filepath
+
+    def on_disk(self, pluginName: Optional[str] = None) -> List[str]:
+        """returns the names of the manifests of pluginName only kept on disk"""
+        with self._on_disk_lock:
+            return [n for p, n in self._on_disk if pluginName is None or p == pluginName]
+
+    def _load_on_disk(self, pluginName: str, manifestName: str) -> Optional[Manifest]:
+        with self._on_disk_lock:
+            filepath = self._on_disk.get((pluginName, manifestName))
+        if filepath is None:
+            return None
+
+        ml = ManifestList()
+        ml.load_file(filepath, pluginName, manifestName, "Manifest", filepath.rsplit('.', 1)[-1])
+        return cast(Manifest, ml[0]) if ml else None
 
     def manifest(self, pluginName: str, manifestName: str) -> Optional[Manifest]:
-        ml = self.manifests(pluginName=pluginName)
-        for m in ml:
-            assert isinstance(m, Manifest)
-            if m.name == manifestName:
-                return m
+        self.load_pending(pluginName)
+        m = self.manifest_index.by_name.get((pluginName, manifestName))
+        if m is not None:
+            return m
 
-        return None
+        return self._load_on_disk(pluginName, manifestName)
 
-    def clusterMeta(self) -> Optional[V1ObjectMeta]:
+    def clusterMeta(self) -> Optional[Any]:
+        """returns a copy of the V1ObjectMeta of the cluster ConfigMap"""
         clustermanifests = self.manifests('cluster')
         # cluster creates a single manifest with a single Configmap
         if clustermanifests and clustermanifests[0] and cast(Manifest, clustermanifests[0])[0]:
@@ -29,14 +131,57 @@ class ManifestList(StorableList):
 
         return None
 
-    def manifests(self, pluginName: str) -> 'ManifestList':
+    def manifests(self, pluginName: str, on_disk: bool = True) -> 'ManifestList':
+        """
+        returns the manifests of pluginName. Unless on_disk is False this includes
+        the ones not kept in memory, which are loaded from disk.
+        """
         ml = ManifestList()
-        for m in self:
-            if m and m.plugin_name == pluginName:
-                ml.append(m)
+        self.load_pending(pluginName)
+        ml.extend(self.manifest_index.by_plugin.get(pluginName, []))
+
+        if on_disk:
+            for name in self.on_disk(pluginName):
+                stored = self._load_on_disk(pluginName, name)
+                if stored is not None:
+                    ml.append(stored)
 
         return ml
 
+    def resources_by_name(self, name: str, apiVersion: str, kind: str) -> List[Tuple[Manifest, Any]]:
+        """
+        returns all resources with name, apiVersion and kind together with their
+        Manifest. Only covers manifests kept in memory.
+        """
+        self.load_pending()
+        return list(self.manifest_index.resources.by_name(name=name, apiVersion=apiVersion, kind=kind))
+
+    def resources_by_annotation(self, annotation: str, value: Optional[str] = None) -> List[Tuple[Manifest, Any]]:
+        """
+        returns all resources having annotation, with value if given, together with
+        their Manifest. Like the ones migrated from a cluster:
+
+        ml.resources_by_annotation(utils.namespace_path("cluster-id"), clusterID)
+
+        Only covers manifests kept in memory.
+        """
+        self.load_pending()
+        return list(self.manifest_index.resources.by_annotation(annotation, value))
+
+    def load(self, pluginName: Optional[str] = None, names: Optional[Container[str]] = None) -> 'ManifestList':
+        """
+        loads all stored manifests or only those of pluginName. In streaming mode
+        manifests of plugins not resident are only registered with their path.
+        """
+        for f, plugin, name, className, extension in self.stored_files(pluginName, names):
+            if self.is_resident(plugin):
+                self.load_file(f, plugin, name, className, extension)
+            else:
+                with self._on_disk_lock:
+                    self._on_disk[(plugin, name)] = f
+
+        return self
+
     def append_data(  # type: ignore
             self, pluginName: str, backupName: str, extension: str, data: str, **kw) -> None:
         b = Manifest(pluginName=pluginName, manifestName=backupName, extension=extension)
@@ -0,0 +1,75 @@
+import cProfile
+import logging
+import os
+import pstats
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class Profiler(object):
+    """
+    Profiler runs selected plugins under cProfile. targets are phases (migrate),
+    plugins (marathon), a plugin in a phase (migrate:marathon) or all.
+
+    Every profiled plugin run is written to <directory>/<phase>-<plugin>.prof
+    together with a report of the top functions by cumulative time in a .txt
+    file next to it. If a whole phase was selected, finish merges the profiles
+    of its plugins into <phase>.prof and <phase>.txt.
+
+    cProfile only sees the thread it was enabled in, so plugins running in
+    their own threads are profiled separately. A plugin is not profiled again
+    while its thread is already being profiled.
+    """
+    def __init__(self, targets: Iterable[str], directory: str = './dcos-migrate/profile', top: int = 30):
+        super(Profiler, self).__init__()
+        self.targets = set(targets)
+        self.directory = directory
+        self.top = top
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: Dict[str, List[str]] = {}
+
+    def selected(self, phase: str, plugin: Optional[str] = None) -> bool:
+        return bool(self.targets & {"all", phase, plugin, "{}:{}".format(phase, plugin)})
+
+    @contextmanager
+    def profile(self, phase: str, plugin: Optional[str] = None) -> Iterator[None]:
+        """profiles the enclosed block if phase or plugin were selected"""
+        if not self.selected(phase, plugin) or getattr(self._local, 'active', False):
+            yield
+            return
+
+        prof = cProfile.Profile()
+        self._local.active = True
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            self._local.active = False
+            path = self._write("-".join(filter(None, [phase, plugin])), pstats.Stats(prof))
+            with self._lock:
+                self._profiles.setdefault(phase, []).append(path)
+
+    def _write(self, name: str, stats: pstats.Stats) -> str:
+        """writes stats as name.prof and its report as name.txt. Returns the path of the .prof file"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name + ".prof")
+        stats.dump_stats(path)
+        with open(os.path.join(self.directory, name + ".txt"), "w") as f:
+            stats.stream = f  # type: ignore
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        logging.info("profile of {} written to {}".format(name, path))
+        return path
+
+    def finish(self) -> List[str]:
+        """merges the plugin profiles of selected phases. Returns the paths of all profiles"""
+        with self._lock:
+            profiles = {phase: list(paths) for phase, paths in self._profiles.items()}
+
+        written = [p for paths in profiles.values() for p in paths]
+        for phase, paths in profiles.items():
+            if self.targets & {"all", phase}:
+                written.append(self._write(phase, pstats.Stats(*paths)))
+        return written
@@ -0,0 +1,217 @@
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import cast, Any, Dict, IO, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from dcos import http  # type: ignore
+from dcos.errors import (  # type: ignore
+    DCOSException, DCOSHTTPException, DCOSUnprocessableException, DCOSAuthenticationException,
+    DCOSAuthorizationException, DCOSBadRequest)
+
+from .client import DCOSClient
+
+# bump when the cassette format changes incompatibly
+CASSETTE_VERSION = 1
+# bodies are stored decoded, so headers describing the transfer do not apply on replay
+_TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+# request headers carrying credentials, which are not written into cassettes
+_SECRET_HEADERS = {'authorization', 'cookie', 'proxy-authorization'}
+_REDACTED = "<redacted>"
+
+
+def _body_bytes(body: Union[bytes, str, None]) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return body
+
+
+def _request_key(method: str, url: str, body: Union[bytes, str, None] = None) -> Tuple[str, str, bytes]:
+    """
+    requests are matched by method, path, query and body so a cassette can be
+    replayed against any dcos_url
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    if parts.query:
+        path += "?" + parts.query
+    return method.upper(), path, _body_bytes(body)
+
+
+def _put_body(entry: Dict[str, Any], key: str, body: bytes) -> None:
+    """stores body as entry[key], or base64 encoded as entry[key + "_b64"] unless it is valid UTF-8"""
+    try:
+        entry[key] = body.decode('utf-8')
+    except UnicodeDecodeError:
+        entry[key + "_b64"] = base64.b64encode(body).decode('ascii')
+
+
+def _get_body(entry: Dict[str, Any], key: str) -> bytes:
+    if key + "_b64" in entry:
+        return base64.b64decode(entry[key + "_b64"])
+    return cast(str, entry.get(key, "")).encode('utf-8')
+
+
+def raise_for_dcos_status(response: requests.Response) -> None:
+    """raises the same exceptions for a status code as `dcos.http.request`"""
+    status = response.status_code
+    if 200 <= status < 300:
+        return
+    if status == 401:
+        raise DCOSAuthenticationException(response)
+    if status == 422:
+        raise DCOSUnprocessableException(response)
+    if status == 403:
+        raise DCOSAuthorizationException(response)
+    if status == 400:
+        raise DCOSBadRequest(response)
+    raise DCOSHTTPException(response)
+
+
+class RecordingClient(DCOSClient):
+    """
+    RecordingClient sends requests like DCOSClient and writes every request and
+    response into a cassette file which ReplayClient can serve later.
+
+    A cassette is a gzip compressed file with a JSON document per line. The first
+    line describes the cassette, every following line one exchange:
+    {"method": "POST", "url": "...", "request_headers": {...}, "request_body": "...",
+     "status": 200, "headers": {...}, "body": "..."}
+    Bodies which are not valid UTF-8 are stored base64 encoded as "request_body_b64"
+    and "body_b64". Credentials in request headers are redacted.
+
+    Streamed responses are read completely before they are returned.
+    """
+    def __init__(self, cassette: str, toml_config: Optional[Any] = None, dcos_url: Optional[str] = None):
+        super(RecordingClient, self).__init__(toml_config=toml_config, dcos_url=dcos_url)
+        self._lock = threading.Lock()
+        self._file: IO[str] = gzip.open(cassette, 'wt', encoding='utf-8')
+        self._write({"version": CASSETTE_VERSION, "dcos_url": self.dcos_url})
+        self._count = 0
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def _record(self, method: str, url: str, response: requests.Response) -> None:
+        # the request as it was sent, with the headers and body encoding added by requests
+        sent = response.request
+        entry: Dict[str, Any] = {
+            "method": method.upper(),
+            "url": url,
+            "request_headers": {
+                k: _REDACTED if k.lower() in _SECRET_HEADERS else v
+                for k, v in (sent.headers.items() if sent is not None else [])
+            },
+        }
+        if sent is not None and sent.body:
+            _put_body(entry, "request_body", _body_bytes(sent.body))
+        entry["status"] = response.status_code
+        entry["headers"] = {k: v for k, v in response.headers.items() if k.lower() not in _TRANSFER_HEADERS}
+        _put_body(entry, "body", response.content)
+
+        self._write(entry)
+        self._count += 1
+
+    def request(self, method: str, url: str, **kwargs: Any) -> http.requests.Response:
+        try:
+            response = super(RecordingClient, self).request(method, url, **kwargs)
+        except (DCOSHTTPException, DCOSUnprocessableException) as e:
+            self._record(method, url, e.response)
+            raise
+
+        self._record(method, url, response)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                logging.info("Recorded {} responses".format(self._count))
+
+
+class _ReplayResponse(requests.Response):
+    """a response whose body is served at a limited bandwidth"""
+    bandwidth: Optional[float] = None
+
+    def iter_content(self, chunk_size: Optional[int] = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+        for chunk in super(_ReplayResponse, self).iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode):
+            if self.bandwidth:
+                time.sleep(len(chunk) / self.bandwidth)
+            yield chunk
+
+
+class ReplayClient(DCOSClient):
+    """
+    ReplayClient serves the responses of a cassette written by RecordingClient
+    without any network access.
+
+    Requests are matched by method, path, query and body. Repeated requests get the
+    recorded responses in order, the last one is served for every further
+    request. latency (seconds) is added to every request and bodies are
+    delivered at bandwidth (bytes per second) if given.
+    """
+    def __init__(self, cassette: str, latency: float = 0.0, bandwidth: Optional[float] = None):
+        self._responses: Dict[Tuple[str, str, bytes], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+        dcos_url = ""
+        with gzip.open(cassette, 'rt', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                entry = json.loads(line)
+                if i == 0:
+                    if entry.get("version") != CASSETTE_VERSION:
+                        raise ValueError("Unsupported cassette version {} in {}".format(
+                            entry.get("version"), cassette))
+                    dcos_url = entry["dcos_url"]
+                    continue
+                key = _request_key(entry["method"], entry["url"], _get_body(entry, "request_body"))
+                self._responses.setdefault(key, []).append(entry)
+
+        super(ReplayClient, self).__init__(toml_config={}, dcos_url=dcos_url)
+
+    def _next(self, method: str, url: str, body: Union[bytes, str, None]) -> Dict[str, Any]:
+        key = _request_key(method, url, body)
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                raise DCOSException("No recorded response for {} {}{}".format(
+                    key[0], key[1], " with the given body" if key[2] else ""))
+            if len(entries) > 1:
+                return entries.pop(0)
+            return entries[0]
+
+    def request(self, method: str, url: str, **kwargs: Any) -> http.requests.Response:
+        # encoded like requests encoded it when it was recorded
+        sent = requests.Request(method.upper(), url, data=kwargs.get('data'), json=kwargs.get('json')).prepare()
+        entry = self._next(method, url, sent.body)
+        body = _get_body(entry, "body")
+
+        response = _ReplayResponse()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = body
+        response._content_consumed = True  # type: ignore
+
+        if self.latency:
+            time.sleep(self.latency)
+        if kwargs.get('stream'):
+            response.bandwidth = self.bandwidth
+        elif self.bandwidth:
+            time.sleep(len(body) / self.bandwidth)
+
+        self.account(response, stream=bool(kwargs.get('stream')) and 200 <= response.status_code < 300)
+        raise_for_dcos_status(response)
+        return response
@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+from .document import resource_annotations, resource_api_version, resource_kind, resource_name
+
+T = TypeVar('T')
+L = TypeVar('L', bound=list)  # type: ignore
+
+# (apiVersion, kind, name)
+ResourceKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class ResourceIndex(Generic[T]):
+    """
+    ResourceIndex maps the (apiVersion, kind, name) and the annotations of
+    resources to entries - whatever the owner of the index needs to find them.
+    Entries are returned in the order they were added.
+    """
+    def __init__(self) -> None:
+        super(ResourceIndex, self).__init__()
+        self._by_name: Dict[ResourceKey, List[T]] = {}
+        # annotation -> entries having it, and annotation -> value -> entries
+        self._by_annotation: Dict[str, List[T]] = {}
+        self._by_annotation_value: Dict[str, Dict[str, List[T]]] = {}
+
+    def add(self, resource: Any, entry: T) -> None:
+        key = (resource_api_version(resource), resource_kind(resource), resource_name(resource))
+        self._by_name.setdefault(key, []).append(entry)
+        for annotation, value in resource_annotations(resource).items():
+            self._by_annotation.setdefault(annotation, []).append(entry)
+            self._by_annotation_value.setdefault(annotation, {}).setdefault(value, []).append(entry)
+
+    def by_name(self, name: str, apiVersion: str, kind: str) -> List[T]:
+        return self._by_name.get((apiVersion, kind, name), [])
+
+    def by_annotation(self, annotation: str, value: Optional[str] = None) -> List[T]:
+        if value is None:
+            return self._by_annotation.get(annotation, [])
+        return self._by_annotation_value.get(annotation, {}).get(value, [])
+
+
+# list methods changing a list other than by append and extend
+_MUTATORS = ('__setitem__', '__delitem__', '__iadd__', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse')
+
+
+def drops_index(cls: Type[L]) -> Type[L]:
+    """
+    class decorator for list subclasses keeping an index in `_index`. Every
+    change of the list but append and extend, which have to update the index
+    themselves, drops it to be built again on next use. Classes needing to do
+    more when their index is dropped define `_drop_index`.
+    """
+    def mutator(name: str) -> Callable[..., Any]:
+        method = getattr(list, name)
+
+        def drop(self: Any, *args: Any, **kwargs: Any) -> Any:
+            self._drop_index()
+            return method(self, *args, **kwargs)
+
+        drop.__name__ = name
+        return drop
+
+    def _drop_index(self: Any) -> None:
+        self._index = None
+
+    for name in _MUTATORS:
+        setattr(cls, name, mutator(name))
+    if '_drop_index' not in cls.__dict__:
+        setattr(cls, '_drop_index', _drop_index)
+    return cls
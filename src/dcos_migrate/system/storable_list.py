@@ -1,6 +1,7 @@
 import os
 import glob
-from typing import Any, Dict, List, Optional, Union
+import threading
+from typing import Any, Container, Dict, Iterator, List, Optional, Set, Tuple, Union
 from .backup import Backup
 from .manifest import Manifest
 import logging
@@ -18,32 +19,56 @@ class StorableList(List[Union[Backup, Manifest]]):
     def __init__(self, path: str, dry: bool = False):
         self._dry = dry
         self._path = path
+        self._lazy: Set[str] = set()
+        self._lazy_lock = threading.Lock()
+
+    def load_lazy(self, pluginName: str) -> None:
+        """registers the stored items of pluginName to be loaded on first access"""
+        self._lazy.add(pluginName)
+
+    def load_pending(self, pluginName: Optional[str] = None) -> None:
+        """loads items registered with load_lazy. All of them or only the ones of pluginName"""
+        if not self._lazy:
+            return
+
+        with self._lazy_lock:
+            pending = [n for n in self._lazy if pluginName is None or n == pluginName]
+            for name in pending:
+                self._lazy.discard(name)
+                logging.debug("loading {} of plugin {} from disk".format(self.__class__.__name__, name))
+                self.load(pluginName=name)
 
     def store(self, pluginName: Optional[str] = None, backupName: Optional[str] = None) -> Dict[str, str]:
         # ./data/backup/<pluginName>/<backupName>.<class>.<extension>
         out = {}
         for b in self:
-            assert hasattr(b, 'plugin_name'), self
-            pname = b.plugin_name
-            bname = b.name
-            fextension = ".{cls}.{ext}".format(cls=b.__class__.__name__, ext=b.extension)
+            filepath, data = self.store_item(b)
+            out[filepath] = data
 
-            path = os.path.join(self._path, pname)
-            filepath = os.path.join(path, bname + fextension)
+        return out
 
-            data = b.serialize()
+    def item_path(self, b: Union[Backup, Manifest]) -> str:
+        """returns the file path b is stored at"""
+        assert hasattr(b, 'plugin_name'), self
+        fextension = ".{cls}.{ext}".format(cls=b.__class__.__name__, ext=b.extension)
+        return os.path.join(self._path, b.plugin_name, b.name + fextension)
 
-            logging.debug("writing file {}".format(filepath))
-            if not self._dry:
-                os.makedirs(path, exist_ok=True)
+    def store_item(self, b: Union[Backup, Manifest]) -> Tuple[str, str]:
+        """writes a single item to disk. Returns its file path and serialized data"""
+        filepath = self.item_path(b)
+        path = os.path.dirname(filepath)
 
-                with open(filepath, 'wt', encoding='utf-8') as f:
-                    f.write(data)
-                    f.close()
+        data = b.serialize()
 
-            out[filepath] = data
+        logging.debug("writing file {}".format(filepath))
+        if not self._dry:
+            os.makedirs(path, exist_ok=True)
 
-        return out
+            with open(filepath, 'wt', encoding='utf-8') as f:
+                f.write(data)
+                f.close()
+
+        return filepath, data
 
     def append_data(self, pluginName: str, backupName: str, extension: str, className: str, data: str,
                     **kwargs: Any) -> None:
@@ -60,9 +85,16 @@ class StorableList(List[Union[Backup, Manifest]]):
         assert hasattr(d, 'plugin_name'), d
         self.append(d)
 
-    def load(self) -> 'StorableList':
+    def stored_files(self,
+                     pluginName: Optional[str] = None,
+                     names: Optional[Container[str]] = None) -> Iterator[Tuple[str, str, str, str, str]]:
+        """
+        yields file path, plugin name, item name, class name and extension of all
+        stored items or only those of pluginName. If names is given only items
+        with these names are yielded.
+        """
         # ./data/backup/<pluginName>/<backupName>.<class>.<extension>
-        globstr = "{path}/*/*".format(path=self._path)
+        globstr = "{path}/{plugin}/*".format(path=self._path, plugin=glob.escape(pluginName) if pluginName else '*')
         for f in glob.glob(globstr):
             fname = removeprefix(removeprefix(f, self._path), '')
             # <pluginName>/<backupName>
@@ -70,28 +102,35 @@ class StorableList(List[Union[Backup, Manifest]]):
             if not len(pluginFile) == 2:
                 raise ValueError("Unexpected file/path: {} in {}".format(f, pluginFile))
 
-            pluginName = pluginFile[0]
             fileName = pluginFile[1].split('.')
             if not len(fileName) >= 3:
                 raise ValueError("Unexpected file name: {} in {}".format(f, fileName))
 
             name = ".".join(fileName[:-2])
-            className = fileName[-2]
-            extension = fileName[-1]
+            if names is not None and name not in names:
+                continue
 
-            data = ""
-            with open(f, 'rt') as file:
-                data = file.read()
-                file.close()
+            yield f, pluginFile[0], name, fileName[-2], fileName[-1]
 
-            if not data:
-                continue
+    def load_file(self, f: str, pluginName: str, name: str, className: str, extension: str) -> None:
+        """loads a single stored item"""
+        data = ""
+        with open(f, 'rt') as file:
+            data = file.read()
+            file.close()
+
+        if not data:
+            return
+
+        # let classes implement the load method
+        self.append_data(pluginName=pluginName, backupName=name, extension=extension, data=data, className=className)
 
-            # let classes implement the load method
-            self.append_data(pluginName=pluginName,
-                             backupName=name,
-                             extension=extension,
-                             data=data,
-                             className=className)
+    def load(self, pluginName: Optional[str] = None, names: Optional[Container[str]] = None) -> 'StorableList':
+        """
+        loads all stored items or only those of pluginName. If names is given only
+        items with these names are loaded.
+        """
+        for f, plugin, name, className, extension in self.stored_files(pluginName, names):
+            self.load_file(f, plugin, name, className, extension)
 
         return self
@@ -1,3 +1,10 @@
 from .naming import make_label, make_subdomain, dnsify, namespace_path
+from .json_stream import JSONStream, iter_json_items, load_json
+from .id_filter import IDFilter, normalize_id
+from .fetch_cache import FetchCache
+from .prebake import Prebaker, container_images
 
-__all__ = ['make_label', 'make_subdomain', 'dnsify', 'namespace_path']
+__all__ = [
+    'make_label', 'make_subdomain', 'dnsify', 'namespace_path', 'JSONStream', 'iter_json_items', 'load_json',
+    'IDFilter', 'normalize_id', 'FetchCache', 'Prebaker', 'container_images'
+]
@@ -0,0 +1,89 @@
+import argparse
+from typing import Any, Dict, NamedTuple, Sequence
+
+# The init container of a cached fetch needs curl for conditional requests
+FETCH_CACHE_IMAGE = "curlimages/curl:7.78.0"
+# curlimages/curl runs as uid 100 by default, which cannot write to a root owned hostPath or volume
+FETCH_CACHE_SECURITY_CONTEXT = {"runAsUser": 0}
+FETCH_CACHE_VOLUME = "fetch-cache"
+FETCH_CACHE_MOUNT_PATH = "/fetch_cache"
+FETCH_CACHE_KINDS = ("hostPath", "pvc")
+
+# cached_fetch URI FILE copies URI to FILE through the cache. Every URI has a
+# directory named by the SHA-256 of the URI holding the artifact and its ETag.
+# It is downloaded again only if the server has a newer one, judged by
+# If-None-Match and If-Modified-Since. Pods fetching the same URI at the same
+# time wait for each other instead of downloading it concurrently.
+CACHED_FETCH_FUNCTION = '''cached_fetch() {
+  uri="$1"
+  file="$2"
+  dir="''' + FETCH_CACHE_MOUNT_PATH + '''/$(printf '%s' "$uri" | sha256sum | cut -d' ' -f1)"
+  mkdir -p "$dir"
+  (
+    flock 9
+    set --
+    if [ -f "$dir/data" ]; then
+      set -- -z "$dir/data"
+      if [ -s "$dir/etag" ]; then set -- "$@" --etag-compare "$dir/etag"; fi
+    fi
+    code=$(curl -sSLR -o "$dir/data.part" -w '%{http_code}' --etag-save "$dir/etag.part" "$@" "$uri") || exit 1
+    case "$code" in
+      200)
+        mv "$dir/data.part" "$dir/data" || exit 1
+        if [ -f "$dir/etag.part" ]; then mv "$dir/etag.part" "$dir/etag"; else rm -f "$dir/etag"; fi ;;
+      304) rm -f "$dir/data.part" "$dir/etag.part" ;;
+      *) echo "fetching $uri failed with HTTP $code" >&2; exit 1 ;;
+    esac
+  ) 9>"$dir/lock" || return 1
+  cp "$dir/data" "$file"
+}'''
+
+
+class FetchCache(NamedTuple):
+    """
+    FetchCache is the volume artifacts fetched with cache=true are shared in:
+    a hostPath on every node or a ReadWriteMany PersistentVolumeClaim.
+    """
+    kind: str
+    source: str
+
+    @classmethod
+    def parse(cls, spec: str) -> 'FetchCache':
+        """
+        >>> FetchCache.parse("hostPath:/var/cache/dcos-fetch")
+        FetchCache(kind='hostPath', source='/var/cache/dcos-fetch')
+        """
+        kind, sep, source = spec.partition(":")
+        if not sep or kind not in FETCH_CACHE_KINDS or not source:
+            raise argparse.ArgumentTypeError("expected hostPath:PATH or pvc:CLAIM_NAME, got {}".format(spec))
+        return cls(kind, source)
+
+    def volume(self) -> Dict[str, Any]:
+        if self.kind == "hostPath":
+            return {"name": FETCH_CACHE_VOLUME, "hostPath": {"path": self.source, "type": "DirectoryOrCreate"}}
+        return {"name": FETCH_CACHE_VOLUME, "persistentVolumeClaim": {"claimName": self.source}}
+
+    @staticmethod
+    def volume_mount() -> Dict[str, Any]:
+        return {"name": FETCH_CACHE_VOLUME, "mountPath": FETCH_CACHE_MOUNT_PATH}
+
+    @staticmethod
+    def security_context() -> Dict[str, Any]:
+        """the securityContext of the init container writing to the cache"""
+        return dict(FETCH_CACHE_SECURITY_CONTEXT)
+
+
+def is_cacheable(uri: str) -> bool:
+    """only HTTP(S) artifacts can be checked for changes"""
+    return uri.startswith("http://") or uri.startswith("https://")
+
+
+def cached_fetch_script(fetch_commands: Sequence[str]) -> str:
+    """
+    returns a POSIX shell script running fetch_commands in parallel with
+    cached_fetch available to them, failing if any of them fails
+    """
+    lines = ["set -x", "set -e", CACHED_FETCH_FUNCTION, 'FETCH_PIDS=""']
+    lines += [command + ' & FETCH_PIDS="$FETCH_PIDS $!"' for command in fetch_commands]
+    lines.append("for pid in $FETCH_PIDS; do wait $pid || exit $?; done")
+    return "\n".join(lines)
@@ -0,0 +1,126 @@
+import re
+from typing import Iterable, List, Pattern
+
+_REGEX_PREFIX = 're:'
+_GLOB_CHARS = '*?['
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    translates a glob on slash separated IDs into a regular expression.
+    `*`, `?` and character classes like `[ab]` or `[!a-c]` do not match `/`,
+    `**` matches across segments. A `[` without closing `]` is literal.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            # like fnmatch, a `]` right after `[` or `[!` is part of the class
+            j = i + 1
+            if pattern.startswith('!', j):
+                j += 1
+            if pattern.startswith(']', j):
+                j += 1
+            end = pattern.find(']', j)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                chars = pattern[i + 1:end]
+                negate = chars.startswith('!')
+                if negate:
+                    chars = chars[1:]
+                chars = chars.replace('\\', '\\\\').replace('^', '\\^').replace('[', '\\[').replace(']', '\\]')
+                out.append('[^/{}]'.format(chars) if negate else '(?!/)[{}]'.format(chars))
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def normalize_id(id: str, separator: str = '/') -> str:
+    """
+    returns id as an absolute slash separated path. Metronome IDs use `.` as
+    separator, e.g. `team-a.nightly` becomes `/team-a/nightly`.
+    """
+    if separator != '/':
+        id = id.replace(separator, '/')
+    return '/' + id.strip('/')
+
+
+class IDFilter(object):
+    """
+    IDFilter matches object IDs like Marathon app IDs against a list of patterns.
+    An ID matches if any pattern matches. An empty filter matches everything.
+
+    Patterns are globs on the ID path (`/team-a/**`, `/team-[ab]/web-*`) or regular
+    expressions with a `re:` prefix (`re:^/team-(a|b)/`).
+    """
+    def __init__(self, patterns: Iterable[str] = ()):
+        super(IDFilter, self).__init__()
+        self._patterns = [p for p in patterns if p]
+        self._regexes: List[Pattern[str]] = []
+        for p in self._patterns:
+            if p.startswith(_REGEX_PREFIX):
+                self._regexes.append(re.compile(p[len(_REGEX_PREFIX):]))
+            else:
+                self._regexes.append(re.compile(_glob_to_regex(normalize_id(p)) + '$'))
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    @property
+    def patterns(self) -> List[str]:
+        return self._patterns
+
+    def match(self, id: str, separator: str = '/') -> bool:
+        if not self._patterns:
+            return True
+
+        nid = normalize_id(id, separator)
+        for p, r in zip(self._patterns, self._regexes):
+            if p.startswith(_REGEX_PREFIX):
+                if r.search(nid):
+                    return True
+            elif r.match(nid):
+                return True
+        return False
+
+    def group(self) -> str:
+        """
+        returns the narrowest group enclosing every ID the filter can match.
+        `/` if that is unknown, e.g. for regular expressions.
+        """
+        groups = []
+        for p in self._patterns:
+            if p.startswith(_REGEX_PREFIX):
+                return '/'
+            p = normalize_id(p)
+            literal = re.split('[{}]'.format(re.escape(_GLOB_CHARS)), p, maxsplit=1)[0]
+            if literal == p:
+                # no wildcard: the pattern is an ID itself, its parent is the group
+                literal = p.rsplit('/', 1)[0]
+            else:
+                literal = literal.rsplit('/', 1)[0]
+            groups.append([s for s in literal.split('/') if s])
+
+        if not groups:
+            return '/'
+
+        common = groups[0]
+        for g in groups[1:]:
+            n = 0
+            while n < min(len(common), len(g)) and common[n] == g[n]:
+                n += 1
+            common = common[:n]
+
+        return '/' + '/'.join(common)
@@ -0,0 +1,150 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class JSONStream(object):
+    """
+    Incrementally parses a JSON document arriving as chunks of bytes, e.g. from
+    `requests.Response.iter_content()`. Only the currently parsed value is kept
+    in memory, so peak memory is bounded by the largest single element instead
+    of the whole document.
+
+    >>> list(JSONStream([b'{"apps": [{"id": "/a"}, ', b'{"id": "/b"}]}']).items("apps"))
+    [{'id': '/a'}, {'id': '/b'}]
+    """
+    def __init__(self, chunks: Iterable[bytes]):
+        super(JSONStream, self).__init__()
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self) -> bool:
+        """append the next chunk to the buffer. Returns False once the input is exhausted"""
+        if self._eof:
+            return False
+
+        # drop everything which has been consumed already
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._buf += self._text_decoder.decode(chunk)
+            return True
+
+        self._buf += self._text_decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        """returns the next non-whitespace character without consuming it or '' at the end of input"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return ''
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError("Expected '{}' but found '{}' in JSON stream".format(char, found or 'end of input'))
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """decodes the next complete JSON value"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buf, self._pos)
+                # a number could be truncated at the end of the buffer, e.g. `12` of `12.5`.
+                # Only accept it if it is followed by a delimiter or the input is exhausted.
+                if (end < len(self._buf) and self._buf[end] not in _NUMBER_CHARS) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            # read until the pending data doubled to keep re-parsing amortized linear
+            pending = len(self._buf) - self._pos
+            while len(self._buf) - self._pos < 2 * pending and self._read():
+                pass
+
+    def _array(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self._value()
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect(']')
+            return
+
+    def members(self) -> Iterator[Tuple[str, Any]]:
+        """yields key and value of each member of the top level object"""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key, self._value()
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect('}')
+            return
+
+    def items(self, key: Optional[str] = None) -> Iterator[Any]:
+        """
+        yields the elements of the top level array or, if key is given, of the
+        array stored in key of the top level object. Other members are skipped.
+        """
+        if key is None:
+            yield from self._array()
+            return
+
+        self._expect('{')
+        while self._peek() != '}':
+            k = self._value()
+            self._expect(':')
+            if k == key:
+                yield from self._array()
+            else:
+                self._value()
+            if self._peek() == ',':
+                self._pos += 1
+        self._pos += 1
+
+
+def iter_json_items(chunks: Iterable[bytes], key: Optional[str] = None) -> Iterator[Any]:
+    """shortcut for `JSONStream(chunks).items(key)`"""
+    return JSONStream(chunks).items(key)
+
+
+def load_json(chunks: Iterable[bytes]) -> Any:
+    """
+    Parses a whole JSON document from chunks. For objects only the largest member
+    has to be buffered as text next to the parsed result.
+    """
+    stream = JSONStream(chunks)
+    if stream._peek() == '{':
+        return dict(stream.members())
+    return stream._value()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import urllib.request
+import zipfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+TAR_EXTENSIONS = (".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".txz", ".tar.xz")
+
+
+class ArtifactDownloadError(RuntimeError):
+    pass
+
+
+class ArtifactExtractError(RuntimeError):
+    pass
+
+
+def artifact_filename(uri: str) -> str:
+    # NOTE: The path separator is always '/', even on Windows.
+    return uri.rpartition('/')[2]
+
+
+def image_tag(*parts: Any) -> str:
+    """a tag changing with everything that goes into the image"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class Prebaker(object):
+    """
+    Prebaker bakes fetched artifacts into images instead of downloading them
+    in an init container whenever a pod starts. Every URI is downloaded once
+    into `directory`/artifacts, shared by all apps and jobs baked into the same
+    directory, and every app gets a docker build context in
+    `directory`/<name> copying its artifacts on top of the app's image.
+    """
+    def __init__(self, directory: str, registry: Optional[str] = None) -> None:
+        super(Prebaker, self).__init__()
+        self.directory = directory
+        self.registry = registry
+        # build context -> image to build from it
+        self.images: Dict[str, str] = {}
+
+    def _uri_dir(self, uri: str) -> str:
+        return os.path.join(self.directory, "artifacts", hashlib.sha256(uri.encode()).hexdigest())
+
+    def artifact(self, uri: str) -> str:
+        """returns the local copy of uri, downloading it unless an earlier app did"""
+        uri_dir = self._uri_dir(uri)
+        path = os.path.join(uri_dir, artifact_filename(uri) or "artifact")
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(uri_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        try:
+            with urllib.request.urlopen(uri) as response, open(path + ".part", "wb") as f:
+                while True:
+                    chunk = response.read(1 << 16)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+        except (OSError, ValueError) as e:
+            raise ArtifactDownloadError("Cannot download {}: {}".format(uri, e))
+        with open(os.path.join(uri_dir, "sha256"), "w") as sha256:
+            sha256.write(digest.hexdigest())
+        os.rename(path + ".part", path)
+        logging.debug("Downloaded {} to {}".format(uri, path))
+        return path
+
+    def digest(self, uri: str) -> str:
+        """returns the sha256 of the content of uri, downloading it unless an earlier app did"""
+        self.artifact(uri)
+        with open(os.path.join(self._uri_dir(uri), "sha256")) as f:
+            return f.read()
+
+    def _repository(self, name: str) -> str:
+        return "{}{}".format(self.registry + "/" if self.registry else "", name)
+
+    def image(self, name: str, base_image: str, working_dir: str, fetches: Sequence[Dict[str, Any]]) -> str:
+        # the content is part of the tag, so an artifact changed behind the same URI gets a new image
+        tag = image_tag(base_image, working_dir, [dict(f, cache=False, sha256=self.digest(f['uri'])) for f in fetches])
+        return "{}:{}".format(self._repository(name), tag)
+
+    def bake(self, name: str, base_image: str, working_dir: str, fetches: Sequence[Dict[str, Any]]) -> str:
+        """
+        writes the build context of the image for the app `name` with fetches
+        in working_dir and returns the image
+        """
+        context = os.path.join(self.directory, name)
+        shutil.rmtree(context, ignore_errors=True)
+        artifacts = os.path.join(context, "artifacts")
+        os.makedirs(artifacts)
+
+        for fetch in fetches:
+            uri = fetch['uri']
+            path = os.path.join(artifacts, artifact_filename(uri) or "artifact")
+            shutil.copyfile(self.artifact(uri), path)
+            if fetch.get('executable', False):
+                os.chmod(path, 0o755)
+            elif fetch.get('extract', True):
+                extract(path, artifacts)
+
+        with open(os.path.join(context, "Dockerfile"), "w") as f:
+            f.write("FROM {}\nCOPY artifacts/ {}\n".format(base_image, os.path.join(working_dir, "")))
+
+        image = self.image(name, base_image, working_dir, fetches)
+        self.images[context] = image
+        return image
+
+    def restore(self, name: str, images: Iterable[str]) -> None:
+        """
+        records the image of the app `name` among images, baked by an earlier run
+        into a build context still in place, so it is built along with the others
+        """
+        context = os.path.join(self.directory, name)
+        if not os.path.exists(os.path.join(context, "Dockerfile")):
+            return
+        for image in images:
+            if image.rpartition(":")[0] == self._repository(name):
+                self.images[context] = image
+
+    def build_commands(self) -> List[str]:
+        push = " && docker push {image}" if self.registry else ""
+        return [("docker build -t {image} {context}" + push).format(image=image, context=context)
+                for context, image in sorted(self.images.items())]
+
+
+def _inside(dest: str, name: str) -> bool:
+    """whether name relative to dest resolves within dest, following links already extracted"""
+    root = os.path.realpath(dest)
+    return bool(os.path.commonpath([root, os.path.realpath(os.path.join(root, name))]) == root)
+
+
+def _check_name(path: str, dest: str, name: str) -> None:
+    if os.path.isabs(name) or ".." in name.replace("\\", "/").split("/") or not _inside(dest, name):
+        raise ArtifactExtractError("{}: {} would be extracted outside of the working directory".format(path, name))
+
+
+def _check_tar_member(path: str, dest: str, member: tarfile.TarInfo) -> None:
+    _check_name(path, dest, member.name)
+    if member.issym():
+        target = os.path.join(os.path.dirname(member.name), member.linkname)
+    elif member.islnk():
+        target = member.linkname
+    elif member.isfile() or member.isdir():
+        return
+    else:
+        raise ArtifactExtractError("{}: {} is neither a file, a directory nor a link".format(path, member.name))
+    if os.path.isabs(member.linkname) or not _inside(dest, target):
+        raise ArtifactExtractError("{}: link {} points outside of the working directory: {}".format(
+            path, member.name, member.linkname))
+
+
+def extract(path: str, dest: str) -> None:
+    """
+    extracts path into dest like the Mesos fetcher, keeping the archive. Archives
+    with members or links reaching outside of dest are rejected.
+    """
+    if path.endswith(TAR_EXTENSIONS):
+        with tarfile.open(path) as tar:
+            # members are checked one by one as they are extracted, so that the check
+            # follows the links extracted before them
+            for member in tar:
+                _check_tar_member(path, dest, member)
+                tar.extract(member, dest)
+    elif path.endswith(".zip"):
+        with zipfile.ZipFile(path) as z:
+            for name in z.namelist():
+                _check_name(path, dest, name)
+            z.extractall(dest)
+
+
+def container_images(body: Dict[str, Any]) -> List[str]:
+    """returns the images of all containers and init containers in the resource body"""
+    images: List[str] = []
+    for key, value in body.items():
+        if key in ('containers', 'initContainers') and isinstance(value, list):
+            images.extend(c['image'] for c in value if isinstance(c, dict) and 'image' in c)
+        elif isinstance(value, dict):
+            images.extend(container_images(value))
+    return images
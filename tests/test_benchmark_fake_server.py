@@ -0,0 +1,33 @@
+from dcos_migrate.benchmark import FakeDCOSServer, SyntheticCluster
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.system import BackupList, DCOSClient
+from dcos_migrate.system.checkpoint import Checkpoint
+
+
+def test_backup_against_fake_server(tmpdir):
+    cluster = SyntheticCluster(apps=25, jobs=5, secrets=10, pools=2, teams=3)
+    with FakeDCOSServer(cluster) as server:
+        m = DCOSMigrate()
+        m.handleArgparse(["backup"])
+        m.client = DCOSClient(toml_config=server.toml_config())
+        m.backup_list = BackupList(path=str(tmpdir.join("backup")))
+        m.checkpoint = Checkpoint(path=str(tmpdir.join("checkpoint")))
+
+        m.backup(None, False)
+
+    assert len(m.backup_list.backups("marathon")) == 25
+    assert len(m.backup_list.backups("metronome")) == 5
+    assert len(m.backup_list.backups("secret")) == 10
+    assert len(m.backup_list.backups("edgelb")) == 2
+    assert m.backup_list.backup("cluster", "default").data["CLUSTER"] == "synthetic"
+    assert server.requests["/marathon/v2/apps"] == 1
+
+
+def test_groups(tmpdir):
+    cluster = SyntheticCluster(apps=10, teams=2)
+    with FakeDCOSServer(cluster) as server:
+        client = DCOSClient(toml_config=server.toml_config())
+        group = client.get(server.url + "/marathon/v2/groups/team-1?embed=group.apps").json()
+
+    assert group["id"] == "/team-1"
+    assert sorted(a["id"] for a in group["apps"]) == ["/team-1/app-{}".format(i) for i in [1, 3, 5, 7, 9]]
@@ -0,0 +1,76 @@
+import base64
+import json
+
+import pytest
+
+from dcos_migrate.benchmark import StubClient, SyntheticCluster
+from dcos_migrate.benchmark.suite import main, regressions, report, run_suite
+from dcos_migrate.plugins.secret import SecretPlugin
+
+
+def test_synthetic_cluster_deterministic():
+    a = SyntheticCluster(apps=50, seed=1)
+    b = SyntheticCluster(apps=50, seed=1)
+
+    assert list(a.iter_apps()) == list(b.iter_apps())
+    assert a.app(3) != SyntheticCluster(apps=50, seed=2).app(3)
+    # every referenced secret exists
+    for app in a.iter_apps():
+        for s in app.get("secrets", {}).values():
+            assert a.secret_by_path(s["source"]) is not None
+
+
+def test_stub_client_binary_secret():
+    cluster = SyntheticCluster(apps=0, jobs=0, secrets=10, pools=0)
+    s = SecretPlugin()
+    s.config = {"global": {}}
+
+    backups = {b.data["key"]: b.data for b in s.backup(StubClient(cluster))}
+
+    assert len(backups) == 10
+    assert backups["team-9/secret-9"]["type"] == "binary"
+    assert base64.b64decode(backups["team-9/secret-9"]["value"]) == cluster.secret(9)["binary"]
+    assert backups["team-1/secret-1"]["type"] == "text"
+
+
+def test_run_suite(tmpdir):
+    cluster = SyntheticCluster(apps=6, jobs=2, secrets=6, pools=1, teams=2)
+    results = run_suite(cluster, phases=["load", "migrate"], workdir=str(tmpdir))
+
+    assert sorted(results["phases"]) == ["load", "migrate"]
+    # 6 apps, 2 jobs, 6 secrets, 1 pool and the cluster
+    assert results["phases"]["load"]["items"] == 16
+    assert results["phases"]["migrate"]["peak_rss_mb"] > 0
+    assert results["scale"]["apps"] == 6
+
+    assert "+100.0%" in report(results, {
+        "scale": results["scale"],
+        "phases": {
+            "load": {
+                "seconds": results["phases"]["load"]["seconds"] / 2
+            }
+        }
+    })
+
+
+def test_backup_http_regression(tmpdir):
+    cluster = SyntheticCluster(apps=6, jobs=2, secrets=6, pools=1, teams=2)
+    results = run_suite(cluster, phases=["backup-http"], workdir=str(tmpdir))
+
+    assert sorted(results["phases"]) == ["backup-http"]
+    assert results["phases"]["backup-http"]["items"] == 16
+    apps_per_sec = results["phases"]["backup-http"]["apps_per_sec"]
+
+    def baseline(factor):
+        return {"scale": results["scale"], "phases": {"backup-http": {"apps_per_sec": apps_per_sec * factor}}}
+
+    assert regressions(results, baseline(1.5), 50) == []
+    assert [r.split(":")[0] for r in regressions(results, baseline(3), 50)] == ["backup-http"]
+
+    baseline_json = str(tmpdir.join("baseline.json"))
+    with open(baseline_json, "w") as f:
+        json.dump(baseline(100), f)
+    scale = ["--apps", "6", "--jobs", "2", "--secrets", "6", "--pools", "1", "--teams", "2"]
+    output = ["--workdir", str(tmpdir), "--output", str(tmpdir.join("results.json"))]
+    with pytest.raises(SystemExit, match="Throughput dropped"):
+        main(scale + output + ["--phases", "backup-http", "--compare", baseline_json, "--max-regression", "50"])
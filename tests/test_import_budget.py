@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+# generous upper bound of the cumulative import time of dcos_migrate.cmd.
+# Importing kubernetes.client on its own takes longer than that.
+IMPORT_BUDGET_SECONDS = 1.0
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def run_python(code, *args):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    return subprocess.run([sys.executable] + list(args) + ["-c", code],
+                          env=env,
+                          check=True,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def test_startup_does_not_import_plugins_or_kubernetes():
+    out = run_python("""
+import sys
+from dcos_migrate.cmd import DCOSMigrate
+
+DCOSMigrate().pm.config_options
+print("\\n".join(sys.modules))
+""").stdout.split()
+
+    assert "kubernetes" not in out
+    assert "dcos_migrate.plugins.marathon" in out
+    assert "dcos_migrate.plugins.marathon.plugin" not in out
+    assert "dcos_migrate.plugins.metronome.plugin" not in out
+
+
+def test_import_time_budget():
+    # -X importtime reports "import time: self [us] | cumulative | module" on stderr
+    err = run_python("import dcos_migrate.cmd", "-X", "importtime").stderr
+    cumulative = [int(line.split("|")[1]) for line in err.splitlines() if line.endswith("| dcos_migrate.cmd")]
+
+    assert len(cumulative) == 1
+    assert cumulative[0] / 1e6 < IMPORT_BUDGET_SECONDS
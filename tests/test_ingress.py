@@ -5,6 +5,8 @@ import json
 
 from kubernetes import client
 import pytest
+import requests_mock
+from dcos import config
 
 from dcos_migrate.plugins.ingress import edgelb
 from dcos_migrate.plugins.ingress import migrator
@@ -214,3 +216,25 @@ class TestMigrator(object):
                     }]
                 },
             }
+
+
+@requests_mock.Mocker(kw='mock')
+def test_backup_filter(**kwargs):
+    pools = []
+    for name in ("sample0", "pool-http"):
+        with open(os.path.join(TEST_DIR, "examples", "edgelb", name + ".json")) as fp:
+            pools.append(json.load(fp))
+    kwargs['mock'].get('mock://test.cluster.mesos/service/edgelb/v2/pools', json=pools)
+
+    conf = config.Toml({"core": {"dcos_url": "mock://test.cluster.mesos", "ssl_verify": "false"}})
+    p = plugin.EdgeLBPlugin()
+    # matches an app the second pool routes to
+    p.config = {"global": {"filter": ["/bridge-*"]}}
+
+    bl = p.backup(system.DCOSClient(toml_config=conf), system.BackupList())
+
+    assert [b.data["name"] for b in bl] == [pools[1]["name"]]
+    # backups of pools not matching, e.g. from an unfiltered backup, are not migrated
+    p.config = {"global": {"filter": ["/nginx"]}}
+    ml = p.migrate(bl, system.ManifestList())
+    assert not ml
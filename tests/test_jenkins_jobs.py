@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "misc", "jenkins", "scripts"))
+
+import jobs  # noqa: E402
+import main  # noqa: E402
+
+MESOS_SLAVE = b'<org.jenkinsci.plugins.mesos.MesosSingleUseSlave plugin="mesos@1.0.0"/>'
+
+
+def job_config(timer: bool = False, mesos: bool = False) -> bytes:
+    return (
+        b"<project>\n  <disabled>false</disabled>\n  <triggers>" +
+        (b"<hudson.triggers.TimerTrigger><spec>H * * * *</spec></hudson.triggers.TimerTrigger>" if timer else b"") +
+        b"</triggers>\n  <buildWrappers>" + (MESOS_SLAVE if mesos else b"") + b"</buildWrappers>\n</project>\n")
+
+
+@pytest.fixture
+def jobs_folder(tmp_path):
+    """a jobs folder with a plain job, a cron job, a job on a Mesos single use agent and a folder of jobs"""
+    folder = tmp_path / "jobs"
+    for path, content in [("plain", job_config()), ("cron", job_config(timer=True)), ("mesos", job_config(mesos=True)),
+                          ("folder/jobs/nested", job_config(timer=True))]:
+        (folder / path).mkdir(parents=True)
+        (folder / path / "config.xml").write_bytes(content)
+    # the config of the folder itself is not a job
+    (folder / "folder" / "config.xml").write_bytes(job_config())
+    return folder
+
+
+def config(folder, path):
+    return (folder / path / "config.xml").read_bytes()
+
+
+def results(folder, rules, workers=2):
+    return {
+        os.path.relpath(os.path.dirname(r.config_xml), str(folder)): r
+        for r in jobs.rewrite_configs(str(folder), rules, workers)
+    }
+
+
+def test_disable_jobs(jobs_folder):
+    rs = results(jobs_folder, jobs.Rules(disable_jobs=True, disable_cron_jobs=False))
+
+    assert sorted(rs) == ["cron", "folder/jobs/nested", "mesos", "plain"]
+    assert all(r.disabled and r.written for r in rs.values())
+    for path in rs:
+        assert b"<disabled>true</disabled>" in config(jobs_folder, path)
+    assert MESOS_SLAVE not in config(jobs_folder, "mesos")
+    assert rs["mesos"].mesos_slaves_removed == 1
+    assert config(jobs_folder, "folder") == job_config()
+
+
+def test_disable_cron_jobs(jobs_folder):
+    rs = results(jobs_folder, jobs.Rules(disable_jobs=False, disable_cron_jobs=True))
+
+    assert sorted(p for p, r in rs.items() if r.disabled) == ["cron", "folder/jobs/nested"]
+    assert config(jobs_folder, "cron") == job_config(timer=True).replace(b"<disabled>false", b"<disabled>true")
+    assert config(jobs_folder, "plain") == job_config()
+
+
+def test_unchanged_configs_are_not_written(jobs_folder):
+    mtime = os.stat(str(jobs_folder / "plain" / "config.xml")).st_mtime_ns
+    os.utime(str(jobs_folder / "plain" / "config.xml"), ns=(mtime - 10**9, mtime - 10**9))
+
+    rs = results(jobs_folder, jobs.Rules(disable_jobs=False, disable_cron_jobs=False), workers=1)
+
+    assert sorted(p for p, r in rs.items() if r.written) == ["mesos"]
+    assert config(jobs_folder, "mesos") == job_config()
+    assert config(jobs_folder, "cron") == job_config(timer=True)
+    assert os.stat(str(jobs_folder / "plain" / "config.xml")).st_mtime_ns == mtime - 10**9
+    assert not list(jobs_folder.glob("**/*.tmp"))
+
+
+def test_workers_at_least_one(jobs_folder):
+    assert len(jobs.rewrite_configs(str(jobs_folder), jobs.Rules(False, False), workers=0)) == 4
+    assert main.positive_int("3") == 3
+    with pytest.raises(argparse.ArgumentTypeError):
+        main.positive_int("0")
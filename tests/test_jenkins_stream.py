@@ -0,0 +1,204 @@
+import argparse
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "misc", "jenkins", "scripts"))
+
+import backup  # noqa: E402
+import main  # noqa: E402
+import stream  # noqa: E402
+
+# Stand-ins for the dcos and kubectl commands working on local directories:
+#   FAKE_CLUSTER/dcos/<task>/...   the sandbox of the Jenkins task
+#   FAKE_CLUSTER/k8s/<pod>/...     the filesystem of the Jenkins pod
+# A file FAKE_CLUSTER/fail/<job or pod> containing a number makes that many
+# commands streaming the job, or run in the pod, fail.
+STAND_IN = """\
+import os, shutil, subprocess, sys
+
+root = os.environ["FAKE_CLUSTER"]
+args = [a for a in sys.argv[1:] if a != "-v"]
+
+
+def fail_once(name):
+    p = os.path.join(root, "fail", name)
+    if not os.path.exists(p):
+        return False
+    n = int(open(p).read())
+    if n == 0:
+        return False
+    open(p, "w").write(str(n - 1))
+    return True
+"""
+
+DCOS = STAND_IN + """
+if args[:2] == ["task", "download"]:
+    task, path = args[2], args[3]
+    target = next(a.split("=", 1)[1] for a in args if a.startswith("--target-dir="))
+    os.makedirs(target, exist_ok=True)
+    shutil.copy(os.path.join(root, "dcos", task, path), target)
+elif args[:2] == ["task", "exec"]:
+    task, cmd = args[2], args[3:]
+    # the job streamed is the last word of the command
+    if fail_once(cmd[-1].split()[-1].strip("'")):
+        sys.exit("exec in {} failed".format(task))
+    sys.exit(subprocess.run(cmd, cwd=os.path.join(root, "dcos", task)).returncode)
+else:
+    sys.exit("unexpected dcos {}".format(args))
+"""
+
+KUBECTL = STAND_IN + """
+if args[:2] == ["exec", "-i"]:
+    pod, cmd = args[2], args[args.index("--") + 1:]
+    if fail_once(pod):
+        sys.exit("exec in {} failed".format(pod))
+    sys.exit(subprocess.run(cmd, cwd=os.path.join(root, "k8s", pod)).returncode)
+else:
+    sys.exit("unexpected kubectl {}".format(args))
+"""
+
+JOBS = ["alpha", "beta", "builds"]
+
+
+def stand_in(path: Path, source: str) -> str:
+    path.write_text("#!{}\n{}".format(sys.executable, source))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def make_jobs(jobs: Path) -> None:
+    for job in JOBS:
+        (jobs / job / "builds" / "1").mkdir(parents=True)
+        (jobs / job / "workspace").mkdir()
+        (jobs / job / "config.xml").write_text("<project>{}</project>".format(job))
+        (jobs / job / "builds" / "1" / "log").write_text("log")
+        (jobs / job / "workspace" / "src").write_text("src")
+        (jobs / job / "nextBuildNumber").write_text("2")
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    root = tmp_path / "cluster"
+    task = root / "dcos" / "jenkins.task"
+    task.mkdir(parents=True)
+    (task / "jenkins_home").mkdir()
+    (task / "jenkins_home" / "config.xml").write_text("<hudson/>")
+    make_jobs(task / "jenkins_home" / "jobs")
+    (root / "k8s" / "jenkins-0").mkdir(parents=True)
+    (root / "fail").mkdir()
+    monkeypatch.setenv("FAKE_CLUSTER", str(root))
+    return root
+
+
+@pytest.fixture
+def dcos(tmp_path):
+    return stand_in(tmp_path / "dcos", DCOS)
+
+
+@pytest.fixture
+def kubectl(tmp_path):
+    return stand_in(tmp_path / "kubectl", KUBECTL)
+
+
+def files(directory: Path):
+    return sorted(str(p.relative_to(directory)) for p in directory.rglob("*") if p.is_file())
+
+
+def parse(args):
+    parser = argparse.ArgumentParser()
+    stream.add_stream_args(parser)
+    return parser.parse_args(args)
+
+
+def test_excludes_from_args():
+    assert stream.excludes_from_args(parse([])) == ["builds", "workspace"]
+    # --exclude replaces the defaults
+    assert stream.excludes_from_args(parse(["--exclude", "workspace"])) == ["workspace"]
+    assert stream.excludes_from_args(parse(["--exclude", "a", "--exclude", "b"])) == ["a", "b"]
+    assert stream.excludes_from_args(parse(["--exclude", ""])) == []
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_download_chunk_per_job(tmp_path, cluster, dcos, compression):
+    target = tmp_path / "target" / "jobs"
+    chunks = stream.download_chunks(dcos, "jenkins.task", JOBS, "jenkins_home/jobs", str(target),
+                                    stream.DEFAULT_EXCLUDES, compression)
+
+    assert [c.name for c in chunks] == JOBS
+    assert stream.transfer(chunks, parallel=2, retries=0) == []
+    # builds and workspace within jobs are excluded, but not a job called builds
+    assert files(target) == sorted("{}/{}".format(job, f) for job in JOBS for f in ["config.xml", "nextBuildNumber"])
+
+
+def test_excludes_replace_defaults(tmp_path, cluster, dcos):
+    target = tmp_path / "target" / "jobs"
+    chunks = stream.download_chunks(dcos, "jenkins.task", ["alpha"], "jenkins_home/jobs", str(target), ["workspace"],
+                                    "gzip")
+
+    assert stream.transfer(chunks, retries=0) == []
+    assert files(target) == ["alpha/builds/1/log", "alpha/config.xml", "alpha/nextBuildNumber"]
+
+
+def test_failed_chunks_are_retried_alone(tmp_path, cluster, dcos):
+    (cluster / "fail" / "alpha").write_text("1")
+    (cluster / "fail" / "beta").write_text("5")
+    target = tmp_path / "target" / "jobs"
+    chunks = stream.download_chunks(dcos, "jenkins.task", JOBS, "jenkins_home/jobs", str(target), [], "gzip")
+
+    assert stream.transfer(chunks, parallel=3, retries=1, retry_delay=0.01) == ["beta"]
+    assert (target / "alpha" / "config.xml").exists()
+    assert not (target / "beta").exists()
+    assert (target / "builds" / "config.xml").exists()
+    # one attempt of alpha and both of beta failed
+    assert (cluster / "fail" / "alpha").read_text() == "0"
+    assert (cluster / "fail" / "beta").read_text() == "3"
+
+
+def test_stream_task_data_exits_on_failure(tmp_path, cluster, dcos, monkeypatch):
+    monkeypatch.setattr(backup, "DCOS", dcos)
+    target = tmp_path / "target"
+
+    assert backup.stream_task_data("jenkins.task", str(target), [], "gzip", 2, 0) == "{}/config.xml".format(target)
+    assert (target / "config.xml").exists()
+    assert sorted(os.listdir(str(target / "jobs"))) == JOBS
+
+    (cluster / "fail" / "beta").write_text("1")
+    with pytest.raises(SystemExit) as e:
+        backup.stream_task_data("jenkins.task", str(tmp_path / "failed"), [], "gzip", 2, 0)
+    assert e.value.code == 1
+
+
+def jobs_copy_args(**kwargs):
+    args = dict(path="*", namespace="jenkins", exclude=None, compression="gzip", parallel=2, retries=0, dry_run=False)
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_jobs_stream_uploads_jobs(tmp_path, cluster, kubectl, monkeypatch):
+    monkeypatch.setattr(main, "kubectl", kubectl)
+    make_jobs(tmp_path / "local" / "jobs")
+    pod = cluster / "k8s" / "jenkins-0"
+
+    main._jobs_stream(jobs_copy_args(), str(tmp_path / "local" / "jobs"), "var/jenkins_home/jobs", "jenkins-0")
+    assert sorted(os.listdir(str(pod / "var" / "jenkins_home" / "jobs"))) == JOBS
+    assert not (pod / "var" / "jenkins_home" / "jobs" / "alpha" / "builds").exists()
+
+    # a single job goes into its parent
+    main._jobs_stream(jobs_copy_args(path="/job/alpha", exclude=[""]), str(tmp_path / "local" / "jobs" / "alpha"),
+                      "copy/jobs/alpha", "jenkins-0")
+    assert files(pod / "copy" /
+                 "jobs") == ["alpha/builds/1/log", "alpha/config.xml", "alpha/nextBuildNumber", "alpha/workspace/src"]
+
+
+def test_jobs_stream_exits_on_failure(tmp_path, cluster, kubectl, monkeypatch):
+    monkeypatch.setattr(main, "kubectl", kubectl)
+    make_jobs(tmp_path / "local" / "jobs")
+    (cluster / "fail" / "jenkins-0").write_text("1")
+
+    with pytest.raises(SystemExit) as e:
+        main._jobs_stream(jobs_copy_args(), str(tmp_path / "local" / "jobs"), "var/jenkins_home/jobs", "jenkins-0")
+    assert e.value.code == 1
@@ -1,5 +1,5 @@
-from kubernetes.client.models import V1beta1CronJob, V1Secret
-from dcos_migrate.system import Manifest, with_comment
+from kubernetes.client.models import V1beta1CronJob, V1ObjectMeta, V1Secret
+from dcos_migrate.system import Document, Manifest, with_comment
 
 import textwrap
 
@@ -60,3 +60,59 @@ def test_manifest_comments_deserialization():
         apiVersion: v1234
         kind: CronJob
     """)
+
+
+def test_manifest_documents():
+    doc = Document({"apiVersion": "v1", "kind": "Service", "metadata": {"name": "foo", "labels": None}})
+    doc.set_comment(["a service"])
+    secret = V1Secret(api_version='v1', kind='Secret')
+
+    manifest = Manifest(pluginName='foo', manifestName='bar', data=[doc, secret])
+    dump = manifest.serialize()
+    assert dump == textwrap.dedent("""\
+        ---
+        # a service
+        apiVersion: v1
+        kind: Service
+        metadata:
+          name: foo
+
+        ---
+        apiVersion: v1
+        kind: Secret
+    """)
+
+    loaded = Manifest(pluginName='foo', manifestName='bar', documents=True)
+    loaded.deserialize(dump)
+    assert all(isinstance(d, Document) for d in loaded)
+    assert loaded[0] == Document({"apiVersion": "v1", "kind": "Service", "metadata": {"name": "foo"}})
+    assert (loaded[1].api_version, loaded[1].kind, loaded[1].name) == ("v1", "Secret", None)
+
+
+def test_manifest_resource_by_name_documents():
+    doc = Document({"apiVersion": "v1", "kind": "Service", "metadata": {"name": "foo", "annotations": {"a": "b"}}})
+    secret = V1Secret(api_version='v1', kind='Secret', metadata=V1ObjectMeta(name="foo", annotations={"a": "c"}))
+
+    manifest = Manifest(pluginName='foo', manifestName='bar', data=[doc, secret])
+
+    assert manifest.resource_by_name("foo", "v1", "Service") is doc
+    assert manifest.resource_idx_by_name("foo", "v1", "Secret") == 1
+    assert manifest.findall_by_annotation("a") == [doc, secret]
+    assert manifest.find_by_annotation("a", "c") is secret
+
+
+def test_manifest_index_updated():
+    manifest = Manifest(pluginName='foo', manifestName='bar')
+    assert manifest.resource_by_name("foo", "v1", "Service") is None
+
+    doc = Document({"apiVersion": "v1", "kind": "Service", "metadata": {"name": "foo"}})
+    manifest.append(doc)
+    assert manifest.resource_by_name("foo", "v1", "Service") is doc
+
+    manifest.insert(0, Document({"apiVersion": "v1", "kind": "Secret", "metadata": {"name": "foo"}}))
+    assert manifest.resource_idx_by_name("foo", "v1", "Service") == 1
+
+    doc.metadata["annotations"] = {"a": "b"}
+    assert manifest.find_by_annotation("a") is None
+    manifest.reindex()
+    assert manifest.find_by_annotation("a") is doc
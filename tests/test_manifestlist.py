@@ -1,3 +1,4 @@
+import copy
 from dcos_migrate.system import ManifestList, Manifest
 from kubernetes.client.models import V1ObjectMeta, V1Secret
 import pytest
@@ -66,3 +67,123 @@ def test_manifest():
     assert sec2 is not None
     assert len(sec2) == 1
     assert sec2[0].metadata.name == "test.secret2"
+
+
+def secret_manifest(name, value):
+    sec = V1Secret(metadata=V1ObjectMeta(name=name), kind="Secret", api_version="v1", data={name: value})
+    return Manifest(pluginName="secret", manifestName=name, data=[sec])
+
+
+def test_streaming_keeps_resident_plugins_only(tmpdir):
+    ml = ManifestList(path=str(tmpdir), streaming=True, resident=["cluster"])
+    ml.add(secret_manifest("secret1", "Zm9vYmFy"))
+    ml.add(secret_manifest("secret2", "YmF6"))
+
+    # stored right away but not kept in memory
+    assert len(ml) == 0
+    assert sorted(ml.on_disk("secret")) == ["secret1", "secret2"]
+    assert tmpdir.join("secret", "secret1.Manifest.yaml").check()
+
+    sec2 = ml.manifest(pluginName="secret", manifestName="secret2")
+    assert sec2 is not None
+    assert sec2[0].data == {"secret2": "YmF6"}
+    assert ml.manifest(pluginName="secret", manifestName="missing") is None
+    assert len(ml.manifests("secret")) == 2
+
+    ml.resident.add("secret")
+    ml.add(secret_manifest("secret3", "cXV4"))
+    assert len(ml) == 1
+    assert len(ml.manifests("secret")) == 3
+
+
+def test_streaming_load_indexes(tmpdir):
+    create_example_list_manifest(str(tmpdir))
+
+    ml = ManifestList(path=str(tmpdir), streaming=True).load()
+    assert len(ml) == 0
+    assert ml.on_disk() == ["foobar"]
+    assert ml.manifest(pluginName="testPlugin", manifestName="foobar")[0].data == {"secret1": "Zm9vYmFy"}
+
+    ml = ManifestList(path=str(tmpdir), streaming=True, resident=["testPlugin"]).load()
+    assert len(ml) == 1
+    assert ml.on_disk() == []
+
+
+def run_migrate(tmpdir, monkeypatch, args):
+    from dcos_migrate.benchmark import StubClient, SyntheticCluster
+    from dcos_migrate.benchmark.suite import _migrate
+
+    workdir = tmpdir.mkdir(args[-1] if args else "default")
+    # stateful apps write their scripts relative to the working directory
+    monkeypatch.chdir(str(workdir))
+    m = _migrate(str(workdir))
+    m.client = StubClient(SyntheticCluster(apps=20, jobs=4, secrets=10, pools=1, teams=2))
+    assert m.run(["all"] + args) == 0
+
+    stored = {}
+    for f in workdir.join("migrate").visit(fil=lambda p: p.check(file=1)):
+        stored[f.relto(workdir)] = f.read()
+    return m, stored
+
+
+def test_streaming_store_output_unchanged(tmpdir, monkeypatch):
+    _, expected = run_migrate(tmpdir, monkeypatch, [])
+    m, stored = run_migrate(tmpdir, monkeypatch, ["--streaming-store"])
+
+    assert stored == expected
+    assert {mf.plugin_name for mf in m.manifest_list} == {"cluster", "secret"}
+    assert len(m.manifest_list.on_disk("marathon")) == 20
+
+
+def test_resource_indexes():
+    ml = ManifestList()
+    s1 = secret_manifest("secret1", "Zm9vYmFy")
+    s1[0].metadata.annotations = {"cluster-id": "a"}
+    ml.append(s1)
+    assert ml.manifest(pluginName="secret", manifestName="secret1") is s1
+
+    # appended after the index was built
+    s2 = secret_manifest("secret2", "YmF6")
+    s2[0].metadata.annotations = {"cluster-id": "b"}
+    ml.extend([s2])
+
+    assert ml.manifest(pluginName="secret", manifestName="secret2") is s2
+    assert ml.resources_by_name("secret2", "v1", "Secret") == [(s2, s2[0])]
+    assert ml.resources_by_annotation("cluster-id") == [(s1, s1[0]), (s2, s2[0])]
+    assert ml.resources_by_annotation("cluster-id", "b") == [(s2, s2[0])]
+    assert ml.resources_by_annotation("cluster-id", "c") == []
+
+    ml.remove(s1)
+    assert ml.manifest(pluginName="secret", manifestName="secret1") is None
+    assert ml.resources_by_annotation("cluster-id") == [(s2, s2[0])]
+    assert len(ml.manifests("secret")) == 1
+
+
+def test_index_follows_manifests():
+    ml = ManifestList()
+    m = Manifest(pluginName="secret", manifestName="later")
+    ml.append(m)
+    assert ml.manifest(pluginName="secret", manifestName="later") is m
+    assert ml.manifests("secret") == [m]
+    assert ml.resources_by_name("later", "v1", "Secret") == []
+
+    # resources appended to a Manifest already indexed
+    m.extend(secret_manifest("later", "Zm9vYmFy"))
+    assert ml.resources_by_name("later", "v1", "Secret") == [(m, m[0])]
+
+    m[0].metadata.annotations = {"cluster-id": "a"}
+    m.reindex()
+    assert ml.resources_by_annotation("cluster-id", "a") == [(m, m[0])]
+
+    m.name = "renamed"
+    assert ml.manifest(pluginName="secret", manifestName="later") is None
+    assert ml.manifest(pluginName="secret", manifestName="renamed") is m
+
+    m.clear()
+    assert ml.resources_by_name("later", "v1", "Secret") == []
+    assert ml.manifests("secret") == [m]
+
+    # copies are not indexed by the list
+    c = copy.deepcopy(m)
+    c.extend(secret_manifest("copied", "Zm9vYmFy"))
+    assert ml.resources_by_name("copied", "v1", "Secret") == []
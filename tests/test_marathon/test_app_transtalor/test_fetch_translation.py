@@ -1,6 +1,7 @@
 import pytest
 
 from dcos_migrate.plugins.marathon import app_translator
+from dcos_migrate.utils import FetchCache, Prebaker
 from .common import DummyAppSecretMapping
 
 
@@ -56,3 +57,93 @@ def test_fetch_fails_without_working_dir():
 
     with pytest.raises(app_translator.AdditionalFlagNeeded, match=r'.*?--container-working-dir.*?'):
         app_translator.translate_app(fields, settings)
+
+
+def test_cached_fetch_uses_fetch_cache():
+    settings = app_translator.Settings(
+        app_translator.ContainerDefaults(
+            image="busybox",
+            working_dir="/fetched_artifacts",
+            fetch_cache=FetchCache.parse("hostPath:/var/cache/dcos-fetch"),
+        ),
+        app_secret_mapping=DummyAppSecretMapping(),
+    )
+
+    fields = {
+        "id": "app",
+        "fetch": [{
+            "uri": "https://example.com/big.tgz",
+            "cache": True
+        }, {
+            "uri": "http://foobar.baz/0xdeadbeef"
+        }]
+    }
+
+    translated = app_translator.translate_app(fields, settings)
+
+    template_spec = translated.deployment['spec']['template']['spec']
+    assert template_spec['volumes'] == [{
+        'name': 'fetch-artifacts',
+        'emptyDir': {}
+    }, {
+        'name': 'fetch-cache',
+        'hostPath': {
+            'path': '/var/cache/dcos-fetch',
+            'type': 'DirectoryOrCreate'
+        }
+    }]
+
+    fetch_container = template_spec['initContainers'][0]
+    assert fetch_container['volumeMounts'][1] == {'name': 'fetch-cache', 'mountPath': '/fetch_cache'}
+    assert fetch_container['securityContext'] == {'runAsUser': 0}
+    assert fetch_container['command'][:2] == ['sh', '-c']
+    script = fetch_container['command'][2]
+    # only the cached fetch goes through the cache
+    assert '( cached_fetch "https://example.com/big.tgz" "big.tgz" && tar -xf "big.tgz" )' in script
+    assert '( wget -O "0xdeadbeef" "http://foobar.baz/0xdeadbeef")' in script
+    assert not any('cache=true' in w for w in translated.warnings)
+
+
+def test_cache_is_ignored_without_fetch_cache():
+    settings = app_translator.Settings(
+        app_translator.ContainerDefaults(
+            image="busybox",
+            working_dir="/fetched_artifacts",
+        ),
+        app_secret_mapping=DummyAppSecretMapping(),
+    )
+
+    fields = {"id": "app", "fetch": [{"uri": "https://example.com/big.tgz", "cache": True}]}
+
+    translated = app_translator.translate_app(fields, settings)
+
+    fetch_container = translated.deployment['spec']['template']['spec']['initContainers'][0]
+    assert fetch_container['image'] == 'bash:5.0'
+    assert 'wget -O "big.tgz" "https://example.com/big.tgz"' in fetch_container['command'][2]
+    assert any('--marathon-fetch-cache' in w for w in translated.warnings)
+
+
+def test_prebaked_fetch_drops_init_container(tmp_path):
+    (tmp_path / "artifact").write_text("data")
+    prebaker = Prebaker(str(tmp_path / "prebake"))
+    settings = app_translator.Settings(
+        app_translator.ContainerDefaults(
+            image="busybox",
+            working_dir="/fetched_artifacts",
+            prebaker=prebaker,
+        ),
+        app_secret_mapping=DummyAppSecretMapping(),
+    )
+
+    fields = {"id": "app", "fetch": [{"uri": "file://{}/artifact".format(tmp_path), "cache": True}]}
+
+    translated = app_translator.translate_app(fields, settings)
+
+    template_spec = translated.deployment['spec']['template']['spec']
+    assert 'initContainers' not in template_spec
+    assert 'volumes' not in template_spec
+    image = template_spec['containers'][0]['image']
+    assert image == prebaker.image('marathon/app', 'busybox', '/fetched_artifacts', fields['fetch'])
+    assert template_spec['containers'][0]['workingDir'] == '/fetched_artifacts'
+    assert (tmp_path / "prebake" / "marathon" / "app" / "artifacts" / "artifact").read_text() == "data"
+    assert not any('cache=true' in w for w in translated.warnings)
@@ -38,11 +38,52 @@ def test_command_health_check_with_all_fields_set():
         "failureThreshold": 333,
         "timeoutSeconds": 99,
         "periodSeconds": 45,
-        "initialDelaySeconds": 123,
         "exec": {
             "command": ["/bin/sh", "-c", "exit 0"]
         }
     }
+    # the grace period is covered by the startup probe, ceil(123 / 10) checks 10 seconds apart
+    assert container['startupProbe'] == {
+        "failureThreshold": 13,
+        "timeoutSeconds": 99,
+        "periodSeconds": 10,
+        "exec": {
+            "command": ["/bin/sh", "-c", "exit 0"]
+        }
+    }
+
+
+@pytest.mark.parametrize("grace_period,expected_startup", [
+    (None, {
+        "periodSeconds": 10,
+        "failureThreshold": 30
+    }),
+    (5, {
+        "periodSeconds": 5,
+        "failureThreshold": 1
+    }),
+    (60, {
+        "periodSeconds": 10,
+        "failureThreshold": 6
+    }),
+    (0, None),
+])
+def test_grace_period_becomes_startup_probe(grace_period, expected_startup):
+    check = {"protocol": "MESOS_TCP", "port": 80}
+    if grace_period is not None:
+        check["gracePeriodSeconds"] = grace_period
+    app = {"id": "/server", "healthChecks": [check]}
+
+    translated = app_translator.translate_app(app, EMPTY_SETTINGS)
+
+    container = translated.deployment['spec']['template']['spec']['containers'][0]
+    assert 'initialDelaySeconds' not in container['livenessProbe']
+    if expected_startup is None:
+        assert 'startupProbe' not in container
+    else:
+        startup = container['startupProbe']
+        assert {k: startup[k] for k in expected_startup} == expected_startup
+        assert startup['tcpSocket'] == container['livenessProbe']['tcpSocket']
 
 
 def test_second_health_check_dropped_warning():
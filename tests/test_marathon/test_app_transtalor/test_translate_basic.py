@@ -211,16 +211,114 @@ def test_unreachable_strategy():
 
 def test_upgrade_strategy():
     settings = new_settings()
-    app = {"id": "app", "upgradeStrategy": {"minimumHealthCapacity": 0.6250, "maximumOverCapacity": 0.455}}
+    app = {
+        "id": "app",
+        "instances": 8,
+        "upgradeStrategy": {
+            "minimumHealthCapacity": 0.6250,
+            "maximumOverCapacity": 0.455
+        }
+    }
     translated = app_translator.translate_app(app, settings)
 
+    # Marathon keeps ceil(8 * 0.625) = 5 tasks healthy and runs up to floor(8 * 1.455) = 11,
+    # where 37% and 45% would let Kubernetes stop 2 and start 4 pods at a time
+    assert translated.deployment['spec']['strategy'] == {
+        "type": "RollingUpdate",
+        "rollingUpdate": {
+            "maxUnavailable": 3,
+            "maxSurge": 3
+        }
+    }
+    assert 'progressDeadlineSeconds' not in translated.deployment['spec']
+    assert not any('upgradeStrategy' in w for w in translated.warnings)
+
+
+def test_upgrade_strategy_defaults_to_marathons():
+    # Marathon starts all new tasks at once, where Kubernetes would default to 25% and 25%
+    app = {"id": "app", "instances": 10}
+    translated = app_translator.translate_app(app, new_settings())
+
     assert translated.deployment['spec']['strategy'] == {
         "type": "RollingUpdate",
         "rollingUpdate": {
-            "maxUnavailable": "37%",
-            "maxSurge": "45%"
+            "maxUnavailable": "0%",
+            "maxSurge": "100%"
         }
     }
+    assert app_translator.rollout_parallelism(translated.deployment) == 10
+    assert not any('upgradeStrategy' in w for w in translated.warnings)
+
+
+@pytest.mark.parametrize(
+    "instances,strategy,expected,warning",
+    [
+        (3, (1, 0), {
+            "maxUnavailable": "0%",
+            "maxSurge": 1
+        }, "allow neither stopping nor starting"),
+        (1, (0.5, 0.5), {
+            "maxUnavailable": "50%",
+            "maxSurge": 1
+        }, "allow neither stopping nor starting"),
+        (10, (0.9, 0), {
+            "maxUnavailable": "10%",
+            "maxSurge": "0%"
+        }, "replaces one of 10 pods at a time"),
+        (5, (0.6, 0), {
+            "maxUnavailable": "40%",
+            "maxSurge": "0%"
+        }, None),
+        # Marathon starts floor(3 * 0.5) = 1 pod, where Kubernetes would round 50% up to 2
+        (3, (0.5, 0.5), {
+            "maxUnavailable": "50%",
+            "maxSurge": 1
+        }, None),
+    ])
+def test_upgrade_strategy_serialized_rollout(instances, strategy, expected, warning):
+    app = {
+        "id": "app",
+        "instances": instances,
+        "upgradeStrategy": {
+            "minimumHealthCapacity": strategy[0],
+            "maximumOverCapacity": strategy[1]
+        }
+    }
+    translated = app_translator.translate_app(app, new_settings())
+
+    assert translated.deployment['spec']['strategy']['rollingUpdate'] == expected
+    upgrade_warnings = [w for w in translated.warnings if 'upgradeStrategy' in w]
+    if warning:
+        assert any(warning in w for w in upgrade_warnings)
+    else:
+        assert upgrade_warnings == []
+
+
+def test_progress_deadline_from_grace_period_and_readiness():
+    app = {
+        "id":
+        "app",
+        "healthChecks": [{
+            "protocol": "COMMAND",
+            "command": {
+                "value": "true"
+            },
+            "gracePeriodSeconds": 900
+        }],
+        "readinessChecks": [{
+            "name": "ready",
+            "protocol": "HTTP",
+            "path": "/",
+            "portName": "http",
+            "intervalSeconds": 20,
+            "timeoutSeconds": 5,
+            "httpStatusCodesForReady": [200],
+            "preserveLastResponse": False
+        }],
+    }
+    translated = app_translator.translate_app(app, new_settings())
+
+    assert translated.deployment['spec']['progressDeadlineSeconds'] == 2 * (900 + 20 + 5)
 
 
 def test_task_kill_grace_period_seconds():
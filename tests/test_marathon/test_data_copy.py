@@ -0,0 +1,394 @@
+import json
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from dcos_migrate.plugins.marathon import data_copy
+from dcos_migrate.plugins.marathon.data_copy import DataCopy, Mount
+
+# Stand-ins for the dcos and kubectl commands working on local directories:
+#   FAKE_CLUSTER/dcos/<task>/<mount name>/...   the sandboxes of the tasks
+#   FAKE_CLUSTER/k8s/<pod>/...                  the filesystems of the pods
+# A file FAKE_CLUSTER/fail/<task or pod>-<mount name> containing a number makes
+# that many transfers of it fail. Every running transfer is logged to
+# FAKE_CLUSTER/running to check how many run at a time.
+STAND_IN = """\
+import fcntl, os, shutil, subprocess, sys, time
+
+root = os.environ["FAKE_CLUSTER"]
+args = sys.argv[1:]
+
+
+def fail_once(name):
+    p = os.path.join(root, "fail", name)
+    if not os.path.exists(p):
+        return False
+    n = int(open(p).read())
+    if n == 0:
+        return False
+    open(p, "w").write(str(n - 1))
+    return True
+
+
+def running(delta):
+    with open(os.path.join(root, "running"), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        lines = f.read().split()
+        current = int(lines[-1]) if lines else 0
+        f.write("{}\\n".format(current + delta))
+
+
+def transfer(name, src, dst):
+    if fail_once(name):
+        sys.exit("transfer of {} failed".format(name))
+    running(1)
+    time.sleep(0.05)
+    shutil.copytree(src, dst, dirs_exist_ok=True)
+    running(-1)
+
+
+def execute(name, cmd, cwd, strip=""):
+    if fail_once(name):
+        sys.exit("exec in {} failed".format(name))
+    p = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE)
+    sys.stdout.buffer.write(p.stdout.replace(strip.encode(), b"") if strip else p.stdout)
+    sys.exit(p.returncode)
+"""
+
+DCOS = STAND_IN + """
+if args[:4] == ["marathon", "task", "list", "-q"]:
+    print("\\n".join(os.listdir(os.path.join(root, "dcos"))))
+elif args[:2] == ["task", "download"]:
+    task, mount = args[2], args[3]
+    target = args[args.index("--target-dir") + 1]
+    transfer(task + "-" + mount, os.path.join(root, "dcos", task, mount), os.path.join(target, mount))
+elif args[:2] == ["task", "exec"]:
+    task, cmd = args[2], args[3:]
+    volume = cmd[cmd.index("-C") + 1] if "-C" in cmd else cmd[1].split("/")[0]
+    execute(task + "-" + volume, cmd, os.path.join(root, "dcos", task))
+else:
+    sys.exit("unexpected dcos {}".format(args))
+"""
+
+KUBECTL = STAND_IN + """
+if args[:2] == ["get", "pods"]:
+    print("\\n".join(os.listdir(os.path.join(root, "k8s"))))
+elif args[0] == "cp":
+    src = args[1].rstrip("/")
+    pod, _, path = args[2].partition(":")
+    dst = os.path.join(root, "k8s", pod, path.lstrip("/"), os.path.basename(src))
+    transfer(pod + "-" + os.path.basename(src), src, dst)
+elif args[0] == "exec":
+    rest = args[2:] if args[1] == "-i" else args[1:]
+    pod, cmd = rest[0], rest[2:]
+    # absolute paths are in the pod's filesystem
+    base = os.path.join(root, "k8s", pod)
+    path = next(a for a in cmd if a.startswith("/"))
+    cmd = [base + a if a.startswith("/") else a for a in cmd]
+    execute(pod + "-" + os.path.basename(path), cmd, base, strip=base)
+else:
+    sys.exit("unexpected kubectl {}".format(args))
+"""
+
+MOUNTS = [Mount("data", "/var/lib/data"), Mount("logs", "/var/log/logs")]
+
+
+def stand_in(path: Path, source: str) -> str:
+    path.write_text("#!{}\n{}".format(sys.executable, source))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    root = tmp_path / "cluster"
+    for t in range(3):
+        for m in MOUNTS:
+            d = root / "dcos" / "app.task-{}".format(t) / m.name
+            d.mkdir(parents=True)
+            (d / "file").write_bytes(bytes([t]) * 1024 * (t + 1))
+    # the ordinal decides which instance a pod gets, not the name sorting
+    for p in [0, 1, 2, 10]:
+        for m in MOUNTS:
+            (root / "k8s" / "app-{}".format(p) / m.path.lstrip("/")).mkdir(parents=True)
+    (root / "fail").mkdir()
+    monkeypatch.setenv("FAKE_CLUSTER", str(root))
+    return root
+
+
+def copy(tmp_path, **kwargs) -> DataCopy:
+    return DataCopy(MOUNTS,
+                    target_dir=str(tmp_path / "target" / "download"),
+                    dcos=stand_in(tmp_path / "dcos", DCOS),
+                    kubectl=stand_in(tmp_path / "kubectl", KUBECTL),
+                    retry_delay=0.01,
+                    out=lambda s: None,
+                    **kwargs)
+
+
+def max_running(cluster) -> int:
+    return max(int(line) for line in (cluster / "running").read_text().split())
+
+
+def test_download_and_upload(tmp_path, cluster):
+    dc = copy(tmp_path)
+
+    downloaded = dc.download("/app")
+    assert [t.ok for t in downloaded] == [True] * 6
+    for t in range(3):
+        for m in MOUNTS:
+            f = tmp_path / "target" / "download" / str(t) / m.name / "file"
+            assert f.read_bytes() == bytes([t]) * 1024 * (t + 1)
+    assert sorted((t.instance, t.mount.name, t.bytes) for t in downloaded) == [(0, "data", 1024), (0, "logs", 1024),
+                                                                               (1, "data", 2048), (1, "logs", 2048),
+                                                                               (2, "data", 3072), (2, "logs", 3072)]
+
+    uploaded = dc.upload("app")
+    assert [t.ok for t in uploaded] == [True] * 6
+    assert sorted({t.target for t in uploaded}) == ["app-0", "app-1", "app-2"]
+    for t in range(3):
+        pod = cluster / "k8s" / "app-{}".format(t)
+        assert (pod / "var/lib/data/file").read_bytes() == bytes([t]) * 1024 * (t + 1)
+        assert (pod / "var/log/logs/file").read_bytes() == bytes([t]) * 1024 * (t + 1)
+    assert not (cluster / "k8s" / "app-10" / "var/lib/data/file").exists()
+
+
+def test_parallelism_is_bounded(tmp_path, cluster):
+    copy(tmp_path, parallel_tasks=3, parallel_volumes=2).download("/app")
+    assert max_running(cluster) > 1
+    assert max_running(cluster) <= 6
+
+    (cluster / "running").unlink()
+    copy(tmp_path, parallel_tasks=1, parallel_volumes=1).download("/app")
+    assert max_running(cluster) == 1
+
+
+def test_failed_transfers_are_retried(tmp_path, cluster):
+    (cluster / "fail" / "app.task-1-data").write_text("2")
+    (cluster / "fail" / "app-2-logs").write_text("1")
+    dc = copy(tmp_path, retries=2)
+
+    downloaded = {(t.instance, t.mount.name): t for t in dc.download("/app")}
+    assert downloaded[(1, "data")].ok
+    assert downloaded[(1, "data")].attempts == 3
+    assert downloaded[(1, "data")].bytes == 2048
+    assert downloaded[(0, "data")].attempts == 1
+
+    uploaded = {(t.instance, t.mount.name): t for t in dc.upload("app")}
+    assert uploaded[(2, "logs")].ok
+    assert uploaded[(2, "logs")].attempts == 2
+
+
+def test_failing_transfer_gives_up(tmp_path, cluster):
+    (cluster / "fail" / "app.task-0-logs").write_text("5")
+    transfers = copy(tmp_path, retries=1).download("/app")
+
+    failed = [t for t in transfers if not t.ok]
+    assert [(t.instance, t.mount.name, t.attempts) for t in failed] == [(0, "logs", 2)]
+    assert "transfer of app.task-0-logs failed" in failed[0].error
+    assert "FAILED" in data_copy.report(transfers)
+    assert "5 of 6 volumes copied" in data_copy.report(transfers)
+
+
+def test_upload_needs_a_pod_per_instance(tmp_path, cluster):
+    dc = copy(tmp_path)
+    dc.download("/app")
+    for p in ["app-2", "app-10"]:
+        shutil.rmtree(str(cluster / "k8s" / p))
+
+    with pytest.raises(RuntimeError, match="3 instances were downloaded but StatefulSet app only has 2 pods"):
+        dc.upload("app")
+
+
+def test_main_reports_throughput(tmp_path, cluster, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (cluster / "fail" / "app.task-2-data").write_text("9")
+    stand_ins = ["--dcos", stand_in(tmp_path / "dcos", DCOS), "--retries", "0"]
+
+    assert data_copy.main(
+        ["download", "--app-id", "/app", "--mount", "data=/var/lib/data", "--report", "report.json"] + stand_ins) == 1
+
+    out = capsys.readouterr().out
+    header = out.splitlines()[-5].split()
+    assert header == ["instance", "from", "volume", "MiB", "seconds", "MiB/s", "attempts", "status"]
+    assert "2 of 3 volumes copied" in out
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert [(r["instance"], r["bytes"], r["error"] is None) for r in report] == [(0, 1024, True), (1, 2048, True),
+                                                                                 (2, 0, False)]
+    assert all(r["seconds"] > 0 for r in report[:2])
+
+
+def test_mount_parse():
+    assert Mount.parse("data=/var/lib/data") == Mount("data", "/var/lib/data")
+    with pytest.raises(Exception):
+        Mount.parse("data")
+
+
+@pytest.mark.parametrize("compress", ["none", "gzip"])
+def test_stream(tmp_path, cluster, compress):
+    (cluster / "fail" / "app.task-1-logs").write_text("1")
+    (cluster / "fail" / "app-2-data").write_text("1")
+    transfers = copy(tmp_path).stream("/app", "app", compress)
+
+    assert [t.ok for t in transfers] == [True] * 6
+    assert {(t.instance, t.mount.name): t.attempts
+            for t in transfers if t.attempts > 1} == {
+                (1, "logs"): 2,
+                (2, "data"): 2
+            }
+    for t in range(3):
+        pod = cluster / "k8s" / "app-{}".format(t)
+        assert (pod / "var/lib/data/file").read_bytes() == bytes([t]) * 1024 * (t + 1)
+        assert (pod / "var/log/logs/file").read_bytes() == bytes([t]) * 1024 * (t + 1)
+    # nothing is staged locally
+    assert not (tmp_path / "target").exists()
+
+    sent = sum(t.bytes for t in transfers)
+    if compress == "gzip":
+        assert sent < 12 * 1024
+    else:
+        assert sent > 12 * 1024
+
+
+def test_stream_needs_a_pod_per_task(tmp_path, cluster):
+    for p in ["app-2", "app-10"]:
+        shutil.rmtree(str(cluster / "k8s" / p))
+
+    with pytest.raises(RuntimeError, match="app /app has 3 tasks but StatefulSet app only has 2 pods"):
+        copy(tmp_path).stream("/app", "app")
+
+
+def test_pipe_commands_fails_with_either_side():
+    assert data_copy.pipe_commands(["echo", "hello"], ["cat"]) == 6
+    with pytest.raises(data_copy.CommandError, match="exited with 3"):
+        data_copy.pipe_commands(["sh", "-c", "echo hello; exit 3"], ["cat"])
+    with pytest.raises(data_copy.CommandError, match="boom"):
+        data_copy.pipe_commands(["yes"], ["sh", "-c", "echo boom; exit 1"])
+
+
+def volume_files(cluster, where, volume):
+    d = cluster / where / volume
+    return {str(p.relative_to(d)): p.read_bytes() for p in d.rglob("*") if p.is_file()}
+
+
+def test_sync_copies_only_changes(tmp_path, cluster, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = cluster / "dcos" / "app.task-0" / "data"
+    (data / "sub").mkdir()
+    (data / "sub" / "a file").write_bytes(b"a" * 100)
+    (data / "b").write_bytes(b"b" * 200)
+
+    first = {(t.instance, t.mount.name): t for t in copy(tmp_path).sync("/app", "app")}
+    assert [t.ok for t in first.values()] == [True] * 6
+    assert (first[(0, "data")].files, first[(0, "data")].bytes) == (3, 1024 + 300)
+    for t in range(3):
+        for m in MOUNTS:
+            assert volume_files(cluster, "k8s/app-{}".format(t),
+                                m.path.lstrip("/")) == volume_files(cluster, "dcos/app.task-{}".format(t), m.name)
+
+    state = json.loads((tmp_path / "target" / "sync" / "0-data.json").read_text())
+    assert (state["task"], state["pod"]) == ("app.task-0", "app-0")
+    assert state["files"]["sub/a file"][:1] == [100]
+
+    (data / "b").write_bytes(b"c" * 201)
+    second = {(t.instance, t.mount.name): t for t in copy(tmp_path).sync("/app", "app")}
+    assert {k: t.files for k, t in second.items() if t.files} == {(0, "data"): 1}
+    assert (cluster / "k8s/app-0/var/lib/data/b").read_bytes() == b"c" * 201
+
+
+def test_sync_resumes_partial_copy(tmp_path, cluster, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_copy, "BATCH_FILES", 2)
+    data = cluster / "dcos" / "app.task-1" / "data"
+    for i in range(6):
+        (data / "part-{}".format(i)).write_bytes(bytes([i]) * 1000)
+    # an earlier run copied part-0 and part-1, and half of part-2
+    pod = cluster / "k8s" / "app-1" / "var/lib/data"
+    for i in range(2):
+        shutil.copy2(str(data / "part-{}".format(i)), str(pod))
+    (pod / "part-2").write_bytes(b"\x02" * 500)
+
+    transfers = {(t.instance, t.mount.name): t for t in copy(tmp_path).sync("/app", "app")}
+    assert transfers[(1, "data")].files == 5  # file and part-2 to part-5
+    assert volume_files(cluster, "k8s/app-1", "var/lib/data") == volume_files(cluster, "dcos/app.task-1", "data")
+
+
+def test_sync_checksum(tmp_path, cluster, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    commands = []
+
+    def run(argv):
+        commands.append(argv)
+        return data_copy.run_command(argv)
+
+    copy(tmp_path).sync("/app", "app")
+    # same size and modification time, different content
+    pod_file = cluster / "k8s/app-2/var/log/logs/file"
+    stat = pod_file.stat()
+    pod_file.write_bytes(b"x" * stat.st_size)
+    os.utime(str(pod_file), (stat.st_atime, stat.st_mtime))
+
+    without = {(t.instance, t.mount.name): t.files for t in copy(tmp_path).sync("/app", "app")}
+    assert without[(2, "logs")] == 0
+
+    checked = {(t.instance, t.mount.name): t for t in copy(tmp_path, run=run).sync("/app", "app", checksum=True)}
+    assert checked[(2, "logs")].files == 1
+    assert pod_file.read_bytes() == bytes([2]) * 3072
+    state = json.loads((tmp_path / "target" / "sync" / "2-logs.json").read_text())
+    assert len(state["files"]["file"][2]) == 64
+    assert any("sha256sum" in argv for argv in commands)
+
+    # checksums recorded are not computed again
+    commands.clear()
+    again = copy(tmp_path, run=run).sync("/app", "app", checksum=True, compress="gzip")
+    assert [t.files for t in again] == [0] * 6
+    assert not any("sha256sum" in argv for argv in commands)
+
+
+def test_sync_links_directories_and_any_names(tmp_path, cluster, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = cluster / "dcos" / "app.task-0" / "data"
+    (data / "empty" / "nested").mkdir(parents=True)
+    (data / "new\nline").write_bytes(b"n" * 10)
+    (data / "current").symlink_to("file")
+    (data / "outside").symlink_to("/etc/hostname")
+
+    first = {(t.instance, t.mount.name): t for t in copy(tmp_path).sync("/app", "app", checksum=True)}
+    assert first[(0, "data")].files == 4
+    pod = cluster / "k8s" / "app-0" / "var/lib/data"
+    assert (pod / "empty" / "nested").is_dir()
+    assert (pod / "new\nline").read_bytes() == b"n" * 10
+    assert os.readlink(str(pod / "current")) == "file"
+    assert os.readlink(str(pod / "outside")) == "/etc/hostname"
+
+    again = copy(tmp_path).sync("/app", "app", checksum=True)
+    assert [t.files for t in again] == [0] * 6
+
+    # a symlink replaced by a file
+    (data / "current").unlink()
+    (data / "current").write_bytes(b"now a file")
+    third = {(t.instance, t.mount.name): t for t in copy(tmp_path).sync("/app", "app")}
+    assert third[(0, "data")].files == 1
+    assert not (pod / "current").is_symlink()
+    assert (pod / "current").read_bytes() == b"now a file"
+
+
+def test_parse_listing():
+    out = ("2\n81a4 3 100\na1ff 4 200\n/v/a\nb\0/v/link\0" "2\n41ed 4096 300\n11a4 0 400\n/v/dir\0/v/fifo\0")
+    assert data_copy.parse_listing(out, "/v") == {
+        "a\nb": ("f", 3, 100),
+        "link": ("l", 4, 200),
+        "dir": ("d", 4096, 300),
+    }
+
+
+def test_batches(monkeypatch):
+    monkeypatch.setattr(data_copy, "BATCH_FILES", 2)
+    assert list(data_copy.batches(["a", "b", "c"])) == [["a", "b"], ["c"]]
+    monkeypatch.setattr(data_copy, "BATCH_ARGS_SIZE", 5)
+    assert list(data_copy.batches(["aaa", "bbb", "c"])) == [["aaa"], ["bbb", "c"]]
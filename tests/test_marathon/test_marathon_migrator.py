@@ -1,10 +1,11 @@
-from dcos_migrate.plugins.marathon import MarathonMigrator, NodeLabelTracker
-from dcos_migrate.system import Manifest, ManifestList
+from dcos_migrate.plugins.marathon import MarathonMigrator, NodeLabelTracker, RolloutTracker
+from dcos_migrate.system import Document, Manifest, ManifestList
 
 from kubernetes.client.models import V1Deployment, V1ObjectMeta, V1Secret  # type: ignore
 
 import json
 import pytest
+import yaml
 
 
 def test_simple():
@@ -20,6 +21,28 @@ def test_simple():
         assert m.manifest[0].metadata.name == 'group1.predictionio-server'
 
 
+def test_simple_with_secret_documents():
+    ml = ManifestList(path='tests/examples/simpleWithSecret')
+    ml.load()
+
+    with open('tests/examples/simpleWithSecret.json') as json_file:
+        data = json.load(json_file)
+
+    models = MarathonMigrator(object=data, manifest_list=ml).migrate()
+    documents = MarathonMigrator(object=data, manifest_list=ml, documents=True).migrate()
+
+    assert [type(r) for r in documents] == [Document, Document, V1Secret]
+    assert documents[0].name == 'group1.predictionio-server'
+    assert documents[1].kind == 'Service'
+    assert documents[0].get_comment() == models[0].get_comment()
+
+    actual = list(yaml.safe_load_all(documents.serialize()))
+    # models write quantities as strings, Documents as translated
+    for quantities in actual[0]['spec']['template']['spec']['containers'][0]['resources'].values():
+        quantities['cpu'] = str(quantities['cpu'])
+    assert actual == list(yaml.safe_load_all(models.serialize()))
+
+
 @pytest.mark.xfail
 def test_simple_portmapping():
     with open('tests/examples/simplePortmapping.json') as json_file:
@@ -156,3 +179,47 @@ def test_dcos_apps_are_skipped():
     migrator = MarathonMigrator(object=app)
     manifest = migrator.migrate()
     assert not manifest
+
+
+def test_rollout_report():
+    apps = [
+        {
+            "id": "/web",
+            "instances": 40,
+            "upgradeStrategy": {
+                "minimumHealthCapacity": 0.5,
+                "maximumOverCapacity": 0.2
+            }
+        },
+        {
+            "id": "/default",
+            "instances": 8
+        },
+        {
+            "id": "/serial",
+            "instances": 4,
+            "upgradeStrategy": {
+                "minimumHealthCapacity": 1,
+                "maximumOverCapacity": 0
+            }
+        },
+    ]
+
+    tracker = RolloutTracker()
+    for app in apps:
+        MarathonMigrator(rollout_tracker=tracker, object=app).migrate()
+
+    assert {r.app_id: (r.instances, r.marathon, r.kubernetes)
+            for r in tracker.rollouts} == {
+                "/web": (40, 28, 28),
+                "/default": (8, 8, 8),
+                # Marathon cannot upgrade this app at all, Kubernetes replaces a pod at a time
+                "/serial": (4, 0, 1),
+            }
+    assert tracker.slower() == []
+    assert tracker.report().splitlines() == [
+        "app      instances  DC/OS    K8s",
+        "/default         8      8      8",
+        "/serial          4      0      1",
+        "/web            40     28     28",
+    ]
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+import requests_mock
+from dcos import config
+
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.plugins.marathon import MarathonPlugin
+from dcos_migrate.system import BackupList, DCOSClient, ManifestList
+from dcos_migrate.system.checkpoint import Checkpoint
+
+
+@pytest.fixture
+def conf():
+    return config.Toml({
+        "core": {
+            "dcos_url": "mock://test.cluster.mesos",
+            "ssl_verify": "false",
+            "dcos_acs_token": "im-a-fake-token"
+        },
+        "cluster": {
+            "name": "test-cluster"
+        }
+    })
+
+
+@requests_mock.Mocker(kw='mock')
+def test_backup(conf, **kwargs):
+    with open('tests/examples/simple.json') as json_file:
+        app = json.load(json_file)
+    other = dict(app, id="/other/app")
+
+    kwargs['mock'].get('mock://test.cluster.mesos/marathon/v2/apps', json={"apps": [app, other]})
+
+    bl = MarathonPlugin().backup(client=DCOSClient(toml_config=conf))
+
+    assert [b.name for b in bl] == ["group1-predictionio-server", "other-app"]
+    assert bl[0].data == app
+
+
+@requests_mock.Mocker(kw='mock')
+def test_backup_filter(conf, **kwargs):
+    with open('tests/examples/simple.json') as json_file:
+        app = json.load(json_file)
+    web = dict(app, id="/team-a/web")
+    db = dict(app, id="/team-a/sub/db")
+    other = dict(app, id="/team-a/sub/other")
+
+    kwargs['mock'].get('mock://test.cluster.mesos/marathon/v2/groups/team-a?embed=group.groups&embed=group.apps',
+                       json={
+                           "id": "/team-a",
+                           "apps": [web],
+                           "groups": [{
+                               "id": "/team-a/sub",
+                               "apps": [db, other],
+                               "groups": []
+                           }]
+                       })
+
+    plugin = MarathonPlugin()
+    plugin.config = {"global": {"filter": ["/team-a/web", "/team-a/sub/d*"]}}
+    bl = plugin.backup(client=DCOSClient(toml_config=conf))
+
+    # only the narrowest group was requested
+    assert kwargs['mock'].call_count == 1
+    assert sorted(b.name for b in bl) == ["team-a-sub-db", "team-a-web"]
+
+
+def test_resume_rebuilds_reports(tmpdir):
+    with open('tests/examples/simple.json') as json_file:
+        app = json.load(json_file)
+    tmpdir.join("run.sh").write("#!/bin/sh\n")
+    fetch = [{"uri": "file://{}".format(tmpdir.join("run.sh")), "executable": True}]
+    apps = [
+        dict(app, id="/web", instances=4, constraints=[["rack", "IS", "a"]], fetch=fetch),
+        dict(app, id="/db", instances=2, constraints=[["zone", "IS", "b"]]),
+    ]
+
+    def run(resume):
+        m = DCOSMigrate()
+        m.pm.config = {'global': {'resume': resume}, 'marathon': {'prebake': str(tmpdir.join("prebake"))}}
+        # migrated through the spec standing in for the plugin, like a real run
+        spec = m.pm.plugins['marathon']
+        m.backup_list = BackupList(path=str(tmpdir.join("backup")))
+        m.backup_list.extend(spec.createBackup(a) for a in apps)
+        m.manifest_list = ManifestList(path=str(tmpdir.join("migrate")))
+        m.checkpoint = Checkpoint(path=str(tmpdir.join("checkpoint")))
+        m.migrate_plugin(spec)
+        return spec.plugin
+
+    first = run(resume=False)
+    # all apps were migrated before, the resumed run only rebuilds what is reported about them
+    resumed = run(resume=True)
+
+    assert resumed._node_label_tracker.get_apps_by_label() == {"rack": {"/web"}, "zone": {"/db"}}
+    assert sorted(resumed._rollout_tracker.rollouts) == sorted(first._rollout_tracker.rollouts)
+    assert len(resumed._rollout_tracker.rollouts) == 2
+    assert resumed._prebaker.build_commands() == first._prebaker.build_commands()
+    assert len(resumed._prebaker.images) == 1
@@ -1,9 +1,11 @@
 from dcos_migrate.plugins.metronome import MetronomeMigrator
 from dcos_migrate.system import ManifestList, Manifest
+from dcos_migrate.utils import FetchCache, Prebaker
 from kubernetes.client.models import V1ConfigMap, V1ObjectMeta, V1Secret  # type: ignore
 
 from base64 import b64encode
 import json
+import os
 
 
 def create_manifest_list_cluster() -> ManifestList:
@@ -68,3 +70,48 @@ def test_job(snapshot):
 
 def test_ucr_job(snapshot):
     snapshot_test(snapshot, "job_ucr.json", "job_ucr.yaml")
+
+
+def test_cached_artifacts_use_fetch_cache():
+    with open("tests/examples/job.json") as f:
+        data = json.load(f)
+
+    cache = FetchCache.parse("pvc:artifact-cache")
+    m = MetronomeMigrator(object=data, manifest_list=create_manifest_list_cluster(), fetchCache=cache)
+    pod_spec = m.migrate()[0].spec.job_template.spec.template.spec
+
+    fetch = pod_spec.init_containers[0]
+    assert fetch["image"] == "curlimages/curl:7.78.0"
+    assert fetch["securityContext"] == {"runAsUser": 0}
+    assert fetch["command"][:2] == ["sh", "-c"]
+    assert 'cached_fetch "http://artifact.com" "artifact.com"' in fetch["command"][2]
+    assert {"name": "fetch-cache", "mountPath": "/fetch_cache"} in fetch["volumeMounts"]
+    assert {"name": "fetch-cache", "persistentVolumeClaim": {"claimName": "artifact-cache"}} in pod_spec.volumes
+
+
+def test_cache_is_ignored_without_fetch_cache():
+    with open("tests/examples/job.json") as f:
+        data = json.load(f)
+
+    m = MetronomeMigrator(object=data, manifest_list=create_manifest_list_cluster())
+    pod_spec = m.migrate()[0].spec.job_template.spec.template.spec
+
+    assert pod_spec.init_containers[0]["image"] == "bash:5.0"
+    assert any("--metronome-fetch-cache" in w for w in m._warnings.values())
+
+
+def test_prebaked_artifacts_drop_init_container(tmp_path):
+    with open("tests/examples/job.json") as f:
+        data = json.load(f)
+    (tmp_path / "artifact").write_text("data")
+    data["run"]["artifacts"] = [{"uri": "file://{}/artifact".format(tmp_path)}]
+
+    prebaker = Prebaker(str(tmp_path / "prebake"), registry="registry.example.com")
+    m = MetronomeMigrator(object=data, manifest_list=create_manifest_list_cluster(), prebaker=prebaker)
+    pod_spec = m.migrate()[0].spec.job_template.spec.template.spec
+
+    assert pod_spec.init_containers is None
+    assert pod_spec.containers[0].image.startswith("registry.example.com/metronome/")
+    [context] = prebaker.images
+    dockerfile = (tmp_path / "prebake" / "metronome" / os.path.basename(context) / "Dockerfile").read_text()
+    assert dockerfile.startswith("FROM {}\n".format(data["run"]["docker"]["image"]))
@@ -0,0 +1,204 @@
+import threading
+
+import pytest
+
+from dcos_migrate.benchmark import StubClient, SyntheticCluster
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.pipeline import Pipeline
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.plugin_manager import get_dependency_closure
+from dcos_migrate.system import Backup, BackupList, Manifest, ManifestList
+
+
+def manifest(plugin: str, name: str) -> Manifest:
+    return Manifest(pluginName=plugin, manifestName=name, data=[{"kind": "ConfigMap", "apiVersion": "v1"}])
+
+
+class SourcePlugin(MigratePlugin):
+    plugin_name = "source"
+    migrate_streaming = True
+
+    def __init__(self, migrated: threading.Event):
+        super(SourcePlugin, self).__init__()
+        self.migrated = migrated
+
+    def backup_iter(self, client, backupList, **kwargs):
+        yield Backup(self.plugin_name, "first", data={"n": 1})
+        # the second backup is only produced once the first one has been migrated.
+        assert self.migrated.wait(timeout=10), "first backup was not migrated while backup was running"
+        yield Backup(self.plugin_name, "second", data={"n": 2})
+
+    def migrate_backup(self, backup, backupList, manifestList, **kwargs):
+        self.migrated.set()
+        return manifest(self.plugin_name, backup.name)
+
+
+class BatchPlugin(MigratePlugin):
+    plugin_name = "batch"
+    migrate_depends = ["source"]
+
+    def backup(self, client, backupList, **kwargs):
+        bl = BackupList()
+        bl.append(Backup(self.plugin_name, "only", data={}))
+        return bl
+
+    def migrate(self, backupList, manifestList, **kwargs):
+        # all manifests of migrate_depends must be there
+        assert len(manifestList.manifests("source")) == 2
+        ml = ManifestList()
+        for b in backupList.backups(self.plugin_name):
+            ml.append(manifest(self.plugin_name, b.name))
+        return ml
+
+
+class LatePlugin(MigratePlugin):
+    """its backup depends on the backup of source whose migration depends on this plugin"""
+    plugin_name = "late"
+    backup_depends = ["streaming"]
+
+    def backup(self, client, backupList, **kwargs):
+        bl = BackupList()
+        bl.append(Backup(self.plugin_name, "late", data={"count": len(backupList.backups("streaming"))}))
+        return bl
+
+    def migrate(self, backupList, manifestList, **kwargs):
+        ml = ManifestList()
+        ml.append(manifest(self.plugin_name, "late"))
+        return ml
+
+
+class StreamingPlugin(MigratePlugin):
+    plugin_name = "streaming"
+    migrate_depends = ["late"]
+    migrate_streaming = True
+
+    def backup_iter(self, client, backupList, **kwargs):
+        for i in range(10):
+            yield Backup(self.plugin_name, str(i), data={})
+
+    def migrate_backup(self, backup, backupList, manifestList, **kwargs):
+        assert manifestList.manifest("late", "late") is not None
+        return manifest(self.plugin_name, backup.name)
+
+
+class FailingPlugin(MigratePlugin):
+    plugin_name = "failing"
+
+    def backup(self, client, backupList, **kwargs):
+        raise RuntimeError("backup failed")
+
+
+def test_pipeline_overlaps_backup_and_migrate():
+    plugins = {"source": SourcePlugin(threading.Event()), "batch": BatchPlugin()}
+    bl = BackupList()
+    ml = ManifestList()
+
+    Pipeline(plugins=plugins, client=None, backup_list=bl, manifest_list=ml).run()
+
+    assert sorted(b.name for b in bl) == ["first", "only", "second"]
+    assert sorted(m.name for m in ml) == ["first", "only", "second"]
+
+
+def test_pipeline_does_not_deadlock_on_crossed_dependencies():
+    plugins = {"streaming": StreamingPlugin(), "late": LatePlugin()}
+    bl = BackupList()
+    ml = ManifestList()
+
+    Pipeline(plugins=plugins, client=None, backup_list=bl, manifest_list=ml, queue_size=1).run()
+
+    assert bl.backup("late", "late").data == {"count": 10}
+    assert len(ml.manifests("streaming")) == 10
+
+
+def test_pipeline_raises_errors():
+    plugins = {"streaming": StreamingPlugin(), "late": LatePlugin(), "failing": FailingPlugin()}
+
+    with pytest.raises(RuntimeError, match="backup failed"):
+        Pipeline(plugins=plugins, client=None, backup_list=BackupList(), manifest_list=ManifestList(),
+                 queue_size=1).run()
+
+
+class DependentPlugin(MigratePlugin):
+    plugin_name = "dependent"
+    backup_depends = ["failing"]
+
+    def backup(self, client, backupList, **kwargs):
+        raise AssertionError("backup ran although the backup it depends on failed")
+
+
+def test_pipeline_does_not_start_after_failed_dependency():
+    plugins = {"failing": FailingPlugin(), "dependent": DependentPlugin()}
+
+    with pytest.raises(RuntimeError, match="backup failed"):
+        Pipeline(plugins=plugins, client=None, backup_list=BackupList(), manifest_list=ManifestList()).run()
+
+
+def test_streaming_plugin_must_implement_migrate_backup():
+    with pytest.raises(TypeError, match="migrate_backup"):
+
+        class IncompletePlugin(MigratePlugin):
+            plugin_name = "incomplete"
+            migrate_streaming = True
+
+
+def test_migrate_backup_is_a_no_op_for_other_plugins():
+    class BatchPlugin(MigratePlugin):
+        plugin_name = "batch"
+
+    assert BatchPlugin().migrate_backup(Backup("batch", "item", data={}), BackupList(), ManifestList()) is None
+
+
+def real_plugins(args):
+    m = DCOSMigrate()
+    m.handleArgparse(args)
+    names = set()
+    for name in ["marathon", "metronome"]:
+        names |= {name} | get_dependency_closure(m.pm.plugins, name, 'migrate_depends')
+    return {name: p for name, p in m.pm.plugins.items() if name in names}
+
+
+def test_pipeline_bounds_queues_of_real_plugins():
+    pipeline = Pipeline(plugins=real_plugins(["all"]),
+                        client=None,
+                        backup_list=BackupList(),
+                        manifest_list=ManifestList())
+
+    sizes = {name: q.maxsize for name, q in pipeline._queues.items()}
+    assert sizes == {"marathon": 100, "metronome": 100, "secret": 100}
+
+    # with referenced secrets only, the secret backup waits for the apps it refers to
+    pipeline = Pipeline(plugins=real_plugins(["all", "--secret-referenced-only"]),
+                        client=None,
+                        backup_list=BackupList(),
+                        manifest_list=ManifestList())
+
+    assert pipeline._queues["marathon"].maxsize == 0
+    assert pipeline._queues["metronome"].maxsize == 0
+
+
+def test_pipeline_overlaps_phases_of_real_plugins(tmpdir, monkeypatch):
+    # plugins write some artifacts relative to the working directory
+    monkeypatch.chdir(tmpdir)
+    cluster = SyntheticCluster(apps=10, jobs=5, secrets=10)
+    plugins = real_plugins(["all"])
+    bl = BackupList()
+    ml = ManifestList()
+    pipeline = Pipeline(plugins=plugins, client=StubClient(cluster), backup_list=bl, manifest_list=ml, queue_size=1)
+
+    # is the backup of a plugin still running when its first Backup is migrated?
+    overlapped = {}
+    for name in ["marathon", "metronome"]:
+        plugin = plugins[name].plugin
+
+        def migrate_backup(backup, backupList, manifestList, name=name, migrate_backup=plugin.migrate_backup):
+            overlapped.setdefault(name, not pipeline._backup_done[name].is_set())
+            return migrate_backup(backup, backupList=backupList, manifestList=manifestList)
+
+        plugin.migrate_backup = migrate_backup
+
+    pipeline.run()
+
+    assert overlapped == {"marathon": True, "metronome": True}
+    assert len(bl.backups("marathon")) == 10
+    assert len(ml.manifests("marathon")) == 10
+    assert len(ml.manifests("metronome")) == 5
@@ -1,5 +1,6 @@
 from dcos_migrate.plugins.plugin_manager import PluginManager
 from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.spec import PluginSpec
 from dcos_migrate.system import ArgParse, Arg
 
 import pytest
@@ -73,3 +74,57 @@ def test_plugin_argparse(plugin_manager):
 
     assert plugin_manager.plugins['test1'].plugin_config == {"option1": "foo"}
     assert plugin_manager.plugins['test2'].plugin_config == {"option1": "bar"}
+
+
+def test_select(plugin_manager):
+    p = plugin_manager.plugins
+    assert plugin_manager.select(plugin_manager.migrate_batch, 'migrate_depends', None) == plugin_manager.migrate_batch
+    assert plugin_manager.select(plugin_manager.migrate_batch, 'migrate_depends', ['test2']) == [[p['test1']],
+                                                                                                 [p['test2']]]
+    assert plugin_manager.select(plugin_manager.migrate_batch, 'migrate_depends', ['test1']) == [[p['test1']]]
+    # backup has no dependencies, so only the selection is left
+    assert plugin_manager.select(plugin_manager.backup_batch, 'backup_depends', ['test3']) == [[p['test3']]]
+
+
+def test_discovery_does_not_import_plugins():
+    pm = PluginManager()
+
+    for name, spec in pm.plugins.items():
+        assert not spec.loaded, name
+
+
+def test_spec_matches_implementation():
+    pm = PluginManager()
+
+    for name, spec in pm.plugins.items():
+        plugin = spec.plugin
+        assert spec.loaded
+        assert plugin.plugin_name == name
+        assert plugin.backup_depends == spec.backup_depends
+        assert plugin.migrate_depends == spec.migrate_depends
+        assert plugin.migrate_streaming == spec.migrate_streaming
+        assert plugin.config_options == spec.config_options
+
+
+def test_spec_delegates_every_hook():
+    # hooks inherited from MigratePlugin would shadow the implementation's, as __getattr__ never sees them
+    hooks = [n for n, v in vars(MigratePlugin).items() if callable(v) and not n.startswith('_')]
+
+    assert 'migrate_resume' in hooks
+    assert [n for n in hooks if n not in vars(PluginSpec)] == []
+
+
+def test_secret_backup_depends_on_config():
+    pm = PluginManager()
+
+    pm.config = {"global": {}}
+    assert pm.plugins["secret"].backup_depends == []
+    assert [p.plugin_name for b in pm.select(pm.backup_batch, 'backup_depends', ['secret']) for p in b] == ["secret"]
+
+    pm.config = {"global": {}, "secret": {"referenced-only": True}}
+    assert sorted(pm.plugins["secret"].backup_depends) == ["marathon", "metronome"]
+    selected = [p.plugin_name for b in pm.select(pm.backup_batch, 'backup_depends', ['secret']) for p in b]
+    assert sorted(selected[:2]) == ["marathon", "metronome"] and selected[2] == "secret"
+
+    pm.config = {"global": {"filter": ["/team-a/**"]}}
+    assert sorted(pm.plugins["secret"].backup_depends) == ["marathon", "metronome"]
@@ -7,6 +7,7 @@ import json
 from dcos import config
 from dcos_migrate.system import DCOSClient, ManifestList, BackupList, Backup
 from dcos_migrate.plugins.secret import SecretPlugin
+from dcos_migrate.plugins.secret.usage import SecretUsageIndex
 
 adapter = requests_mock.Adapter()
 
@@ -67,3 +68,81 @@ def test_secret_migrate():
 
         assert len(ml) == 1
         assert ml[0][0].data['foo.bar'] == 'Rk9PQkFS'
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_backup_filter(conf, **kwargs):
+    kwargs['mock'].register_uri('GET',
+                                'mock://test.cluster.mesos/secrets/v1/secret/default/team-a/secret',
+                                json={"value": "foo"},
+                                headers={'content-type': 'application/json'})
+    kwargs['mock'].register_uri('GET',
+                                'mock://test.cluster.mesos/secrets/v1/secret/default/team-a/missing',
+                                status_code=404)
+
+    bl = BackupList()
+    bl.append(
+        Backup('marathon',
+               'team-a-web',
+               data={
+                   "id": "/team-a/web",
+                   "secrets": {
+                       "secret0": {
+                           "source": "/team-a/secret"
+                       },
+                       "secret1": {
+                           "source": "team-a/missing"
+                       }
+                   }
+               }))
+
+    s = new_secret_plugin({"global": {"filter": ["/team-a/**"]}})
+    backup = s.backup(DCOSClient(toml_config=conf), backupList=bl)
+
+    # secrets are not listed, only the referenced ones are fetched
+    assert [b.name for b in backup] == ["team-a-secret"]
+    assert backup[0].data['key'] == "team-a/secret"
+
+
+def test_secret_usage_index():
+    bl = BackupList()
+    bl.append(Backup('marathon', 'web', data={"id": "/web", "secrets": {"s0": {"source": "/foo/bar"}}}))
+    bl.append(Backup('marathon', 'noop', data={"id": "/noop"}))
+    bl.append(
+        Backup('metronome',
+               'nightly',
+               data={
+                   "id": "nightly",
+                   "run": {
+                       "secrets": {
+                           "s0": {
+                               "source": "foo/bar"
+                           },
+                           "s1": {
+                               "source": "baz"
+                           }
+                       }
+                   }
+               }))
+
+    index = SecretUsageIndex.from_backups(bl)
+
+    assert index.paths() == {"foo/bar", "baz"}
+    assert index.users("/foo/bar") == {"marathon:/web", "metronome:nightly"}
+    assert index.is_used("baz")
+    assert not index.is_used("unused")
+
+
+def test_secret_migrate_referenced_only():
+    with open('tests/examples/simpleSecret.json') as json_file:
+        data = json.load(json_file)
+
+    bl = BackupList()
+    bl.append(Backup(pluginName='secret', backupName='foo.bar', data=data))
+    bl.append(Backup(pluginName='secret', backupName='unused', data=dict(data, key="unused")))
+    bl.append(Backup('marathon', 'web', data={"id": "/web", "secrets": {"s0": {"source": "/foo/bar"}}}))
+
+    s = new_secret_plugin({"global": {}, "secret": {"referenced-only": True}})
+    ml = s.migrate(backupList=bl, manifestList=ManifestList())
+
+    assert [m.name for m in ml] == ["foo.bar"]
@@ -1,5 +1,5 @@
 import argparse
-from dcos_migrate.system.argparse import Arg, ArgParse, BoolArg, DictArg
+from dcos_migrate.system.argparse import Arg, ArgParse, BoolArg, DictArg, ListArg
 
 
 def test_arg():
@@ -52,3 +52,14 @@ def test_argparse_parse():
     parsed = p.parse_args(cliargs)
 
     assert parsed == options
+
+
+def test_list_arg():
+    p = ArgParse([ListArg("plugins")])
+
+    assert p.parse_args(["--plugins", "marathon, secret", "--plugins", "metronome"]) == {
+        'global': {
+            'plugins': ["marathon", "secret", "metronome"]
+        }
+    }
+    assert p.parse_args(["--plugins", ""]) == {'global': {}}
@@ -0,0 +1,123 @@
+import pytest
+
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.system import Backup, BackupList, Manifest, ManifestList
+from dcos_migrate.system.checkpoint import Checkpoint
+
+
+class FlakyPlugin(MigratePlugin):
+    """fails after fail_after backups, records which backups it had to produce"""
+    plugin_name = "flaky"
+    migrate_streaming = True
+
+    def __init__(self, fail_after=None):
+        super(FlakyPlugin, self).__init__()
+        self.fail_after = fail_after
+        self.produced = []
+        self.migrated = []
+        self.resumed = []
+
+    def backup_iter(self, client, backupList, **kwargs):
+        for i in range(5):
+            name = "item{}".format(i)
+            if name in kwargs.get('completed', ()):
+                continue
+            if self.fail_after is not None and len(self.produced) == self.fail_after:
+                raise ConnectionError("connection reset")
+            self.produced.append(name)
+            yield Backup(self.plugin_name, name, data={"n": i})
+
+    def migrate_resume(self, backup, manifest):
+        self.resumed.append((backup.name, manifest.name))
+
+    def migrate_backup(self, backup, backupList, manifestList, **kwargs):
+        if self.fail_after is not None and len(self.migrated) == self.fail_after:
+            raise ConnectionError("connection reset")
+        self.migrated.append(backup.name)
+        return Manifest(pluginName=self.plugin_name,
+                        manifestName=backup.name,
+                        data=[{
+                            "kind": "ConfigMap",
+                            "apiVersion": "v1"
+                        }])
+
+
+def create_migrate(tmpdir, plugin, resume):
+    m = DCOSMigrate()
+    m.pm.config = {'global': {'resume': resume}}
+    m.backup_list = BackupList(path=str(tmpdir.join("backup")))
+    m.manifest_list = ManifestList(path=str(tmpdir.join("migrate")))
+    m.checkpoint = Checkpoint(path=str(tmpdir.join("checkpoint")))
+    return m
+
+
+def test_checkpoint_items(tmpdir):
+    c = Checkpoint(path=str(tmpdir))
+    c.mark_item('backup', 'secret', 'foo')
+    c.mark_item('backup', 'secret', 'bar', 'bar-manifest')
+
+    assert c.items('backup', 'secret') == {'foo': '', 'bar': 'bar-manifest'}
+    assert not c.plugin_done('backup', 'secret')
+
+    c.mark_plugin('backup', 'secret')
+    assert c.plugin_done('backup', 'secret')
+    assert not c.plugin_done('migrate', 'secret')
+
+    c.reset('backup')
+    assert not c.plugin_done('backup', 'secret')
+    assert c.items('backup', 'secret') == {}
+
+
+def test_checkpoint_ignores_truncated_line(tmpdir):
+    c = Checkpoint(path=str(tmpdir))
+    c.mark_item('backup', 'marathon', 'foo')
+    c.close()
+    with open(str(tmpdir.join('backup', 'marathon.items')), 'at') as f:
+        f.write('ba')
+
+    assert c.items('backup', 'marathon') == {'foo': ''}
+
+
+def test_resume_backup(tmpdir):
+    plugin = FlakyPlugin(fail_after=2)
+    m = create_migrate(tmpdir, plugin, resume=False)
+    with pytest.raises(ConnectionError):
+        m.backup_plugin(plugin)
+    assert not m.checkpoint.plugin_done('backup', 'flaky')
+
+    plugin = FlakyPlugin()
+    m = create_migrate(tmpdir, plugin, resume=True)
+    m.backup_plugin(plugin)
+
+    # only the missing items are fetched again, the others are loaded from disk
+    assert plugin.produced == ["item2", "item3", "item4"]
+    assert sorted(b.name for b in m.backup_list) == ["item{}".format(i) for i in range(5)]
+    assert m.checkpoint.plugin_done('backup', 'flaky')
+
+
+def test_resume_migrate(tmpdir):
+    plugin = FlakyPlugin()
+    m = create_migrate(tmpdir, plugin, resume=False)
+    m.backup_plugin(plugin)
+
+    plugin = FlakyPlugin(fail_after=3)
+    m = create_migrate(tmpdir, plugin, resume=False)
+    m.backup_list.load()
+    with pytest.raises(ConnectionError):
+        m.migrate_plugin(plugin)
+    first = plugin.migrated
+
+    plugin = FlakyPlugin()
+    m = create_migrate(tmpdir, plugin, resume=True)
+    m.backup_list.load()
+    m.migrate_plugin(plugin)
+
+    # only the items the interrupted run did not finish are migrated
+    assert len(plugin.migrated) == 2
+    assert not set(first) & set(plugin.migrated)
+    # the others are passed to the plugin with their stored manifests
+    assert sorted(plugin.resumed) == [(name, name) for name in sorted(first)]
+    assert len(m.manifest_list) == 5
+    assert sorted(ml.name for ml in m.manifest_list) == ["item{}".format(i) for i in range(5)]
+    assert m.checkpoint.plugin_done('migrate', 'flaky')
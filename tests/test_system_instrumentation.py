@@ -0,0 +1,57 @@
+import json
+import threading
+
+from dcos_migrate.benchmark import StubClient, SyntheticCluster
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.system import BackupList, ManifestList
+from dcos_migrate.system.checkpoint import Checkpoint
+from dcos_migrate.system.client import RequestStats
+from dcos_migrate.system.instrumentation import Instrumentation
+
+
+def test_measure():
+    stats = RequestStats()
+    inst = Instrumentation(stats=lambda: stats, items=True)
+
+    with inst.measure("backup"):
+        with inst.measure("backup", "marathon") as m:
+            stats.add(requests=2, received=100)
+            # requests of other threads are not accounted to the plugin
+            t = threading.Thread(target=stats.add, kwargs={"requests": 5})
+            t.start()
+            t.join()
+            m.objects += 3
+            m.item("app", 0.5)
+
+    plugin, phase = inst.measurements
+    assert (plugin.requests, plugin.received, plugin.objects) == (2, 100, 3)
+    assert plugin.items == [("app", 0.5)]
+    assert (phase.requests, phase.received, phase.objects) == (7, 100, 3)
+    assert phase.items is None
+    assert phase.wall >= plugin.wall
+
+    summary = inst.summary()
+    assert "marathon" in summary
+    assert "slowest items of backup marathon" in summary
+
+
+def test_run_instrumented(tmpdir, capsys):
+    output = tmpdir.join("instrumentation.json")
+    cluster = SyntheticCluster(apps=4, jobs=2, secrets=4, pools=1, teams=2)
+
+    m = DCOSMigrate()
+    m.client = StubClient(cluster)
+    m.backup_list = BackupList(path=str(tmpdir.join("backup")))
+    m.manifest_list = ManifestList(path=str(tmpdir.join("migrate")))
+    m.checkpoint = Checkpoint(path=str(tmpdir.join("checkpoint")))
+
+    assert m.run(["backup", "--instrument-items", "--instrument-output", str(output)]) == 0
+
+    result = json.loads(output.read())
+    measured = {(r["phase"], r["plugin"]): r for r in result["measurements"]}
+    assert measured[("backup", "marathon")]["objects"] == 4
+    assert measured[("backup", "marathon")]["requests"] == 1
+    assert len(measured[("backup", "secret")]["items"]) == measured[("backup", "secret")]["objects"]
+    assert measured[("backup", None)]["objects"] == len(m.backup_list)
+    assert measured[("backup", None)]["requests"] == sum(c for c in m.client.requests.values())
+    assert "slowest items" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import os
+
+from dcos_migrate.benchmark import StubClient, SyntheticCluster
+from dcos_migrate.cmd import DCOSMigrate
+from dcos_migrate.system import BackupList, ManifestList
+from dcos_migrate.system.checkpoint import Checkpoint
+from dcos_migrate.system.profiling import Profiler
+
+
+def busy_function():
+    return sum(i * i for i in range(10000))
+
+
+def test_profiler(tmpdir):
+    p = Profiler(["migrate", "backup:marathon"], directory=str(tmpdir), top=5)
+
+    assert p.selected("migrate", "secret")
+    assert p.selected("backup", "marathon")
+    assert not p.selected("backup", "secret")
+
+    with p.profile("migrate", "marathon"):
+        busy_function()
+        # nested blocks in the same thread are part of the outer profile
+        with p.profile("migrate", "secret"):
+            busy_function()
+    with p.profile("backup", "secret"):
+        busy_function()
+    with p.profile("backup", "marathon"):
+        busy_function()
+
+    written = p.finish()
+
+    assert sorted(os.path.basename(w)
+                  for w in written) == ["backup-marathon.prof", "migrate-marathon.prof", "migrate.prof"]
+    assert "busy_function" in tmpdir.join("migrate-marathon.txt").read()
+    assert "busy_function" in tmpdir.join("migrate.txt").read()
+
+
+def test_run_profile(tmpdir, capsys):
+    m = DCOSMigrate()
+    m.client = StubClient(SyntheticCluster(apps=2, jobs=1, secrets=2, pools=1))
+    m.backup_list = BackupList(path=str(tmpdir.join("backup")))
+    m.manifest_list = ManifestList(path=str(tmpdir.join("migrate")))
+    m.checkpoint = Checkpoint(path=str(tmpdir.join("checkpoint")))
+
+    m.run(["backup", "--profile", "metronome", "--profile-dir", str(tmpdir.join("profile"))])
+
+    assert sorted(os.listdir(str(tmpdir.join("profile")))) == ["backup-metronome.prof", "backup-metronome.txt"]
+    assert "1 profiles written" in capsys.readouterr().out
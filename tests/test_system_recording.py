@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+import requests_mock
+import dcos
+from dcos.errors import DCOSException, DCOSHTTPException
+from dcos_migrate.system import RecordingClient, ReplayClient
+
+
+@pytest.fixture
+def conf():
+    return dcos.config.Toml({
+        "core": {
+            "dcos_url": "mock://test.cluster.mesos",
+            "ssl_verify": "false",
+            "dcos_acs_token": "im-a-fake-token"
+        },
+    })
+
+
+@pytest.fixture
+def cassette(conf, tmpdir):
+    path = str(tmpdir.join("cassette.jsonl.gz"))
+    with requests_mock.Mocker() as m:
+        m.get('mock://test.cluster.mesos/marathon/v2/apps', json={"apps": [{"id": "/foo"}]})
+        m.get('mock://test.cluster.mesos/secret',
+              content=b'\xff\x00binary',
+              headers={'Content-Type': 'application/octet-stream'})
+        m.get('mock://test.cluster.mesos/missing', status_code=404)
+        m.get('mock://test.cluster.mesos/counter', [{'json': {"n": 1}}, {'json': {"n": 2}}])
+
+        client = RecordingClient(path, toml_config=conf)
+        assert client.get(client.full_dcos_url("marathon/v2/apps")).json() == {"apps": [{"id": "/foo"}]}
+        assert client.get(client.full_dcos_url("secret")).content == b'\xff\x00binary'
+        with pytest.raises(DCOSHTTPException):
+            client.get(client.full_dcos_url("missing"))
+        client.get(client.full_dcos_url("counter"))
+        client.get(client.full_dcos_url("counter"))
+        client.close()
+
+    return path
+
+
+def test_replay(cassette):
+    client = ReplayClient(cassette)
+
+    assert client.dcos_url == "mock://test.cluster.mesos"
+    assert b''.join(client.get_stream(client.full_dcos_url("marathon/v2/apps"),
+                                      chunk_size=3)) == b'{"apps": [{"id": "/foo"}]}'
+
+    r = client.get(client.full_dcos_url("secret"))
+    assert r.content == b'\xff\x00binary'
+    assert r.headers['content-type'] == 'application/octet-stream'
+
+
+def test_replay_errors(cassette):
+    client = ReplayClient(cassette)
+
+    with pytest.raises(DCOSHTTPException) as e:
+        client.get(client.full_dcos_url("missing"))
+    assert e.value.response.status_code == 404
+
+    with pytest.raises(DCOSException):
+        client.get(client.full_dcos_url("never/recorded"))
+
+
+def test_replay_order(cassette):
+    # repeated requests are served in order and the last response is repeated
+    client = ReplayClient(cassette)
+    assert [client.get(client.full_dcos_url("counter")).json()["n"] for _ in range(3)] == [1, 2, 2]
+
+
+def test_record_requests(conf, tmpdir):
+    path = str(tmpdir.join("cassette.jsonl.gz"))
+    with requests_mock.Mocker() as m:
+        m.post('mock://test.cluster.mesos/acs/api/v1/auth/login', [{'json': {"token": "a"}}, {'json': {"token": "b"}}])
+
+        client = RecordingClient(path, toml_config=conf)
+        client.post(client.full_dcos_url("acs/api/v1/auth/login"), json={"uid": "a"})
+        client.post(client.full_dcos_url("acs/api/v1/auth/login"), data=b'\xff\x00')
+        client.close()
+
+    with gzip.open(path, 'rt') as f:
+        entries = [json.loads(line) for line in f][1:]
+    assert entries[0]["method"] == "POST"
+    assert json.loads(entries[0]["request_body"]) == {"uid": "a"}
+    assert entries[0]["request_headers"]["Content-Type"] == "application/json"
+    assert entries[0]["request_headers"]["Authorization"] == "<redacted>"
+    assert "im-a-fake-token" not in json.dumps(entries)
+    assert entries[1]["request_body_b64"] == "/wA="
+
+    # POSTs to the same URL are told apart by their bodies
+    client = ReplayClient(path)
+    assert client.post(client.full_dcos_url("acs/api/v1/auth/login"), data=b'\xff\x00').json() == {"token": "b"}
+    assert client.post(client.full_dcos_url("acs/api/v1/auth/login"), json={"uid": "a"}).json() == {"token": "a"}
+    with pytest.raises(DCOSException):
+        client.post(client.full_dcos_url("acs/api/v1/auth/login"), json={"uid": "b"})
@@ -1,4 +1,4 @@
-from dcos_migrate.system import StorableList, Backup
+from dcos_migrate.system import StorableList, Backup, BackupList
 
 
 def create_example_list(dir: str) -> StorableList:
@@ -33,3 +33,44 @@ def test_load(tmpdir):
     assert len(list) == len(list2)
     # and data
     assert list[0].data == list2[0].data
+
+
+def test_load_lazy(tmpdir):
+    dir = tmpdir.mkdir("test")
+    create_example_list(str(dir))
+
+    list2 = BackupList(path=str(dir))
+    list2.load_lazy("testPlugin")
+    assert len(list2) == 0
+
+    assert list2.backup("testPlugin", "foobar").data == {"foo": "bar"}
+    # loaded only once
+    assert len(list2.backups("testPlugin")) == 1
+
+
+def test_backup_parsed_lazily(tmpdir):
+    dir = tmpdir.mkdir("test")
+    create_example_list(str(dir))
+    path = dir.join("testPlugin", "foobar.Backup.json")
+    # not the way we would serialize it ourselves
+    path.write('{"foo":   "bar"}')
+
+    b = BackupList(path=str(dir)).load().backup("testPlugin", "foobar")
+    assert not b.parsed
+    # written back as it was
+    assert b.serialize() == '{"foo":   "bar"}'
+
+    assert b.data == {"foo": "bar"}
+    assert b.parsed
+    assert b.data is b.data
+
+    b.data["foo"] = "baz"
+    assert b.serialize() == Backup.dump_pretty({"foo": "baz"})
+
+
+def test_backup_slots():
+    b = Backup(pluginName="testPlugin", backupName="foobar")
+
+    assert b.data == {}
+    assert b.data is not Backup(pluginName="testPlugin", backupName="foobar").data
+    assert not hasattr(b, "__dict__")
@@ -0,0 +1,94 @@
+import argparse
+import hashlib
+import http.server
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from dcos_migrate.utils import FetchCache
+from dcos_migrate.utils import fetch_cache
+
+
+def test_parse():
+    assert FetchCache.parse("pvc:artifacts").volume() == {
+        "name": "fetch-cache",
+        "persistentVolumeClaim": {
+            "claimName": "artifacts"
+        }
+    }
+    assert FetchCache.parse("hostPath:/var/cache/fetch").volume()["hostPath"] == {
+        "path": "/var/cache/fetch",
+        "type": "DirectoryOrCreate"
+    }
+    for spec in ["artifacts", "nfs:server:/x", "pvc:"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            FetchCache.parse(spec)
+
+
+class ArtifactServer(http.server.BaseHTTPRequestHandler):
+    """serves `content` with an ETag if `etag` is set, answering If-None-Match with 304"""
+    content = b""
+    etag = True
+    served = []
+
+    def do_GET(self):
+        etag = '"{}"'.format(hashlib.sha256(self.content).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            self.served.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.served.append(200)
+        self.send_response(200)
+        if self.etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.HTTPServer(("127.0.0.1", 0), ArtifactServer)
+    ArtifactServer.served = []
+    ArtifactServer.etag = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}/artifact.tgz".format(httpd.server_port)
+    httpd.shutdown()
+
+
+@pytest.mark.skipif(any(shutil.which(c) is None for c in ["curl", "flock", "sha256sum"]),
+                    reason="needs curl, flock and sha256sum")
+def test_cached_fetch_downloads_only_changes(tmp_path, server):
+    # the function with the cache in tmp_path
+    function = fetch_cache.CACHED_FETCH_FUNCTION.replace(fetch_cache.FETCH_CACHE_MOUNT_PATH, str(tmp_path / "cache"))
+
+    def fetch(pod):
+        (tmp_path / pod).mkdir(exist_ok=True)
+        script = fetch_cache.cached_fetch_script(['( cached_fetch "{}" "artifact.tgz" )'.format(server)])
+        script = script.replace(fetch_cache.CACHED_FETCH_FUNCTION, function)
+        subprocess.run(["sh", "-c", script], cwd=str(tmp_path / pod), check=True, capture_output=True)
+        return (tmp_path / pod / "artifact.tgz").read_bytes()
+
+    ArtifactServer.content = b"v1"
+    assert fetch("pod-1") == b"v1"
+    assert fetch("pod-2") == b"v1"
+    assert ArtifactServer.served == [200, 304]
+
+    ArtifactServer.content = b"v2"
+    assert fetch("pod-3") == b"v2"
+    assert ArtifactServer.served == [200, 304, 200]
+
+    # a server not sending an ETag any more leaves no stale one behind
+    ArtifactServer.etag = False
+    ArtifactServer.content = b"v3"
+    assert fetch("pod-4") == b"v3"
+    assert ArtifactServer.served == [200, 304, 200, 200]
+    etag = tmp_path / "cache" / hashlib.sha256(server.encode()).hexdigest() / "etag"
+    assert not etag.exists() or etag.read_text().strip() == ""
@@ -0,0 +1,53 @@
+import pytest
+from dcos_migrate.utils import IDFilter
+
+
+@pytest.mark.parametrize("patterns, id, expected", [
+    ([], "/anything", True),
+    (["/team-a/**"], "/team-a/web", True),
+    (["/team-a/**"], "/team-a/web/db", True),
+    (["/team-a/**"], "/team-ab/web", False),
+    (["/team-a/*"], "/team-a/web/db", False),
+    (["team-a/web-?"], "/team-a/web-1", True),
+    (["/team-a/web"], "team-a/web", True),
+    (["/team-a/**", "/team-b/*"], "/team-b/db", True),
+    (["/team-[ab]/**"], "/team-b/web", True),
+    (["/team-[ab]/**"], "/team-c/web", False),
+    (["/team-[!ab]/*"], "/team-c/web", True),
+    (["/team-[!ab]/*"], "/team-a/web", False),
+    (["/team[!a]a/*"], "/team/a/web", False),
+    (["/web-[0-9]"], "/web-7", True),
+    (["/web-[]]"], "/web-]", True),
+    (["/web-[1"], "/web-[1", True),
+    (["re:^/team-(a|b)/"], "/team-b/x/y", True),
+    (["re:^/team-(a|b)/"], "/team-c/x", False),
+])
+def test_match(patterns, id, expected):
+    assert IDFilter(patterns).match(id) == expected
+
+
+def test_match_separator():
+    assert IDFilter(["/team-a/**"]).match("team-a.nightly", ".")
+    assert not IDFilter(["/team-a/**"]).match("team-b.nightly", ".")
+
+
+@pytest.mark.parametrize("patterns, expected", [
+    ([], "/"),
+    (["/team-a/**"], "/team-a"),
+    (["/team-a/web"], "/team-a"),
+    (["/team-a/sub/web-*", "/team-a/db/**"], "/team-a"),
+    (["/team-a/**", "/team-b/**"], "/"),
+    (["/team-*/web"], "/"),
+    (["/team-[ab]/**"], "/"),
+    (["/team-a/web-[0-9]"], "/team-a"),
+    (["re:^/team-a/"], "/"),
+])
+def test_group(patterns, expected):
+    assert IDFilter(patterns).group() == expected
+
+
+def test_group_with_character_class_matches():
+    # the group is fetched, the class decides which of its IDs are kept
+    f = IDFilter(["/team-[ab]/**"])
+    assert [id for id in ["/team-a/web", "/team-b/db", "/team-c/web"] if f.match(id)] == ["/team-a/web", "/team-b/db"]
+    assert "/team-a/web".startswith(f.group())
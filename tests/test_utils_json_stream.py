@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from dcos_migrate.utils import JSONStream, iter_json_items, load_json
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+DOC = {
+    "apps": [
+        {
+            "id": "/group/app-1",
+            "instances": 12,
+            "cmd": "echo ünïcödé \"quoted\" [not, an, array]"
+        },
+        {
+            "id": "/app-2",
+            "cpus": 0.25,
+            "env": {}
+        },
+        {
+            "id": "/app-3",
+            "labels": {
+                "}": "{"
+            }
+        },
+    ],
+    "other": [1, 2, 3]
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 16])
+def test_items_across_chunk_boundaries(size):
+    data = json.dumps(DOC, indent=2).encode('utf-8')
+
+    assert list(iter_json_items(chunked(data, size), 'apps')) == DOC['apps']
+
+
+def test_items_skips_other_members():
+    data = json.dumps({"before": {"apps": [9]}, "apps": [1, 2], "after": None}).encode('utf-8')
+
+    assert list(iter_json_items(chunked(data, 3), 'apps')) == [1, 2]
+
+
+@pytest.mark.parametrize("size", [1, 5, 100])
+def test_items_top_level_array(size):
+    data = json.dumps([123456, -1.5e3, True, None, "x", {}, []]).encode('utf-8')
+
+    assert list(iter_json_items(chunked(data, size))) == [123456, -1.5e3, True, None, "x", {}, []]
+
+
+def test_items_empty():
+    assert list(iter_json_items([b'[ ]'])) == []
+    assert list(iter_json_items([b'{"apps": []}'], 'apps')) == []
+    assert list(iter_json_items([b'{}'], 'apps')) == []
+
+
+def test_items_are_lazy():
+    def chunks():
+        yield b'[{"id": 1},'
+        yield b' {"id": 2}'
+        raise AssertionError("read beyond the second element")
+
+    items = JSONStream(chunks()).items()
+    assert next(items) == {"id": 1}
+
+
+def test_items_truncated():
+    with pytest.raises(ValueError):
+        list(iter_json_items([b'{"apps": [{"id": 1}, {"id"'], 'apps'))
+
+
+def test_load_json():
+    data = json.dumps(DOC).encode('utf-8')
+
+    assert load_json(chunked(data, 10)) == DOC
+    assert load_json([b'[1, ', b'2]']) == [1, 2]
@@ -0,0 +1,121 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+from dcos_migrate.utils import Prebaker
+from dcos_migrate.utils.prebake import ArtifactDownloadError, ArtifactExtractError, extract
+
+
+def make_tgz(path: str, data: bytes = b"hello") -> None:
+    with tarfile.open(path, "w:gz") as tar:
+        info = tarfile.TarInfo("conf/app.conf")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+
+def make_tgz_with_links(path: str, links) -> None:
+    with tarfile.open(path, "w:gz") as tar:
+        for name, linkname in links:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = linkname
+            tar.addfile(info)
+
+
+def test_bake_writes_build_context(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    make_tgz(str(src / "bundle.tgz"))
+    (src / "run.sh").write_text("#!/bin/sh\n")
+    bundle = "file://{}/bundle.tgz".format(src)
+    script = "file://{}/run.sh".format(src)
+
+    prebaker = Prebaker(str(tmp_path / "prebake"), registry="registry.example.com")
+    image = prebaker.bake("marathon/app", "alpine:latest", "/work", [{
+        "uri": bundle
+    }, {
+        "uri": script,
+        "executable": True
+    }])
+
+    assert image.startswith("registry.example.com/marathon/app:")
+    context = tmp_path / "prebake" / "marathon" / "app"
+    assert (context / "Dockerfile").read_text() == "FROM alpine:latest\nCOPY artifacts/ /work/\n"
+    assert (context / "artifacts" / "bundle.tgz").exists()
+    assert (context / "artifacts" / "conf" / "app.conf").read_text() == "hello"
+    assert os.access(str(context / "artifacts" / "run.sh"), os.X_OK)
+    assert prebaker.build_commands() == [
+        "docker build -t {image} {context} && docker push {image}".format(image=image, context=context)
+    ]
+
+    # every URI is downloaded only once, even if the source is gone by then
+    (src / "bundle.tgz").unlink()
+    other = prebaker.bake("metronome/job", "alpine:latest", "/work", [{"uri": bundle, "cache": True}])
+    assert other.startswith("registry.example.com/metronome/job:")
+    assert (tmp_path / "prebake" / "metronome" / "job" / "artifacts" / "conf" / "app.conf").exists()
+
+    # the tag changes with what goes into the image
+    assert prebaker.image("marathon/app", "alpine:3.14", "/work", [{"uri": bundle}]) != \
+        prebaker.image("marathon/app", "alpine:latest", "/work", [{"uri": bundle}])
+
+
+def test_bake_fails_for_missing_artifact(tmp_path):
+    prebaker = Prebaker(str(tmp_path))
+    with pytest.raises(ArtifactDownloadError):
+        prebaker.bake("marathon/app", "alpine:latest", "/", [{"uri": "file://{}/missing.tgz".format(tmp_path)}])
+
+
+def test_image_tag_changes_with_content(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    make_tgz(str(src / "bundle.tgz"))
+    bundle = "file://{}/bundle.tgz".format(src)
+
+    image = Prebaker(str(tmp_path / "first")).image("marathon/app", "alpine:latest", "/work", [{"uri": bundle}])
+    make_tgz(str(src / "bundle.tgz"), data=b"changed")
+    changed = Prebaker(str(tmp_path / "second")).image("marathon/app", "alpine:latest", "/work", [{"uri": bundle}])
+
+    assert image != changed
+
+
+@pytest.mark.parametrize("name", ["/etc/passwd", "../escaped", "conf/../../escaped"])
+def test_extract_rejects_members_outside_dest(tmp_path, name):
+    archive = str(tmp_path / "evil.tgz")
+    with tarfile.open(archive, "w:gz") as tar:
+        info = tarfile.TarInfo(name)
+        tar.addfile(info, io.BytesIO(b""))
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    with pytest.raises(ArtifactExtractError):
+        extract(archive, str(dest))
+    assert not (tmp_path / "escaped").exists()
+
+
+@pytest.mark.parametrize("links", [
+    [("link", "/etc")],
+    [("link", "../..")],
+    [("sub/up", ".."), ("link", "sub/up/..")],
+])
+def test_extract_rejects_links_outside_dest(tmp_path, links):
+    archive = str(tmp_path / "evil.tgz")
+    make_tgz_with_links(archive, links)
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    with pytest.raises(ArtifactExtractError, match="points outside"):
+        extract(archive, str(dest))
+
+
+def test_extract_keeps_links_within_dest(tmp_path):
+    archive = str(tmp_path / "libs.tgz")
+    make_tgz_with_links(archive, [("lib/libfoo.so", "../lib64/libfoo.so.1"), ("current", "lib")])
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    extract(archive, str(dest))
+
+    assert os.readlink(str(dest / "lib" / "libfoo.so")) == "../lib64/libfoo.so.1"
+    assert os.readlink(str(dest / "current")) == "lib"